@@ -0,0 +1,184 @@
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from pathlib import Path
+
+# Startup time benchmark. Each scenario imports an entry point module in a fresh interpreter
+# with python -X importtime. Absolute timings depend too much on the machine and on its load,
+# so the budget in startup_budget.json is stored relative to measurements done in the same run:
+#
+# - budget_ratio: the median cumulative import time of the module divided by the import time
+#   of the reference module (prompt_toolkit, which every entry point needs anyway). The
+#   reference and the scenario are imported alternately so they see the same machine load.
+# - modules: the number of modules imported with the entry point on top of the ones a bare
+#   interpreter imports. This does not depend on the machine at all.
+# - deferred: modules that must not be imported by the entry point.
+#
+# Modules only available on another platform, like winreg for the Windows entry points, are
+# replaced by empty stand-in modules so every scenario can be measured on any platform. They
+# are only used inside functions.
+#
+# The script exits with an error when a scenario goes over its budget so it can be used to
+# catch startup regressions.
+#
+# Usage:
+#   python benchmarks/startup.py             Check all the scenarios against the budget
+#   python benchmarks/startup.py --update    Store the current measurements as the new budget
+#   python benchmarks/startup.py --path dist/ethwizard-x.y.z.pyz
+#                                            Measure the modules from a bundle instead
+
+BENCHMARKS_PATH = Path(__file__).resolve().parent
+PROJECT_PATH = BENCHMARKS_PATH.parent
+BUDGET_PATH = BENCHMARKS_PATH.joinpath('startup_budget.json')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|(\s*)(\S+)\s*$')
+
+def run_importtime(code, import_path):
+    # Run code in a fresh interpreter and return the cumulative import times in milliseconds of
+    # the modules it imported directly and the set of all the modules imported
+
+    env = dict(os.environ)
+    env['PYTHONPATH'] = str(import_path) + (
+        os.pathsep + env['PYTHONPATH'] if env.get('PYTHONPATH') else '')
+
+    process_result = subprocess.run([
+        sys.executable, '-X', 'importtime', '-c', code
+        ], capture_output=True, text=True, cwd=BENCHMARKS_PATH, env=env)
+
+    if process_result.returncode != 0:
+        raise RuntimeError(f'Unable to run {code}.\n{process_result.stderr}')
+
+    cumulative = {}
+    imported = set()
+
+    for line in process_result.stderr.splitlines():
+        result = IMPORTTIME_LINE.match(line)
+        if not result:
+            continue
+        imported.add(result.group(4))
+        if result.group(3) == ' ':
+            cumulative[result.group(4)] = int(result.group(2)) / 1000.0
+
+    return cumulative, imported
+
+def import_code(module, stand_ins):
+    # Return the code importing module with empty stand-ins for the platform only modules
+    code = f'import {module}'
+    if stand_ins:
+        code = ('import sys, types; ' +
+            ''.join(f'sys.modules[{name!r}] = types.ModuleType({name!r}); '
+                for name in stand_ins) +
+            code)
+    return code
+
+def measure_scenario(module, stand_ins, reference, runs, import_path):
+    # Return the median import time of module in milliseconds, its median ratio to the import
+    # time of reference and the set of modules imported with it
+
+    timings = []
+    ratios = []
+    imported = set()
+
+    # The first run writes the bytecode cache and it is not counted
+    for run_index in range(runs + 1):
+        reference_cumulative, reference_imported = run_importtime(f'import {reference}',
+            import_path)
+        cumulative, imported = run_importtime(import_code(module, stand_ins), import_path)
+
+        if reference not in reference_cumulative:
+            raise RuntimeError(f'No import time found for {reference}')
+        if module not in cumulative:
+            raise RuntimeError(f'No import time found for {module}')
+
+        if run_index > 0:
+            timings.append(cumulative[module])
+            ratios.append(cumulative[module] / reference_cumulative[reference])
+
+    return statistics.median(timings), statistics.median(ratios), imported
+
+def load_budget():
+    with open(BUDGET_PATH, 'r', encoding='utf8') as budget_file:
+        return json.load(budget_file)
+
+def save_budget(budget):
+    with open(BUDGET_PATH, 'w', encoding='utf8') as budget_file:
+        json.dump(budget, budget_file, indent=2)
+        budget_file.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the wizard startup time budget.')
+    parser.add_argument('--update', action='store_true',
+        help='store the measurements as the new budget')
+    parser.add_argument('--runs', type=int, default=7,
+        help='number of measured runs for each scenario')
+    parser.add_argument('--path', type=Path, default=PROJECT_PATH,
+        help='import the modules from this path, like a .pyz bundle, instead of the sources')
+    parser.add_argument('scenarios', nargs='*', help='scenarios to run, all by default')
+    args = parser.parse_args()
+
+    budget = load_budget()
+    tolerance = budget.get('tolerance', 0.25)
+    module_tolerance = budget.get('module_tolerance', 0.1)
+    reference = budget.get('reference', 'prompt_toolkit')
+    import_path = args.path.resolve()
+
+    # Modules imported by the interpreter itself are not counted
+    _, interpreter_modules = run_importtime('pass', import_path)
+
+    failures = []
+
+    for name, scenario in budget['scenarios'].items():
+        if args.scenarios and name not in args.scenarios:
+            continue
+
+        median_ms, ratio, imported = measure_scenario(scenario['module'],
+            scenario.get('stand_ins', []), reference, args.runs, import_path)
+        module_count = len(imported - interpreter_modules)
+
+        loaded_deferred = sorted(
+            module for module in scenario.get('deferred', []) if module in imported)
+        if loaded_deferred:
+            failures.append(f'{name}: deferred modules were imported: '
+                f'{", ".join(loaded_deferred)}')
+
+        if args.update:
+            scenario['budget_ratio'] = round(ratio, 2)
+            scenario['modules'] = module_count
+            print(f'{name}: {ratio:.2f}x {reference} ({median_ms:.1f} ms), '
+                f'{module_count} modules (new budget)')
+            continue
+
+        status = 'ok'
+
+        budget_ratio = scenario.get('budget_ratio')
+        if budget_ratio is not None and ratio > budget_ratio * (1.0 + tolerance):
+            status = 'OVER BUDGET'
+            failures.append(f'{name}: {ratio:.2f}x {reference} is over the budget of '
+                f'{budget_ratio:.2f}x (+{tolerance:.0%})')
+
+        budget_modules = scenario.get('modules')
+        if budget_modules is not None and module_count > budget_modules * (
+            1.0 + module_tolerance):
+            status = 'OVER BUDGET'
+            failures.append(f'{name}: {module_count} modules imported is over the budget of '
+                f'{budget_modules} modules (+{module_tolerance:.0%})')
+
+        print(f'{name}: {ratio:.2f}x {reference} ({median_ms:.1f} ms, budget {budget_ratio}x), '
+            f'{module_count} modules (budget {budget_modules}) {status}')
+
+    if args.update:
+        save_budget(budget)
+
+    if failures:
+        print('\n'.join(failures), file=sys.stderr)
+        return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+from pathlib import Path
+
+from ethwizard.cache import get_cache_directory
+from ethwizard.download import download_file, feed_consumers
+
+from ethwizard.constants import (
+    ARTIFACT_CACHE_NAME,
+    ARTIFACT_CACHE_MAX_SIZE
+)
+
+# Content-addressed store for downloaded artifacts. Files are stored by their SHA256 hash and
+# an index maps each download URL to its hash. Cached files are verified before being used and
+# the least recently used files are evicted when the store grows above ARTIFACT_CACHE_MAX_SIZE.
+
+INDEX_FILE = 'index.json'
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_index_lock = threading.RLock()
+
+def get_store_directory():
+    return get_cache_directory(ARTIFACT_CACHE_NAME)
+
+def _blob_path(sha256):
+    return get_store_directory().joinpath('sha256', sha256[:2], sha256)
+
+def _load_index():
+    index_path = get_store_directory().joinpath(INDEX_FILE)
+    if not index_path.is_file():
+        return {'urls': {}, 'blobs': {}}
+
+    try:
+        with open(index_path, 'r', encoding='utf8') as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return {'urls': {}, 'blobs': {}}
+
+    index.setdefault('urls', {})
+    index.setdefault('blobs', {})
+    return index
+
+def _save_index(index, log):
+    index_path = get_store_directory().joinpath(INDEX_FILE)
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = index_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf8') as index_file:
+            json.dump(index, index_file)
+        os.replace(temp_path, index_path)
+    except OSError as exception:
+        log.warning(f'Unable to save artifact store index. {exception}')
+
+def file_sha256(file_path):
+    file_hash = hashlib.sha256()
+    with open(file_path, 'rb') as input_file:
+        for chunk in iter(lambda: input_file.read(HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+def _place(source_path, destination_path):
+    # Hard link the stored file to its destination when possible, copy it otherwise
+    destination_path = Path(destination_path)
+    destination_path.parent.mkdir(parents=True, exist_ok=True)
+    if destination_path.exists():
+        destination_path.unlink()
+    try:
+        os.link(source_path, destination_path)
+    except OSError:
+        shutil.copyfile(source_path, destination_path)
+
+def _evict(index, log, max_size=ARTIFACT_CACHE_MAX_SIZE):
+    # Remove least recently used blobs until the store fits in max_size
+    total_size = sum(blob['size'] for blob in index['blobs'].values())
+    if total_size <= max_size:
+        return
+
+    by_last_used = sorted(index['blobs'].items(), key=lambda item: item[1]['last_used'])
+    for sha256, blob in by_last_used:
+        if total_size <= max_size:
+            break
+        try:
+            _blob_path(sha256).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as exception:
+            log.warning(f'Unable to evict artifact {sha256}. {exception}')
+            continue
+        total_size = total_size - blob['size']
+        del index['blobs'][sha256]
+        log.info(f'Evicted artifact {sha256} from the store')
+
+    index['urls'] = {
+        url: sha256 for url, sha256 in index['urls'].items() if sha256 in index['blobs']}
+
+def lookup(url, log, expected_sha256=None):
+    # Return the path of a verified stored artifact for url or None
+
+    with _index_lock:
+        index = _load_index()
+        if expected_sha256 is not None:
+            sha256 = expected_sha256.lower()
+        else:
+            sha256 = index['urls'].get(url)
+        if sha256 is None or sha256 not in index['blobs']:
+            return None
+
+        blob_path = _blob_path(sha256)
+        if not blob_path.is_file() or file_sha256(blob_path) != sha256:
+            log.warning(f'Stored artifact {sha256} for {url} is missing or corrupted. It will '
+                f'be downloaded again.')
+            try:
+                blob_path.unlink()
+            except OSError:
+                pass
+            del index['blobs'][sha256]
+            index['urls'].pop(url, None)
+            _save_index(index, log)
+            return None
+
+        index['blobs'][sha256]['last_used'] = time.time()
+        index['urls'][url] = sha256
+        _save_index(index, log)
+
+        return blob_path
+
+def store(url, file_path, sha256, log):
+    # Add a downloaded file to the store. Returns the stored path or None if it could not be
+    # stored.
+
+    with _index_lock:
+        blob_path = _blob_path(sha256)
+        try:
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            if not blob_path.is_file():
+                temp_path = blob_path.with_suffix('.tmp')
+                _place(file_path, temp_path)
+                os.replace(temp_path, blob_path)
+        except OSError as exception:
+            log.warning(f'Unable to add {url} to the artifact store. {exception}')
+            return None
+
+        index = _load_index()
+        index['blobs'][sha256] = {
+            'size': blob_path.stat().st_size,
+            'last_used': time.time()
+        }
+        index['urls'][url] = sha256
+        _evict(index, log)
+        _save_index(index, log)
+
+        if sha256 not in index['blobs']:
+            return None
+        return blob_path
+
+def fetch_stored(url, destination_path, log, expected_sha256=None):
+    # Place the stored artifact for url in destination_path. Returns its SHA256 hex digest or
+    # None if it is not in the store.
+
+    stored_path = lookup(url, log, expected_sha256)
+    if stored_path is None:
+        return None
+
+    log.info(f'Using stored artifact for {url}')
+    _place(stored_path, destination_path)
+    return stored_path.name
+
+def download_artifact(url, destination_path, log, description, expected_sha256=None,
+    set_percentage=None, consumers=()):
+    # Download url into destination_path using the artifact store. description is used in log
+    # messages and consumers receive the file content (see download_file). Returns the SHA256
+    # hex digest of the file or None on failure.
+
+    stored_sha256 = fetch_stored(url, destination_path, log, expected_sha256)
+    if stored_sha256 is not None:
+        if consumers:
+            feed_consumers(destination_path, consumers)
+        return stored_sha256
+
+    result = download_file(url, destination_path, log, description, set_percentage,
+        consumers=consumers)
+    if result.status_code is not None:
+        log.error(f'HTTP error while downloading {description}. '
+            f'Status code {result.status_code}')
+        return None
+    if result.exception is not None:
+        log.error(f'Exception while downloading {description}. {result.exception}')
+        return None
+
+    sha256 = result.sha256
+
+    if expected_sha256 is not None and sha256 != expected_sha256.lower():
+        log.error(f'SHA256 checksum failed on {description}. Expected {expected_sha256} but '
+            f'we got {sha256}.')
+        return None
+
+    store(url, destination_path, sha256, log)
+
+    return sha256
@@ -0,0 +1,300 @@
+import json
+import threading
+import time
+
+from ethwizard.lazyimport import lazy_import
+
+from ethwizard import httpclient
+
+from ethwizard.constants import (
+    UNKNOWN_VALUE,
+    SECONDS_PER_SLOT,
+    BN_SYNCING_EP,
+    BN_PEER_COUNT_EP,
+    BN_GENESIS_EP,
+    BN_EVENTS_EP,
+    BN_EVENTS_TOPICS,
+    BN_WATCHER_MIN_POLL_INTERVAL,
+    BN_WATCHER_MAX_POLL_INTERVAL,
+    BN_WATCHER_FALLBACK_POLL_INTERVAL,
+    BN_WATCHER_EVENTS_READ_TIMEOUT
+)
+
+httpx = lazy_import('httpx')
+
+# Beacon node watcher. It follows the standard beacon API server-sent events stream for head,
+# finalized checkpoint and chain reorg events and only polls the syncing and peer count
+# endpoints at a slow adaptive interval. If the events stream is not available, it falls back
+# to polling every second.
+
+JSON_HEADERS = {
+    'accept': 'application/json'
+}
+
+EVENT_STREAM_HEADERS = {
+    'accept': 'text/event-stream'
+}
+
+class BeaconNodeWatcher:
+
+    def __init__(self, base_url, log_text=None, peers_endpoint=BN_PEER_COUNT_EP):
+        # peers_endpoint can be BN_PEERS_EP for clients where connected peers are counted from
+        # the peers list
+        self.base_url = base_url
+        self.log_text = log_text
+        self.peers_endpoint = peers_endpoint
+
+        self.genesis_time = None
+        self.events_connected = False
+        self.events_supported = True
+
+        self._lock = threading.Lock()
+        self._updated = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        self._status = {
+            'bn_is_syncing': False,
+            'bn_head_slot': UNKNOWN_VALUE,
+            'bn_sync_distance': UNKNOWN_VALUE,
+            'bn_connected_peers': 0,
+            'bn_finalized_epoch': UNKNOWN_VALUE,
+            'bn_reorgs': 0
+        }
+
+    def start(self):
+        for target in (self._poll_loop, self._events_loop):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopping.set()
+        self._updated.set()
+
+    def status(self):
+        # Return a copy of the latest known beacon node status
+        with self._lock:
+            return dict(self._status)
+
+    def wait_for_update(self, timeout):
+        # Wait until the status changed or until timeout. Returns True if it changed.
+        updated = self._updated.wait(timeout)
+        self._updated.clear()
+        return updated
+
+    def _log(self, message):
+        if self.log_text is not None:
+            self.log_text(message)
+
+    def _update(self, **values):
+        with self._lock:
+            changed = False
+            for key, value in values.items():
+                if self._status.get(key) != value:
+                    self._status[key] = value
+                    changed = True
+        if changed:
+            self._updated.set()
+        return changed
+
+    def _current_slot(self):
+        if self.genesis_time is None:
+            return None
+        return max(int(time.time() - self.genesis_time) // SECONDS_PER_SLOT, 0)
+
+    def _get_json(self, endpoint):
+        query_url = self.base_url + endpoint
+        try:
+            response = httpclient.get(query_url, headers=JSON_HEADERS)
+        except httpx.RequestError as exception:
+            self._log(f'Exception: {exception} while querying beacon node.')
+            return None
+
+        if response.status_code != 200:
+            self._log(f'Status code: {response.status_code} while querying beacon node.')
+            return None
+
+        return response.json()
+
+    def _fetch_genesis(self):
+        genesis_json = self._get_json(BN_GENESIS_EP)
+        if (
+            genesis_json and
+            'data' in genesis_json and
+            'genesis_time' in genesis_json['data']
+            ):
+            self.genesis_time = int(genesis_json['data']['genesis_time'])
+
+    def _poll(self):
+        # Poll syncing status and peer count. Returns True if anything changed.
+        syncing_json = self._get_json(BN_SYNCING_EP)
+        if syncing_json is None:
+            return False
+        peer_count_json = self._get_json(self.peers_endpoint)
+        if peer_count_json is None:
+            return False
+
+        values = {}
+
+        if (
+            'data' in syncing_json and
+            'is_syncing' in syncing_json['data']
+            ):
+            values['bn_is_syncing'] = bool(syncing_json['data']['is_syncing'])
+        else:
+            values['bn_is_syncing'] = False
+
+        if (
+            'data' in syncing_json and
+            'head_slot' in syncing_json['data']
+            ):
+            values['bn_head_slot'] = int(syncing_json['data']['head_slot'])
+        else:
+            values['bn_head_slot'] = UNKNOWN_VALUE
+
+        if (
+            'data' in syncing_json and
+            'sync_distance' in syncing_json['data']
+            ):
+            values['bn_sync_distance'] = int(syncing_json['data']['sync_distance'])
+        else:
+            values['bn_sync_distance'] = UNKNOWN_VALUE
+
+        values['bn_connected_peers'] = 0
+        if (
+            'data' in peer_count_json and
+            type(peer_count_json['data']) is list
+            ):
+            for peer in peer_count_json['data']:
+                if peer.get('state') == 'connected':
+                    values['bn_connected_peers'] = values['bn_connected_peers'] + 1
+        elif (
+            'data' in peer_count_json and
+            'connected' in peer_count_json['data']
+            ):
+            values['bn_connected_peers'] = int(peer_count_json['data']['connected'])
+
+        # Do not move back the head we already got from a more recent head event
+        with self._lock:
+            known_head_slot = self._status['bn_head_slot']
+        if (
+            self.events_connected and
+            type(known_head_slot) is int and
+            type(values['bn_head_slot']) is int and
+            values['bn_head_slot'] < known_head_slot
+            ):
+            del values['bn_head_slot']
+            del values['bn_sync_distance']
+
+        return self._update(**values)
+
+    def _poll_loop(self):
+        self._fetch_genesis()
+
+        poll_interval = BN_WATCHER_MIN_POLL_INTERVAL
+
+        while not self._stopping.is_set():
+            changed = self._poll()
+
+            if not self.events_connected:
+                poll_interval = BN_WATCHER_FALLBACK_POLL_INTERVAL
+            elif changed:
+                poll_interval = BN_WATCHER_MIN_POLL_INTERVAL
+            else:
+                # Nothing changed since last poll, the events stream covers head progress
+                poll_interval = min(poll_interval * 2.0, BN_WATCHER_MAX_POLL_INTERVAL)
+
+            self._stopping.wait(poll_interval)
+
+    def _handle_event(self, event_name, data):
+        try:
+            event_data = json.loads(data)
+        except ValueError:
+            return
+
+        if event_name == 'head' and 'slot' in event_data:
+            head_slot = int(event_data['slot'])
+            values = {
+                'bn_head_slot': head_slot
+            }
+            current_slot = self._current_slot()
+            if current_slot is not None:
+                values['bn_sync_distance'] = max(current_slot - head_slot, 0)
+            self._update(**values)
+        elif event_name == 'finalized_checkpoint' and 'epoch' in event_data:
+            self._update(bn_finalized_epoch=int(event_data['epoch']))
+        elif event_name == 'chain_reorg':
+            with self._lock:
+                reorgs = self._status['bn_reorgs'] + 1
+            self._update(bn_reorgs=reorgs)
+            self._log(f'Chain reorg detected at slot {event_data.get("slot", UNKNOWN_VALUE)} '
+                f'with depth {event_data.get("depth", UNKNOWN_VALUE)}.')
+
+    def _consume_events(self):
+        # Read the events stream until it closes. Returns True if at least one event was
+        # received.
+        events_url = self.base_url + BN_EVENTS_EP
+        params = {
+            'topics': ','.join(BN_EVENTS_TOPICS)
+        }
+        timeout = httpx.Timeout(5.0, read=BN_WATCHER_EVENTS_READ_TIMEOUT)
+
+        with httpclient.stream('GET', events_url, params=params, headers=EVENT_STREAM_HEADERS,
+            timeout=timeout) as http_stream:
+
+            if http_stream.status_code != 200:
+                self._log(f'Status code: {http_stream.status_code} while subscribing to beacon '
+                    f'node events. Falling back to polling.')
+                self.events_supported = False
+                return False
+
+            self.events_connected = True
+
+            received = False
+            event_name = None
+            data_lines = []
+
+            for line in http_stream.iter_lines():
+                if self._stopping.is_set():
+                    return received
+
+                if line == '':
+                    # Empty line dispatches the event
+                    if event_name is not None and len(data_lines) > 0:
+                        self._handle_event(event_name, '\n'.join(data_lines))
+                        received = True
+                    event_name = None
+                    data_lines = []
+                elif line.startswith(':'):
+                    # Comment, used as keep-alive by some clients
+                    continue
+                elif line.startswith('event:'):
+                    event_name = line[len('event:'):].strip()
+                elif line.startswith('data:'):
+                    data_lines.append(line[len('data:'):].strip())
+
+            return received
+
+    def _events_loop(self):
+        # Reconnect right away after a read timeout. Any other exit waits before reconnecting,
+        # twice as long each time the stream closes without delivering an event, so a node
+        # that accepts and closes the connection is not hit in a tight loop.
+        retry_delay = BN_WATCHER_MIN_POLL_INTERVAL
+        while not self._stopping.is_set() and self.events_supported:
+            try:
+                if self._consume_events():
+                    retry_delay = BN_WATCHER_MIN_POLL_INTERVAL
+            except httpx.ReadTimeout:
+                # No event for a while, simply reconnect
+                retry_delay = BN_WATCHER_MIN_POLL_INTERVAL
+                continue
+            except httpx.HTTPError as exception:
+                self._log(f'Exception: {exception} while reading beacon node events.')
+            finally:
+                self.events_connected = False
+
+            if self._stopping.is_set() or not self.events_supported:
+                break
+            self._stopping.wait(retry_delay)
+            retry_delay = min(retry_delay * 2.0, BN_WATCHER_MAX_POLL_INTERVAL)
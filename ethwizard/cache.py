@@ -0,0 +1,15 @@
+import os
+
+from pathlib import Path
+
+from ethwizard.constants import (
+    LINUX_SAVE_DIRECTORY
+)
+
+def get_cache_directory(name):
+    # Return the cache directory for name. Caches are kept next to the saved wizard state for
+    # the current platform.
+    if os.name == 'nt':
+        app_data = Path(os.getenv('LOCALAPPDATA', os.getenv('APPDATA', '')))
+        return app_data.joinpath('eth-wizard', 'cache', name)
+    return Path(LINUX_SAVE_DIRECTORY, 'cache', name)
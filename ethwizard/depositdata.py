@@ -0,0 +1,183 @@
+import json
+import re
+
+from dataclasses import dataclass
+
+from typing import Optional
+
+from ethwizard.constants import (
+    JSON_STREAM_CHUNK_SIZE,
+    JSON_STREAM_MAX_ELEMENT_SIZE,
+    DEPOSIT_MAX_AMOUNT_GWEI
+)
+
+# Readers for deposit data and keystore files. Deposit data files are JSON arrays with one
+# element per validator and they are read one element at a time so files for thousands of
+# validators are handled with bounded memory.
+
+PUBKEY_PATTERN = re.compile(r'^(0x)?[0-9a-f]{96}$', flags=re.IGNORECASE)
+WITHDRAWAL_CREDENTIALS_PATTERN = re.compile(r'^(0x)?[0-9a-f]{64}$', flags=re.IGNORECASE)
+SIGNATURE_PATTERN = re.compile(r'^(0x)?[0-9a-f]{192}$', flags=re.IGNORECASE)
+
+_ARRAY_START = 0
+_VALUE_OR_END = 1
+_VALUE = 2
+_SEPARATOR_OR_END = 3
+
+_NUMBER_CHARACTERS = '0123456789.eE+-'
+
+@dataclass
+class DepositData():
+    pubkey: str
+    withdrawal_credentials: str
+    amount: int
+    signature: Optional[str] = None
+
+    def public_key(self) -> str:
+        # Public key with its 0x prefix as used by the beacon chain APIs
+        return '0x' + self.pubkey.lower().replace('0x', '', 1)
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def iter_json_array(input_file, chunk_size=JSON_STREAM_CHUNK_SIZE):
+    # Yield the elements of the JSON array in the text file input_file one at a time. Raises
+    # ValueError if the content is not a valid JSON array.
+
+    decoder = json.JSONDecoder()
+    buffer = ''
+    ended = False
+    need_more = False
+    state = _ARRAY_START
+
+    while True:
+        buffer = buffer.lstrip()
+
+        if len(buffer) == 0 or need_more:
+            if ended:
+                raise ValueError('Invalid or incomplete JSON array')
+            if len(buffer) > JSON_STREAM_MAX_ELEMENT_SIZE:
+                raise ValueError('JSON array element is too large')
+            chunk = input_file.read(chunk_size)
+            if chunk == '':
+                ended = True
+            buffer = buffer + chunk
+            need_more = False
+            continue
+
+        if state == _ARRAY_START:
+            if buffer[0] != '[':
+                raise ValueError('Expected a JSON array')
+            buffer = buffer[1:]
+            state = _VALUE_OR_END
+
+        elif state == _SEPARATOR_OR_END:
+            if buffer[0] == ',':
+                buffer = buffer[1:]
+                state = _VALUE
+            elif buffer[0] == ']':
+                return
+            else:
+                raise ValueError(f'Unexpected character in JSON array: {buffer[0]}')
+
+        elif state == _VALUE_OR_END and buffer[0] == ']':
+            return
+
+        else:
+            try:
+                value, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # Most likely an element cut at the end of the buffer
+                need_more = True
+                continue
+
+            if not ended and (
+                end == len(buffer) or
+                (_is_number(value) and buffer[end] in _NUMBER_CHARACTERS)
+                ):
+                # A number at or next to the end of the buffer might not be complete. The
+                # decoder reads 3 out of 3. or 3.5e when the rest is still to come.
+                need_more = True
+                continue
+
+            yield value
+            buffer = buffer[end:]
+            state = _SEPARATOR_OR_END
+
+def validate_deposit_data(element) -> Optional[str]:
+    # Return why element is not a valid deposit data entry or None if it is valid
+
+    if not isinstance(element, dict):
+        return 'entry is not an object'
+
+    pubkey = element.get('pubkey')
+    if not isinstance(pubkey, str) or not PUBKEY_PATTERN.match(pubkey):
+        return f'invalid pubkey {pubkey}'
+
+    withdrawal_credentials = element.get('withdrawal_credentials')
+    if (
+        not isinstance(withdrawal_credentials, str) or
+        not WITHDRAWAL_CREDENTIALS_PATTERN.match(withdrawal_credentials)
+        ):
+        return f'invalid withdrawal credentials {withdrawal_credentials}'
+
+    amount = element.get('amount')
+    if type(amount) is not int or not (0 < amount <= DEPOSIT_MAX_AMOUNT_GWEI):
+        return f'invalid amount {amount}'
+
+    signature = element.get('signature')
+    if signature is not None and (
+        not isinstance(signature, str) or not SIGNATURE_PATTERN.match(signature)):
+        return f'invalid signature {signature}'
+
+    return None
+
+def iter_deposit_data(deposit_data_path, log):
+    # Yield a DepositData for each valid entry of a deposit data file. Invalid entries are
+    # logged and skipped. Raises ValueError or OSError if the file cannot be read.
+
+    with open(deposit_data_path, 'r', encoding='utf8') as deposit_data_file:
+        for index, element in enumerate(iter_json_array(deposit_data_file)):
+            error = validate_deposit_data(element)
+            if error is not None:
+                log.error(f'Skipping deposit data entry {index} in {deposit_data_path}: '
+                    f'{error}')
+                continue
+
+            yield DepositData(
+                pubkey=element['pubkey'],
+                withdrawal_credentials=element['withdrawal_credentials'],
+                amount=element['amount'],
+                signature=element.get('signature'))
+
+def read_deposit_public_keys(deposit_data_path, log):
+    # Return the public keys found in a deposit data file. Returns an empty list if the file
+    # cannot be read.
+
+    try:
+        return [deposit_data.public_key() for deposit_data in
+            iter_deposit_data(deposit_data_path, log)]
+    except (OSError, ValueError) as exception:
+        log.error(f'Unable to read deposit data file {deposit_data_path}. {exception}')
+        return []
+
+def read_keystore_public_key(keystore_path, log):
+    # Return the public key of a keystore file with its 0x prefix or None
+
+    try:
+        with open(keystore_path, 'r', encoding='utf8') as keystore_file:
+            keystore = json.load(keystore_file)
+    except (OSError, ValueError) as exception:
+        log.error(f'Unable to read keystore file {keystore_path}. {exception}')
+        return None
+
+    if not isinstance(keystore, dict) or 'pubkey' not in keystore:
+        log.error(f'No pubkey found in keystore file {keystore_path}')
+        return None
+
+    pubkey = keystore['pubkey']
+    if not isinstance(pubkey, str) or not PUBKEY_PATTERN.match(pubkey):
+        log.error(f'Invalid pubkey found in keystore file {keystore_path}')
+        return None
+
+    return '0x' + pubkey.lower().replace('0x', '', 1)
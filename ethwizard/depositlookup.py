@@ -0,0 +1,156 @@
+import random
+import threading
+import time
+
+from ethwizard.lazyimport import lazy_import
+
+from collections import deque
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ethwizard import httpclient
+
+from ethwizard.constants import (
+    BEACONCHA_IN_URLS,
+    BEACONCHA_VALIDATOR_DEPOSITS_API_URL,
+    BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST,
+    BEACONCHA_IN_MAX_CONCURRENT_REQUESTS,
+    BEACONCHA_IN_RATE_LIMIT,
+    BEACONCHA_IN_RATE_PERIOD,
+    BEACONCHA_IN_MAX_RETRIES,
+    BEACONCHA_IN_RETRY_BASE_DELAY,
+    BEACONCHA_IN_RETRY_MAX_DELAY
+)
+
+httpx = lazy_import('httpx')
+
+# Validator deposit lookups with the beaconcha.in API. Public keys are split in chunks of at most
+# BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST keys, the chunks are requested concurrently under a
+# rate limiter shared by all the lookups and failed requests are retried with exponential
+# backoff and jitter.
+
+class RateLimiter:
+    # Allow at most rate calls to acquire in any period seconds window
+
+    def __init__(self, rate, period):
+        self.rate = rate
+        self.period = period
+
+        self._lock = threading.Lock()
+        self._calls = deque()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while len(self._calls) > 0 and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+
+                if len(self._calls) < self.rate:
+                    self._calls.append(now)
+                    return
+
+                wait_time = self.period - (now - self._calls[0])
+
+            time.sleep(wait_time)
+
+_rate_limiter = RateLimiter(BEACONCHA_IN_RATE_LIMIT, BEACONCHA_IN_RATE_PERIOD)
+
+def _retry_delay(retry_index, response=None):
+    # Exponential backoff with full jitter. A Retry-After header from the server wins.
+    if response is not None:
+        retry_after = response.headers.get('Retry-After')
+        if retry_after is not None and retry_after.isdigit():
+            return float(retry_after)
+
+    delay = min(BEACONCHA_IN_RETRY_BASE_DELAY * (2 ** retry_index),
+        BEACONCHA_IN_RETRY_MAX_DELAY)
+    return random.uniform(delay / 2, delay)
+
+def _get_chunk_deposits(network, public_keys, log):
+    # Return the deposits for a chunk of public keys or None after too many failures
+
+    pubkey_arg = ','.join(public_keys)
+    bc_api_query_url = (BEACONCHA_IN_URLS[network] +
+        BEACONCHA_VALIDATOR_DEPOSITS_API_URL.format(indexOrPubkey=pubkey_arg))
+    headers = {'accept': 'application/json'}
+
+    response = None
+
+    for retry_index in range(BEACONCHA_IN_MAX_RETRIES + 1):
+        if retry_index > 0:
+            retry_delay = _retry_delay(retry_index - 1, response)
+            log.info(f'We will retry in {retry_delay:.1f} seconds (retry index = '
+                f'{retry_index})')
+            time.sleep(retry_delay)
+
+        _rate_limiter.acquire()
+
+        response = None
+        try:
+            response = httpclient.get(bc_api_query_url, headers=headers, follow_redirects=True)
+        except httpx.RequestError as exception:
+            log.error(f'Exception {exception} when trying to get deposits for '
+                f'{len(public_keys)} validator(s) from beaconcha.in')
+            continue
+
+        if response.status_code != 200:
+            log.error(f'Error code {response.status_code} when trying to get deposits for '
+                f'{len(public_keys)} validator(s) from beaconcha.in')
+            continue
+
+        try:
+            response_json = response.json()
+        except ValueError:
+            response_json = None
+
+        if (
+            not isinstance(response_json, dict) or
+            'status' not in response_json or
+            response_json['status'] != 'OK' or
+            'data' not in response_json
+            ):
+            log.error(f'Unexpected response data or structure from {bc_api_query_url}: '
+                f'{response_json}')
+            response = None
+            continue
+
+        validator_deposits = response_json['data']
+        # beaconcha.in API does not return a list for a single validator so
+        # we make it a list for ease of use
+        if type(validator_deposits) is not list:
+            validator_deposits = [validator_deposits]
+
+        return validator_deposits
+
+    return None
+
+def get_validator_deposits(network, public_keys, log):
+    # Return the validator deposits for public_keys from the beaconcha.in API or False if we
+    # could not get all of them.
+
+    chunks = [
+        public_keys[index:index + BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST]
+        for index in range(0, len(public_keys), BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST)
+    ]
+    if len(chunks) == 0:
+        return []
+
+    if len(chunks) > 1:
+        log.info(f'Looking up deposits for {len(public_keys)} validators in {len(chunks)} '
+            f'requests...')
+
+    with ThreadPoolExecutor(
+        max_workers=min(len(chunks), BEACONCHA_IN_MAX_CONCURRENT_REQUESTS)) as executor:
+        results = list(executor.map(lambda chunk: _get_chunk_deposits(network, chunk, log),
+            chunks))
+
+    validator_deposits = []
+    for result in results:
+        if result is None:
+            log.error(f'We failed to get the validator deposits from the beaconcha.in API after '
+                f'{BEACONCHA_IN_MAX_RETRIES} retries.')
+            return False
+        validator_deposits.extend(result)
+
+    return validator_deposits
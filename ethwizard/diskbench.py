@@ -0,0 +1,338 @@
+import json
+import math
+import mmap
+import os
+import random
+import statistics
+import threading
+import time
+
+from dataclasses import dataclass, asdict
+
+from pathlib import Path
+
+from typing import Optional
+
+from ethwizard.statestore import write_file_atomically
+
+from ethwizard.constants import (
+    DISK_BENCHMARK_DIRECTORY,
+    DISK_BENCHMARK_HISTORY_FILE,
+    DISK_BENCHMARK_HISTORY_SIZE,
+    DISK_BENCHMARK_FILE_SIZE,
+    DISK_BENCHMARK_BLOCK_SIZE,
+    DISK_BENCHMARK_THREADS,
+    DISK_BENCHMARK_READ_RATIO,
+    DISK_BENCHMARK_WARMUP_DURATION,
+    DISK_BENCHMARK_MIN_DURATION,
+    DISK_BENCHMARK_MAX_DURATION,
+    DISK_BENCHMARK_SAMPLE_INTERVAL,
+    DISK_BENCHMARK_CONFIDENCE
+)
+
+# In-process disk benchmark. A test file is written once and a pool of threads then performs
+# random 4k reads and writes on it (75% reads like the fio randrw job) with O_DIRECT and page
+# aligned mmap buffers so the page cache is bypassed. The system calls release the GIL, so
+# the threads keep many requests in flight like fio does with a deep queue. The file size and
+# the number of threads match the 4 GiB file and the iodepth of 64 of the fio job so its
+# results can be judged with the same MIN_SUSTAINED_K_READ_IOPS and MIN_SUSTAINED_K_WRITE_IOPS
+# thresholds. IOPS are sampled at
+# regular intervals and the test stops as soon as the 95% confidence interval of both the read
+# and the write IOPS is within DISK_BENCHMARK_CONFIDENCE of their mean, or after
+# DISK_BENCHMARK_MAX_DURATION seconds.
+
+PREFILL_CHUNK_SIZE = 1024 * 1024
+CONFIDENCE_Z = 1.96
+CONFIDENCE_SAMPLES = 8
+
+@dataclass
+class DiskBenchmarkResult():
+    engine: str
+    directory: str
+    timestamp: float
+    duration: float
+    read_iops: float
+    write_iops: float
+    read_latency_p50: Optional[float] = None
+    read_latency_p99: Optional[float] = None
+    write_latency_p50: Optional[float] = None
+    write_latency_p99: Optional[float] = None
+    converged: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+class _Worker:
+    # Random reads and writes from a single thread. Latencies are kept in nanoseconds.
+
+    def __init__(self, fd, blocks, seed, stop_event):
+        self.fd = fd
+        self.blocks = blocks
+        self.random = random.Random(seed)
+        self.stop_event = stop_event
+
+        self.read_latencies = []
+        self.write_latencies = []
+        self.error = None
+
+    def run(self):
+        buffer = mmap.mmap(-1, DISK_BENCHMARK_BLOCK_SIZE)
+        buffer.write(os.urandom(DISK_BENCHMARK_BLOCK_SIZE))
+        try:
+            while not self.stop_event.is_set():
+                offset = self.random.randrange(self.blocks) * DISK_BENCHMARK_BLOCK_SIZE
+                if self.random.random() < DISK_BENCHMARK_READ_RATIO:
+                    started = time.perf_counter_ns()
+                    os.preadv(self.fd, [buffer], offset)
+                    self.read_latencies.append(time.perf_counter_ns() - started)
+                else:
+                    started = time.perf_counter_ns()
+                    os.pwrite(self.fd, buffer, offset)
+                    self.write_latencies.append(time.perf_counter_ns() - started)
+        except OSError as exception:
+            self.error = exception
+            self.stop_event.set()
+        finally:
+            buffer.close()
+
+def is_disk_benchmark_supported() -> bool:
+    # O_DIRECT and positional vectored reads are needed to bypass the page cache
+    return hasattr(os, 'O_DIRECT') and hasattr(os, 'preadv')
+
+def _prefill(test_file_path, file_size, is_cancelled):
+    # Write the whole test file so reads hit allocated blocks instead of holes. Returns False
+    # if it was cancelled.
+    fd = os.open(test_file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_DIRECT, 0o600)
+    buffer = mmap.mmap(-1, PREFILL_CHUNK_SIZE)
+    try:
+        buffer.write(os.urandom(PREFILL_CHUNK_SIZE))
+        written = 0
+        while written < file_size:
+            if is_cancelled():
+                return False
+            written = written + os.pwrite(fd, buffer, written)
+        os.fsync(fd)
+    finally:
+        buffer.close()
+        os.close(fd)
+    return True
+
+def _percentile(sorted_values, percent):
+    # Nearest rank percentile of a sorted list of latencies in nanoseconds, in milliseconds
+    if len(sorted_values) == 0:
+        return None
+    rank = max(int(math.ceil(percent / 100.0 * len(sorted_values))) - 1, 0)
+    return round(sorted_values[rank] / 1_000_000.0, 3)
+
+def _has_converged(samples):
+    # Return True if the confidence interval of the recent IOPS samples is narrow enough
+    if len(samples) < CONFIDENCE_SAMPLES:
+        return False
+
+    recent = samples[-CONFIDENCE_SAMPLES:]
+    for values in zip(*recent):
+        mean = statistics.fmean(values)
+        if mean <= 0:
+            return False
+        half_width = CONFIDENCE_Z * statistics.stdev(values) / math.sqrt(len(values))
+        if half_width / mean > DISK_BENCHMARK_CONFIDENCE:
+            return False
+
+    return True
+
+def _operation_counts(workers):
+    return (
+        sum(len(worker.read_latencies) for worker in workers),
+        sum(len(worker.write_latencies) for worker in workers)
+    )
+
+def run_disk_benchmark(directory, log, file_size=DISK_BENCHMARK_FILE_SIZE,
+    max_duration=DISK_BENCHMARK_MAX_DURATION,
+    is_cancelled=lambda: False) -> Optional[DiskBenchmarkResult]:
+    # Benchmark random 4k reads and writes on the disk holding directory. Returns None if the
+    # benchmark cannot run on this system or this file system or if is_cancelled returned True
+    # while it was running. The test file is removed in every case.
+
+    if not is_disk_benchmark_supported():
+        log.warning('The disk benchmark is not supported on this system.')
+        return None
+
+    benchmark_path = Path(directory, DISK_BENCHMARK_DIRECTORY)
+    test_file_path = benchmark_path.joinpath('random_read_write.bin')
+    blocks = file_size // DISK_BENCHMARK_BLOCK_SIZE
+
+    try:
+        benchmark_path.mkdir(parents=True, exist_ok=True)
+
+        log.info(f'Writing a {file_size // (1024 * 1024)} MiB test file in {benchmark_path}...')
+        if not _prefill(test_file_path, file_size, is_cancelled):
+            log.info('Disk benchmark cancelled.')
+            _remove_test_file(test_file_path, log)
+            return None
+
+        fd = os.open(test_file_path, os.O_RDWR | os.O_DIRECT)
+    except OSError as exception:
+        log.error(f'Unable to prepare the disk benchmark in {benchmark_path}. {exception}')
+        _remove_test_file(test_file_path, log)
+        return None
+
+    log.info(f'Running disk benchmark with {DISK_BENCHMARK_THREADS} threads for at most '
+        f'{max_duration:.0f} seconds...')
+
+    stop_event = threading.Event()
+    workers = [_Worker(fd, blocks, index, stop_event) for index in range(DISK_BENCHMARK_THREADS)]
+    threads = [threading.Thread(target=worker.run, daemon=True) for worker in workers]
+
+    samples = []
+    converged = False
+    cancelled = False
+
+    try:
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+
+        # Operations during the warm up are not measured
+        stop_event.wait(DISK_BENCHMARK_WARMUP_DURATION)
+        measure_started = time.monotonic()
+        start_counts = [
+            (len(worker.read_latencies), len(worker.write_latencies)) for worker in workers]
+        last_counts = _operation_counts(workers)
+        last_time = measure_started
+
+        while not stop_event.wait(DISK_BENCHMARK_SAMPLE_INTERVAL):
+            if is_cancelled():
+                cancelled = True
+                break
+
+            now = time.monotonic()
+            counts = _operation_counts(workers)
+            elapsed = now - last_time
+            samples.append(tuple(
+                (count - last_count) / elapsed for count, last_count in zip(counts, last_counts)))
+            last_counts = counts
+            last_time = now
+
+            if now - measure_started >= DISK_BENCHMARK_MIN_DURATION and _has_converged(samples):
+                converged = True
+                break
+            if now - started >= max_duration:
+                break
+
+        measure_ended = time.monotonic()
+        end_counts = [
+            (len(worker.read_latencies), len(worker.write_latencies)) for worker in workers]
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        stop_event.set()
+        os.close(fd)
+        _remove_test_file(test_file_path, log)
+
+    if cancelled:
+        log.info('Disk benchmark cancelled.')
+        return None
+
+    errors = [worker.error for worker in workers if worker.error is not None]
+    if len(errors) > 0:
+        log.error(f'Error during the disk benchmark. {errors[0]}')
+        return None
+
+    read_latencies = []
+    write_latencies = []
+    for worker, (read_start, write_start), (read_end, write_end) in zip(
+        workers, start_counts, end_counts):
+        read_latencies.extend(worker.read_latencies[read_start:read_end])
+        write_latencies.extend(worker.write_latencies[write_start:write_end])
+    read_latencies.sort()
+    write_latencies.sort()
+
+    duration = measure_ended - measure_started
+
+    result = DiskBenchmarkResult(
+        engine='threads',
+        directory=str(directory),
+        timestamp=time.time(),
+        duration=round(duration, 3),
+        read_iops=round(len(read_latencies) / duration, 1),
+        write_iops=round(len(write_latencies) / duration, 1),
+        read_latency_p50=_percentile(read_latencies, 50),
+        read_latency_p99=_percentile(read_latencies, 99),
+        write_latency_p50=_percentile(write_latencies, 50),
+        write_latency_p99=_percentile(write_latencies, 99),
+        converged=converged
+    )
+
+    log.info(f'Disk benchmark: {result.read_iops:.0f} read IOPS, {result.write_iops:.0f} write '
+        f'IOPS in {result.duration:.1f} seconds'
+        f'{"" if converged else " (did not converge)"}')
+
+    return result
+
+def _remove_test_file(test_file_path, log):
+    try:
+        if test_file_path.exists():
+            test_file_path.unlink()
+        test_file_path.parent.rmdir()
+    except OSError as exception:
+        log.warning(f'Unable to remove disk benchmark file {test_file_path}. {exception}')
+
+def load_disk_benchmark_results(directory) -> list:
+    # Return the disk benchmark results saved in directory, oldest first
+
+    history_path = Path(directory, DISK_BENCHMARK_HISTORY_FILE)
+    if not history_path.is_file():
+        return []
+
+    try:
+        with open(history_path, 'r', encoding='utf8') as history_file:
+            history = json.load(history_file)
+    except (OSError, ValueError):
+        return []
+
+    if not isinstance(history, list):
+        return []
+
+    results = []
+    for entry in history:
+        try:
+            results.append(DiskBenchmarkResult(**entry))
+        except TypeError:
+            continue
+    return results
+
+def save_disk_benchmark_result(directory, result, log) -> bool:
+    # Append result to the disk benchmark results saved in directory
+
+    history = load_disk_benchmark_results(directory)
+    history.append(result)
+    history = history[-DISK_BENCHMARK_HISTORY_SIZE:]
+
+    history_path = Path(directory, DISK_BENCHMARK_HISTORY_FILE)
+    try:
+        history_path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomically(history_path,
+            json.dumps([entry.to_dict() for entry in history], indent=2))
+    except OSError as exception:
+        log.warning(f'Unable to save disk benchmark result. {exception}')
+        return False
+
+    return True
+
+def format_disk_benchmark_details(result, previous=None) -> str:
+    # Latency and comparison lines shown with the disk speed test results
+
+    lines = []
+    if result.read_latency_p50 is not None and result.write_latency_p50 is not None:
+        lines.append(f'* Read latency: {result.read_latency_p50:.2f}ms median, '
+            f'{result.read_latency_p99:.2f}ms 99th percentile')
+        lines.append(f'* Write latency: {result.write_latency_p50:.2f}ms median, '
+            f'{result.write_latency_p99:.2f}ms 99th percentile')
+
+    if previous is not None:
+        tested_on = time.strftime('%Y-%m-%d', time.localtime(previous.timestamp))
+        lines.append(f'* Previous test ({tested_on}): {previous.read_iops / 1000.0:.1f}K read '
+            f'IOPS and {previous.write_iops / 1000.0:.1f}K write IOPS')
+
+    return '\n'.join(lines)
@@ -0,0 +1,341 @@
+import hashlib
+import math
+import os
+import threading
+import time
+
+from ethwizard.lazyimport import lazy_import
+
+from concurrent.futures import ThreadPoolExecutor
+
+from dataclasses import dataclass
+
+from pathlib import Path
+
+from ethwizard import httpclient
+
+from ethwizard.constants import (
+    DOWNLOAD_MAX_RETRIES,
+    DOWNLOAD_RETRY_DELAY,
+    DOWNLOAD_PARALLEL_MIN_SIZE,
+    DOWNLOAD_PARALLEL_CONNECTIONS,
+    DOWNLOAD_PROGRESS_LOG_INTERVAL
+)
+
+httpx = lazy_import('httpx')
+humanize = lazy_import('humanize')
+
+# Download engine for release archives and binaries. Partial downloads are kept in .part files
+# and resumed with HTTP Range requests when the connection drops. Large assets from servers
+# accepting ranges are split into concurrent ranges. The SHA256 hash of the file is computed
+# while it is downloaded. Consumers, objects with update(data) and reset() methods, can receive
+# the data in order as it arrives.
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_downloaded_lock = threading.Lock()
+_downloaded_bytes = 0
+
+@dataclass
+class DownloadResult:
+    sha256: str = None
+    status_code: int = None
+    exception: Exception = None
+
+class RangeNotHonored(Exception):
+    # The server answered a range request with the full content
+    pass
+
+class DownloadProgress:
+
+    def __init__(self, log, description, total_size=None, set_percentage=None):
+        self.log = log
+        self.description = description
+        self.total_size = total_size
+        self.set_percentage = set_percentage
+
+        self._lock = threading.Lock()
+        self._downloaded = 0
+        self._started = time.monotonic()
+        self._last_log = self._started
+        self._last_percentage = None
+
+    def add(self, size):
+        global _downloaded_bytes
+
+        percentage = None
+        log_progress = False
+
+        with _downloaded_lock:
+            _downloaded_bytes = _downloaded_bytes + size
+
+        with self._lock:
+            self._downloaded = self._downloaded + size
+
+            if self.total_size:
+                current_percentage = min(int(self._downloaded * 100 / self.total_size), 100)
+                if current_percentage != self._last_percentage:
+                    self._last_percentage = current_percentage
+                    percentage = current_percentage
+
+            now = time.monotonic()
+            if now - self._last_log >= DOWNLOAD_PROGRESS_LOG_INTERVAL:
+                self._last_log = now
+                log_progress = True
+
+        if percentage is not None and self.set_percentage is not None:
+            self.set_percentage(percentage)
+        if log_progress:
+            self.log.info(f'Downloading {self.description}: {self.describe()}')
+
+    def remove(self, size):
+        with self._lock:
+            self._downloaded = max(self._downloaded - size, 0)
+
+    def describe(self):
+        with self._lock:
+            downloaded = self._downloaded
+            elapsed = max(time.monotonic() - self._started, 0.001)
+
+        rate = humanize.naturalsize(downloaded / elapsed, binary=True)
+        if self.total_size:
+            return (f'{humanize.naturalsize(downloaded, binary=True)} of '
+                f'{humanize.naturalsize(self.total_size, binary=True)} at {rate}/s')
+        return f'{humanize.naturalsize(downloaded, binary=True)} at {rate}/s'
+
+    def elapsed(self):
+        return time.monotonic() - self._started
+
+class DownloadSegment:
+    # A byte range of the remote file downloaded into its own part file. end is inclusive and
+    # None means up to the end of the file.
+
+    def __init__(self, path, start=0, end=None, with_hash=False):
+        self.path = Path(path)
+        self.start = start
+        self.end = end
+        self.hash = hashlib.sha256() if with_hash else None
+        self.written = 0
+
+        if self.path.is_file():
+            self.path.unlink()
+
+    def is_complete(self):
+        return self.end is not None and self.start + self.written > self.end
+
+    def reset(self):
+        if self.path.is_file():
+            self.path.unlink()
+        if self.hash is not None:
+            self.hash = hashlib.sha256()
+        written = self.written
+        self.written = 0
+        return written
+
+    def range_header(self):
+        end = '' if self.end is None else str(self.end)
+        return f'bytes={self.start + self.written}-{end}'
+
+def get_downloaded_bytes():
+    # Return the number of bytes received by the download engine since the program started
+    with _downloaded_lock:
+        return _downloaded_bytes
+
+def feed_consumers(file_path, consumers):
+    # Send the content of an existing file to consumers
+    with open(file_path, 'rb') as input_file:
+        for chunk in iter(lambda: input_file.read(HASH_CHUNK_SIZE), b''):
+            for consumer in consumers:
+                consumer.update(chunk)
+
+def _probe(url):
+    # Get the size, validator and range support of url with a HEAD request
+    try:
+        response = httpclient.request('HEAD', url, follow_redirects=True)
+    except httpx.RequestError:
+        return None, None, False
+
+    if response.status_code != 200:
+        return None, None, False
+
+    size = response.headers.get('Content-Length')
+    size = int(size) if size is not None and size.isdigit() else None
+
+    validator = response.headers.get('ETag')
+    if validator is None or validator.startswith('W/'):
+        validator = response.headers.get('Last-Modified')
+
+    accept_ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+
+    return size, validator, accept_ranges
+
+def _download_segment(url, segment, progress, log, description, validator=None,
+    stopping=None, consumers=()):
+    # Download segment from url, resuming it after connection errors. Returns None when the
+    # segment is complete or the unexpected HTTP status code.
+
+    retry_index = 0
+    retry_delay = DOWNLOAD_RETRY_DELAY
+    failure_written = segment.written
+
+    while not segment.is_complete():
+        headers = {}
+        if segment.written > 0 or segment.start > 0 or segment.end is not None:
+            headers['Range'] = segment.range_header()
+            if validator is not None:
+                headers['If-Range'] = validator
+
+        try:
+            with httpclient.stream('GET', url, headers=headers,
+                follow_redirects=True) as http_stream:
+
+                if 'Range' in headers and http_stream.status_code == 200:
+                    if segment.end is not None:
+                        raise RangeNotHonored()
+                    # The whole file is coming again, start over
+                    progress.remove(segment.reset())
+                    for consumer in consumers:
+                        consumer.reset()
+                elif 'Range' in headers and http_stream.status_code != 206:
+                    return http_stream.status_code
+                elif 'Range' not in headers and http_stream.status_code != 200:
+                    return http_stream.status_code
+
+                with open(segment.path, 'ab') as binary_file:
+                    for data in http_stream.iter_bytes():
+                        if stopping is not None and stopping.is_set():
+                            return None
+                        binary_file.write(data)
+                        if segment.hash is not None:
+                            segment.hash.update(data)
+                        for consumer in consumers:
+                            consumer.update(data)
+                        segment.written = segment.written + len(data)
+                        progress.add(len(data))
+
+            if segment.end is None:
+                return None
+
+        except httpx.RequestError as exception:
+            if segment.written > failure_written:
+                # The connection made progress since the last failure, only give up after
+                # DOWNLOAD_MAX_RETRIES failures in a row without progress
+                retry_index = 0
+                retry_delay = DOWNLOAD_RETRY_DELAY
+            failure_written = segment.written
+
+            retry_index = retry_index + 1
+            if retry_index > DOWNLOAD_MAX_RETRIES:
+                raise
+
+            log.warning(f'Connection lost while downloading {description} after '
+                f'{humanize.naturalsize(segment.written, binary=True)}. Resuming in '
+                f'{retry_delay} seconds. {exception}')
+            if stopping is not None and stopping.wait(retry_delay):
+                return None
+            elif stopping is None:
+                time.sleep(retry_delay)
+            retry_delay = retry_delay * 2
+
+    return None
+
+def _download_single(url, destination_path, progress, log, description, validator,
+    consumers):
+    segment = DownloadSegment(f'{destination_path}.part', with_hash=True)
+    try:
+        status_code = _download_segment(url, segment, progress, log, description, validator,
+            consumers=consumers)
+        if status_code is not None:
+            return DownloadResult(status_code=status_code)
+
+        os.replace(segment.path, destination_path)
+        return DownloadResult(sha256=segment.hash.hexdigest())
+    finally:
+        if segment.path.is_file():
+            segment.path.unlink()
+
+def _download_parallel(url, destination_path, size, connections, progress, log, description,
+    validator, consumers):
+    part_size = math.ceil(size / connections)
+    segments = []
+    for index, start in enumerate(range(0, size, part_size)):
+        end = min(start + part_size, size) - 1
+        segments.append(DownloadSegment(f'{destination_path}.part{index}', start, end))
+
+    stopping = threading.Event()
+
+    def download(segment):
+        try:
+            return _download_segment(url, segment, progress, log, description, validator,
+                stopping)
+        except BaseException:
+            stopping.set()
+            raise
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(segments)) as executor:
+            futures = [executor.submit(download, segment) for segment in segments]
+            status_codes = [future.result() for future in futures]
+
+        for status_code in status_codes:
+            if status_code is not None:
+                return DownloadResult(status_code=status_code)
+
+        # Join the parts, hash the result and send it to the consumers in order
+        file_hash = hashlib.sha256()
+        with open(destination_path, 'wb') as binary_file:
+            for segment in segments:
+                with open(segment.path, 'rb') as part_file:
+                    for chunk in iter(lambda: part_file.read(HASH_CHUNK_SIZE), b''):
+                        binary_file.write(chunk)
+                        file_hash.update(chunk)
+                        for consumer in consumers:
+                            consumer.update(chunk)
+
+        return DownloadResult(sha256=file_hash.hexdigest())
+    finally:
+        stopping.set()
+        for segment in segments:
+            if segment.path.is_file():
+                segment.path.unlink()
+
+def download_file(url, destination_path, log, description, set_percentage=None,
+    connections=DOWNLOAD_PARALLEL_CONNECTIONS, consumers=()):
+    # Download url into destination_path. description is used in log messages and
+    # set_percentage, when given, receives the download progress. Returns a DownloadResult
+    # with the SHA256 hex digest of the file, the unexpected status code or the connection
+    # exception.
+
+    destination_path = Path(destination_path)
+    destination_path.parent.mkdir(parents=True, exist_ok=True)
+
+    size, validator, accept_ranges = _probe(url)
+    progress = DownloadProgress(log, description, size, set_percentage)
+
+    try:
+        if (
+            accept_ranges and
+            size is not None and
+            size >= DOWNLOAD_PARALLEL_MIN_SIZE and
+            connections > 1
+            ):
+            try:
+                result = _download_parallel(url, destination_path, size, connections,
+                    progress, log, description, validator, consumers)
+            except RangeNotHonored:
+                log.info(f'Range requests are not honored for {description}. Downloading it '
+                    f'with a single connection.')
+                progress = DownloadProgress(log, description, size, set_percentage)
+                result = _download_single(url, destination_path, progress, log, description,
+                    validator, consumers)
+        else:
+            result = _download_single(url, destination_path, progress, log, description,
+                validator, consumers)
+    except httpx.RequestError as exception:
+        return DownloadResult(exception=exception)
+
+    if result.sha256 is not None:
+        log.info(f'Downloaded {description}: {progress.describe()} in '
+            f'{progress.elapsed():.1f} seconds')
+
+    return result
@@ -0,0 +1,179 @@
+import os
+import queue
+import shutil
+import tarfile
+import threading
+
+from pathlib import Path
+
+# Streaming archive extraction. StreamingTarExtractor is a download consumer (see
+# download.download_file) that decompresses and extracts a tar archive while it is being
+# downloaded. Files are extracted in a staging directory and only installed in their target
+# directory once the caller verified the archive.
+
+EXTRACTOR_QUEUE_SIZE = 64
+
+_END_OF_STREAM = None
+
+class _QueueReader:
+    # Minimal file-like object reading the chunks pushed in a queue
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buffer = bytearray()
+        self._ended = False
+
+    def read(self, size=-1):
+        while not self._ended and (size < 0 or len(self._buffer) < size):
+            chunk = self._chunks.get()
+            if chunk is _END_OF_STREAM:
+                self._ended = True
+                break
+            self._buffer.extend(chunk)
+
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def drain(self):
+        while not self._ended:
+            if self._chunks.get() is _END_OF_STREAM:
+                self._ended = True
+
+def _stripped_path(member_name, strip_components):
+    # Return the relative path for a member after removing strip_components leading components
+    # or None if nothing is left or if the path tries to escape the target directory. Like GNU
+    # tar --strip-components, a leading . counts as a component so ./dir/file stripped of 2
+    # components is file.
+    if member_name.startswith('/'):
+        return None
+    parts = [part for part in member_name.split('/') if part != '']
+    parts = parts[strip_components:]
+    if '..' in parts:
+        return None
+    parts = [part for part in parts if part != '.']
+    if len(parts) == 0:
+        return None
+    return Path(*parts)
+
+class StreamingTarExtractor:
+
+    def __init__(self, staging_path, log, strip_components=0, required_files=None):
+        self.staging_path = Path(staging_path)
+        self.log = log
+        self.strip_components = strip_components
+        self.required_files = [Path(name) for name in (required_files or [])]
+
+        self.extracted = []
+
+        self._chunks = None
+        self._thread = None
+        self._exception = None
+
+    def start(self):
+        if self.staging_path.exists():
+            shutil.rmtree(self.staging_path)
+        self.staging_path.mkdir(parents=True)
+
+        self.extracted = []
+        self._exception = None
+        self._chunks = queue.Queue(maxsize=EXTRACTOR_QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._extract, daemon=True)
+        self._thread.start()
+
+    def update(self, data):
+        self._chunks.put(data)
+
+    def reset(self):
+        self.abort()
+        self.start()
+
+    def abort(self):
+        self._stop()
+        if self.staging_path.exists():
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+
+    def finish(self):
+        # Wait until the whole archive is extracted. Returns True if it was extracted with all
+        # the required files.
+        self._stop()
+        if self._exception is not None:
+            self.log.error(f'Exception while extracting archive. {self._exception}')
+            return False
+        if len(self.extracted) == 0:
+            self.log.error('No file was extracted from the archive.')
+            return False
+        missing = [str(name) for name in self.required_files if name not in self.extracted]
+        if len(missing) > 0:
+            self.log.error(f'Expected files missing from the archive: {", ".join(missing)}')
+            return False
+        return True
+
+    def install(self, target_directory):
+        # Move the extracted files in target_directory and remove the staging directory. Each
+        # file is moved next to its target first and then renamed over it so an existing file
+        # is kept if the move fails.
+        target_directory = Path(target_directory)
+        if len(self.extracted) == 0:
+            self.log.error(f'No extracted file to install in {target_directory}.')
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+            return False
+        try:
+            for relative_path in self.extracted:
+                target_path = target_directory.joinpath(relative_path)
+                target_path.parent.mkdir(parents=True, exist_ok=True)
+                new_path = target_path.with_name(target_path.name + '.new')
+                try:
+                    shutil.move(self.staging_path.joinpath(relative_path), new_path)
+                    os.replace(new_path, target_path)
+                finally:
+                    if new_path.is_file():
+                        new_path.unlink()
+                self.log.info(f'Extracted {target_path}')
+        except OSError as exception:
+            self.log.error(f'Exception while installing extracted files in {target_directory}. '
+                f'{exception}')
+            return False
+        finally:
+            shutil.rmtree(self.staging_path, ignore_errors=True)
+
+        return True
+
+    def _stop(self):
+        if self._thread is not None:
+            self._chunks.put(_END_OF_STREAM)
+            self._thread.join()
+            self._thread = None
+
+    def _extract(self):
+        reader = _QueueReader(self._chunks)
+        try:
+            with tarfile.open(fileobj=reader, mode='r|*') as tar_file:
+                for member in tar_file:
+                    relative_path = _stripped_path(member.name, self.strip_components)
+                    if relative_path is None:
+                        continue
+
+                    if member.isdir():
+                        self.staging_path.joinpath(relative_path).mkdir(parents=True,
+                            exist_ok=True)
+                        continue
+                    if not member.isfile():
+                        # Links and special files are not needed for client installs
+                        continue
+
+                    member_path = self.staging_path.joinpath(relative_path)
+                    member_path.parent.mkdir(parents=True, exist_ok=True)
+                    with tar_file.extractfile(member) as member_file:
+                        with open(member_path, 'wb') as output_file:
+                            shutil.copyfileobj(member_file, output_file)
+                    os.chmod(member_path, member.mode & 0o755)
+
+                    self.extracted.append(relative_path)
+        except (tarfile.TarError, OSError, EOFError) as exception:
+            self._exception = exception
+        finally:
+            # Keep consuming so the downloader is never blocked on a full queue
+            reader.drain()
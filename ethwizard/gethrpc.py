@@ -0,0 +1,79 @@
+import json
+
+from ethwizard import httpclient
+
+from ethwizard.constants import (
+    LOCAL_GETH_JSONRPC_URL
+)
+
+# Small Geth JSON-RPC client. Multiple methods are sent as a single JSON-RPC 2.0 batch array
+# so that a status poll only costs one round trip to the Geth HTTP server.
+
+GETH_STATUS_METHODS = ('eth_syncing', 'net_peerCount', 'web3_clientVersion', 'eth_chainId')
+
+JSONRPC_HEADERS = {
+    'Content-Type': 'application/json'
+}
+
+_batch_payloads = {}
+
+def build_batch(methods):
+    # Return the JSON-RPC batch request for methods without parameters. The request id is the
+    # method index which is used to match the responses back.
+    return [
+        {
+            'jsonrpc': '2.0',
+            'method': method,
+            'id': index
+        } for index, method in enumerate(methods)
+    ]
+
+def _get_batch_payload(methods):
+    # Batch payloads only depend on the methods so they are encoded once and reused
+    methods = tuple(methods)
+    payload = _batch_payloads.get(methods)
+    if payload is None:
+        payload = json.dumps(build_batch(methods)).encode('utf8')
+        _batch_payloads[methods] = payload
+    return payload
+
+def post_batch(methods, url=LOCAL_GETH_JSONRPC_URL):
+    # Send the methods as a single JSON-RPC batch request. httpx.RequestError is raised on
+    # connection issues.
+    return httpclient.post(url, content=_get_batch_payload(methods), headers=JSONRPC_HEADERS)
+
+def parse_batch(methods, response_json):
+    # Return a dict with the JSON-RPC response object for each method in the batch. Methods
+    # missing from the response are set to None.
+    methods = tuple(methods)
+    results = dict.fromkeys(methods)
+
+    if not isinstance(response_json, list):
+        # Some servers reply with a single error object when the batch itself is invalid
+        return results
+
+    for entry in response_json:
+        if not isinstance(entry, dict):
+            continue
+        index = entry.get('id')
+        if type(index) is int and 0 <= index < len(methods):
+            results[methods[index]] = entry
+
+    return results
+
+def get_status(url=LOCAL_GETH_JSONRPC_URL):
+    # Query syncing status, peer count, client version and chain id in one round trip.
+    # Returns the HTTP response and the parsed results per method. The results are None when
+    # the status code is not 200.
+    response = post_batch(GETH_STATUS_METHODS, url)
+    if response.status_code != 200:
+        return response, None
+    return response, parse_batch(GETH_STATUS_METHODS, response.json())
+
+def call(method, url=LOCAL_GETH_JSONRPC_URL):
+    # Call a single method without parameters. Returns the HTTP response and the JSON-RPC
+    # response object for that method, None when the status code is not 200.
+    response = post_batch((method,), url)
+    if response.status_code != 200:
+        return response, None
+    return response, parse_batch((method,), response.json())[method]
@@ -0,0 +1,172 @@
+import json
+import threading
+
+from pathlib import Path
+
+from ethwizard.lazyimport import lazy_import
+
+from prompt_toolkit.formatted_text import to_formatted_text, fragment_list_to_text
+from prompt_toolkit import shortcuts
+
+from ethwizard.constants import (
+    ANSWER_CHOICES,
+    ANSWER_INPUTS
+)
+
+yaml = lazy_import('yaml')
+
+# Headless install mode. When an answers file is loaded, dialogs are resolved from it instead
+# of being shown. The button_dialog, radiolist_dialog and input_dialog functions in this module
+# are drop-in replacements for the prompt_toolkit ones: they show the dialog normally unless
+# headless mode is active. Prompts asking for a specific value (network, ports, fee recipient,
+# ...) read their own answer with get_answer. Other dialogs are resolved by title from the
+# choices and inputs sections of the answers file. A dialog with a single button, or with a
+# single button that does not quit, is resolved on its own.
+
+_state_lock = threading.Lock()
+_state = {
+    'answers': None,
+    'log': None,
+    'last_input': None
+}
+
+def load_answers(answers_path, log):
+    # Load an answers file (YAML or JSON) and enable headless mode. Returns True on success.
+
+    answers_path = Path(answers_path)
+    try:
+        with open(answers_path, 'r', encoding='utf8') as answers_file:
+            if answers_path.suffix.lower() == '.json':
+                answers = json.load(answers_file)
+            else:
+                answers = yaml.safe_load(answers_file)
+    except (OSError, ValueError, yaml.YAMLError) as exception:
+        log.error(f'Unable to load answers file {answers_path}. {exception}')
+        return False
+
+    if not isinstance(answers, dict):
+        log.error(f'Answers file {answers_path} should contain a mapping of answers.')
+        return False
+
+    for section in (ANSWER_CHOICES, ANSWER_INPUTS):
+        if not isinstance(answers.get(section, {}), dict):
+            log.error(f'The {section} section of answers file {answers_path} should be a '
+                f'mapping of dialog titles to answers.')
+            return False
+
+    with _state_lock:
+        _state['answers'] = answers
+        _state['log'] = log
+
+    log.info(f'Running headless with answers from {answers_path}')
+    return True
+
+def is_headless():
+    return _state['answers'] is not None
+
+def get_log():
+    return _state['log']
+
+def get_answer(key, default=None):
+    answers = _state['answers']
+    if answers is None:
+        return default
+    return answers.get(key, default)
+
+def plain_text(text):
+    return fragment_list_to_text(to_formatted_text(text)).strip()
+
+class HeadlessDialog:
+    # Stands in for a dialog Application. run() returns the answer without rendering anything.
+
+    def __init__(self, resolve):
+        self._resolve = resolve
+
+    def run(self, *args, **kwargs):
+        return self._resolve()
+
+def _find_choice(title, options):
+    # options is a list of (value, label). Return the value for the configured choice.
+
+    log = get_log()
+    choice = get_answer(ANSWER_CHOICES, {}).get(title)
+
+    if choice is not None:
+        for value, label in options:
+            if plain_text(label).lower() == str(choice).lower():
+                return True, value
+        for value, label in options:
+            if str(value).lower() == str(choice).lower():
+                return True, value
+
+        log.error(f'Answer {choice} for dialog "{title}" is not one of '
+            f'{", ".join(plain_text(label) for value, label in options)}.')
+        return False, None
+
+    if len(options) == 1:
+        return True, options[0][0]
+
+    proceeding = [(value, label) for value, label in options if value]
+    if len(proceeding) == 1:
+        return True, proceeding[0][0]
+
+    log.error(f'No answer for dialog "{title}". Add one of '
+        f'{", ".join(plain_text(label) for value, label in options)} for it in the '
+        f'{ANSWER_CHOICES} section of the answers file.')
+    return False, None
+
+def _resolve_options(title, text, options):
+    log = get_log()
+    _state['last_input'] = None
+    found, value = _find_choice(title, options)
+    if not found:
+        log.error(f'Dialog "{title}":\n{plain_text(text)}')
+        return None
+
+    if not value:
+        # Dialogs resolving to a quit or retry button usually explain an error
+        log.warning(f'Dialog "{title}":\n{plain_text(text)}')
+
+    label = next(label for option_value, label in options if option_value == value)
+    log.info(f'Dialog "{title}" answered with {plain_text(label)}')
+    return value
+
+def button_dialog(title='', text='', buttons=[], **kwargs):
+    if not is_headless():
+        return shortcuts.button_dialog(title=title, text=text, buttons=buttons, **kwargs)
+
+    options = [(value, label) for label, value in buttons]
+    return HeadlessDialog(lambda: _resolve_options(title, text, options))
+
+def radiolist_dialog(title='', text='', values=None, **kwargs):
+    if not is_headless():
+        return shortcuts.radiolist_dialog(title=title, text=text, values=values, **kwargs)
+
+    return HeadlessDialog(lambda: _resolve_options(title, text, values or []))
+
+def resolve_input(title, default=None):
+    # Return the configured answer for an input dialog or default. None cancels the dialog.
+    log = get_log()
+
+    if _state['last_input'] == title:
+        # The same input is asked again right away: our answer was rejected. Cancel instead of
+        # looping forever.
+        _state['last_input'] = None
+        log.error(f'Answer for input dialog "{title}" was not accepted.')
+        return None
+
+    value = get_answer(ANSWER_INPUTS, {}).get(title, default)
+    if value is None:
+        log.error(f'No answer for input dialog "{title}". Add it in the {ANSWER_INPUTS} '
+            f'section of the answers file.')
+        return None
+
+    _state['last_input'] = title
+    log.info(f'Input dialog "{title}" answered')
+    return str(value)
+
+def input_dialog(title='', text='', **kwargs):
+    if not is_headless():
+        return shortcuts.input_dialog(title=title, text=text, **kwargs)
+
+    return HeadlessDialog(lambda: resolve_input(title))
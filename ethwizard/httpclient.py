@@ -0,0 +1,258 @@
+import asyncio
+import importlib.util
+import threading
+import time
+import weakref
+
+from ethwizard.lazyimport import lazy_import
+
+from ethwizard.constants import (
+    GITHUB_REST_API_URL,
+    BEACONCHA_IN_URLS,
+    LOCAL_GETH_JSONRPC_URL,
+    LOCAL_LIGHTHOUSE_BN_HTTP_BASE,
+    LOCAL_TEKU_BN_HTTP_BASE,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS_PER_HOST,
+    HTTP_LOCAL_KEEPALIVE_EXPIRY
+)
+
+httpx = lazy_import('httpx')
+
+# Process-wide HTTP client layer. Every module should route its HTTP requests through the
+# functions in here instead of calling httpx.get/httpx.post directly so that connections
+# (and their TCP and TLS handshakes) are reused between requests.
+
+# HTTP/2 needs the optional h2 package. Only check that it is there, httpx imports it.
+http2_available = importlib.util.find_spec('h2') is not None
+
+HTTP2_HOSTS = [GITHUB_REST_API_URL] + list(BEACONCHA_IN_URLS.values())
+LOCAL_HOSTS = [LOCAL_GETH_JSONRPC_URL, LOCAL_LIGHTHOUSE_BN_HTTP_BASE, LOCAL_TEKU_BN_HTTP_BASE]
+
+_client_lock = threading.Lock()
+_client = None
+_async_clients = weakref.WeakKeyDictionary()
+
+_stats_lock = threading.Lock()
+_host_stats = {}
+
+def _host_key(url):
+    # Return a host:port key used for statistics
+    port = url.port
+    if port is None:
+        port = 443 if url.scheme == 'https' else 80
+    return f'{url.host}:{port}'
+
+def _get_host_stats(host):
+    # Must be called while holding _stats_lock
+    if host not in _host_stats:
+        _host_stats[host] = {
+            'requests': 0,
+            'connections': 0,
+            'tls_handshakes': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+            'http_version': None
+        }
+    return _host_stats[host]
+
+def _record_trace(host, event_name):
+    if event_name == 'connection.connect_tcp.complete':
+        with _stats_lock:
+            _get_host_stats(host)['connections'] += 1
+    elif event_name == 'connection.start_tls.complete':
+        with _stats_lock:
+            _get_host_stats(host)['tls_handshakes'] += 1
+
+def _record_response(response):
+    request = response.request
+    started = request.extensions.get('ethwizard_started')
+    if started is None:
+        return
+    latency = time.monotonic() - started
+    host = _host_key(request.url)
+    with _stats_lock:
+        host_stats = _get_host_stats(host)
+        host_stats['requests'] += 1
+        host_stats['latency_total'] += latency
+        host_stats['latency_max'] = max(host_stats['latency_max'], latency)
+        host_stats['http_version'] = response.http_version
+
+def _on_request(request):
+    host = _host_key(request.url)
+
+    def trace(event_name, info):
+        _record_trace(host, event_name)
+
+    request.extensions['trace'] = trace
+    request.extensions['ethwizard_started'] = time.monotonic()
+
+def _on_response(response):
+    _record_response(response)
+
+async def _async_on_request(request):
+    host = _host_key(request.url)
+
+    async def trace(event_name, info):
+        _record_trace(host, event_name)
+
+    request.extensions['trace'] = trace
+    request.extensions['ethwizard_started'] = time.monotonic()
+
+async def _async_on_response(response):
+    _record_response(response)
+
+def _build_mounts(transport_class):
+    # Give each well known host its own connection pool so that it has its own connection
+    # limits, HTTP/2 for remote APIs that support it and long keep-alive for local clients.
+
+    host_limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY)
+    local_limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+        max_keepalive_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+        keepalive_expiry=HTTP_LOCAL_KEEPALIVE_EXPIRY)
+
+    mounts = {}
+    for base_url in HTTP2_HOSTS:
+        mounts[base_url] = transport_class(http2=http2_available, limits=host_limits)
+    for base_url in LOCAL_HOSTS:
+        mounts[base_url] = transport_class(limits=local_limits)
+
+    return mounts
+
+def _default_limits():
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY)
+
+def get_client():
+    # Return the shared synchronous HTTP client, creating it on first use
+
+    global _client
+
+    if _client is not None:
+        return _client
+
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(
+                limits=_default_limits(),
+                mounts=_build_mounts(httpx.HTTPTransport),
+                event_hooks={
+                    'request': [_on_request],
+                    'response': [_on_response]
+                })
+
+    return _client
+
+def get_async_client():
+    # Return the shared asynchronous HTTP client for the running event loop. Async
+    # connections are bound to the event loop that created them so we keep one client per
+    # loop.
+
+    loop = asyncio.get_running_loop()
+
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=_default_limits(),
+                mounts=_build_mounts(httpx.AsyncHTTPTransport),
+                event_hooks={
+                    'request': [_async_on_request],
+                    'response': [_async_on_response]
+                })
+            _async_clients[loop] = client
+
+    return client
+
+def request(method, url, **kwargs):
+    return get_client().request(method, url, **kwargs)
+
+def get(url, **kwargs):
+    return get_client().get(url, **kwargs)
+
+def post(url, **kwargs):
+    return get_client().post(url, **kwargs)
+
+def stream(method, url, **kwargs):
+    return get_client().stream(method, url, **kwargs)
+
+def _close_async_client(loop, client):
+    # Async connections can only be closed from the event loop that created them. The wizard
+    # runs its coroutines with run_until_complete on a loop that stays open so it is still
+    # there to close the client when we quit.
+    if client.is_closed:
+        return
+    if loop.is_closed() or loop.is_running():
+        return
+    loop.run_until_complete(client.aclose())
+
+def close_clients():
+    # Close the shared synchronous client, the asynchronous clients and their connections
+
+    global _client
+
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+        async_clients = list(_async_clients.items())
+        _async_clients.clear()
+
+    for loop, client in async_clients:
+        _close_async_client(loop, client)
+
+def get_stats():
+    # Return a copy of the HTTP client statistics for each host
+
+    stats = {}
+
+    with _stats_lock:
+        for host, host_stats in _host_stats.items():
+            requests = host_stats['requests']
+            connections = host_stats['connections']
+            stats[host] = {
+                'requests': requests,
+                'connections': connections,
+                'tls_handshakes': host_stats['tls_handshakes'],
+                'handshakes_saved': max(requests - connections, 0),
+                'latency_avg': (host_stats['latency_total'] / requests) if requests > 0 else 0.0,
+                'latency_max': host_stats['latency_max'],
+                'http_version': host_stats['http_version']
+            }
+
+    return stats
+
+def format_stats():
+    # Return a human readable summary of the HTTP client statistics
+
+    stats = get_stats()
+    if len(stats) == 0:
+        return 'No HTTP request performed.'
+
+    total_requests = sum(host_stats['requests'] for host_stats in stats.values())
+    total_connections = sum(host_stats['connections'] for host_stats in stats.values())
+    total_saved = sum(host_stats['handshakes_saved'] for host_stats in stats.values())
+
+    lines = [
+        f'HTTP client usage: {total_requests} request(s), {total_connections} connection(s) '
+        f'opened, {total_saved} handshake(s) saved'
+    ]
+
+    for host, host_stats in sorted(stats.items(), key=lambda x: x[1]['requests'], reverse=True):
+        lines.append(
+            f'- {host} ({host_stats["http_version"]}): {host_stats["requests"]} request(s), '
+            f'{host_stats["connections"]} connection(s), '
+            f'{host_stats["handshakes_saved"]} handshake(s) saved, '
+            f'latency avg {host_stats["latency_avg"] * 1000.0:.0f}ms '
+            f'max {host_stats["latency_max"] * 1000.0:.0f}ms')
+
+    return '\n'.join(lines)
@@ -0,0 +1,132 @@
+import json
+import os
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pathlib import Path
+
+from ethwizard.cache import get_cache_directory
+from ethwizard.depositdata import read_keystore_public_key
+from ethwizard.statestore import write_file_atomically
+
+from ethwizard.constants import (
+    KEYSTORE_INDEX_CACHE_NAME,
+    KEYSTORE_INDEX_MAX_WORKERS
+)
+
+# Keystore index. Scanning a validator keys directory parses the keystores concurrently and
+# remembers the public key of each keystore by path, modification time and size in a small
+# index file. Rescans only parse the keystores that are new or changed.
+
+INDEX_FILE = 'index.json'
+
+_index_lock = threading.Lock()
+
+def _get_index_path():
+    return get_cache_directory(KEYSTORE_INDEX_CACHE_NAME).joinpath(INDEX_FILE)
+
+def _load_index():
+    index_path = _get_index_path()
+    if not index_path.is_file():
+        return {}
+
+    try:
+        with open(index_path, 'r', encoding='utf8') as index_file:
+            index = json.load(index_file)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(index, dict):
+        return {}
+    return index
+
+def _save_index(index, log):
+    index_path = _get_index_path()
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        write_file_atomically(index_path, json.dumps(index))
+    except OSError as exception:
+        log.warning(f'Unable to save keystore index. {exception}')
+
+def _is_keystore_entry(entry):
+    return (
+        entry.name.startswith('keystore') and
+        entry.name.endswith('.json') and
+        entry.is_file()
+    )
+
+def index_keystores(validator_keys_path, log):
+    # Return a dict of keystore path to public key for the keystores in validator_keys_path.
+    # Keystores without a valid public key are logged and left out.
+
+    validator_keys_path = Path(validator_keys_path)
+    if not validator_keys_path.is_dir():
+        return {}
+
+    keystores = {}
+    with os.scandir(validator_keys_path) as dir_it:
+        for entry in dir_it:
+            if not _is_keystore_entry(entry):
+                continue
+            stat_result = entry.stat()
+            keystores[str(Path(entry.path).resolve())] = {
+                'path': entry.path,
+                'mtime_ns': stat_result.st_mtime_ns,
+                'size': stat_result.st_size
+            }
+
+    with _index_lock:
+        index = _load_index()
+
+        public_keys = {}
+        to_parse = []
+        for key, keystore in keystores.items():
+            indexed = index.get(key)
+            if (
+                indexed is not None and
+                indexed.get('mtime_ns') == keystore['mtime_ns'] and
+                indexed.get('size') == keystore['size']
+                ):
+                public_keys[keystore['path']] = indexed['pubkey']
+            else:
+                to_parse.append(key)
+
+        if len(to_parse) > 0:
+            log.info(f'Reading {len(to_parse)} keystore(s) from {validator_keys_path}...')
+
+            with ThreadPoolExecutor(max_workers=KEYSTORE_INDEX_MAX_WORKERS) as executor:
+                parsed = executor.map(
+                    lambda key: read_keystore_public_key(keystores[key]['path'], log), to_parse)
+
+                for key, public_key in zip(to_parse, parsed):
+                    if public_key is None:
+                        index.pop(key, None)
+                        continue
+                    keystore = keystores[key]
+                    public_keys[keystore['path']] = public_key
+                    index[key] = {
+                        'mtime_ns': keystore['mtime_ns'],
+                        'size': keystore['size'],
+                        'pubkey': public_key
+                    }
+
+        # Forget keystores that were removed from this directory
+        directory_prefix = str(validator_keys_path.resolve()) + os.sep
+        removed = [
+            key for key in index
+            if key.startswith(directory_prefix) and key not in keystores and
+            os.sep not in key[len(directory_prefix):]
+        ]
+        for key in removed:
+            del index[key]
+
+        if len(to_parse) > 0 or len(removed) > 0:
+            _save_index(index, log)
+
+    return public_keys
+
+def get_keystore_public_keys(validator_keys_path, log):
+    # Return the public keys of the keystores in validator_keys_path sorted by keystore file name
+    public_keys = index_keystores(validator_keys_path, log)
+    return [public_keys[path] for path in sorted(public_keys, key=lambda path: Path(path).name)]
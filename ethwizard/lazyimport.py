@@ -0,0 +1,32 @@
+import importlib
+import sys
+import threading
+import types
+
+# Deferred imports. lazy_import returns a stand-in module that imports the real module the
+# first time one of its attributes is used. Heavy dependencies (httpx, yaml, bs4, ...) are
+# only loaded by the steps that need them instead of at startup. The real import goes through
+# the regular import system so it is thread safe, it works from the zipapp bundle and it shows
+# up in python -X importtime output when it happens.
+
+_load_lock = threading.RLock()
+
+class LazyModule(types.ModuleType):
+    # Stand-in for a module that is not imported yet
+
+    def __getattr__(self, attribute):
+        with _load_lock:
+            module = importlib.import_module(self.__name__)
+            # Later accesses find the attributes without going through __getattr__
+            self.__dict__.update(
+                (key, value) for key, value in module.__dict__.items()
+                if not key.startswith('__'))
+        return getattr(module, attribute)
+
+def lazy_import(name):
+    # Return the module name if it is already imported or a LazyModule for it
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
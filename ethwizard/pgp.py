@@ -0,0 +1,245 @@
+import os
+import subprocess
+import time
+
+from ethwizard.lazyimport import lazy_import
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from urllib.parse import urlparse
+
+from ethwizard import httpclient
+
+from ethwizard.cache import get_cache_directory
+
+from ethwizard.constants import (
+    PGP_KEY_SERVERS,
+    PGP_KEY_CACHE_NAME,
+    PGP_KEY_FETCH_TIMEOUT,
+    PGP_KEY_FETCH_ROUNDS,
+    PGP_KEY_FETCH_RETRY_DELAY
+)
+
+httpx = lazy_import('httpx')
+
+# PGP signature verification helpers. Public keys are fetched over HKP from all the key servers
+# at once and the first valid answer is used and cached. A key block is only cached or imported
+# if the only primary key it holds is the one we asked for. Detached signatures are verified by
+# streaming the signed data into gpg while it is being downloaded and they are only accepted
+# when gpg reports a valid signature made by the expected key.
+
+PUBLIC_KEY_BLOCK_MARKER = '-----BEGIN PGP PUBLIC KEY BLOCK-----'
+
+def get_key_lookup_url(key_server, key_id):
+    # Convert a hkp:// or hkps:// key server into its HKP lookup URL for key_id
+    parsed_key_server = urlparse(key_server)
+    if parsed_key_server.scheme == 'hkps':
+        base_url = f'https://{parsed_key_server.hostname}'
+    else:
+        base_url = f'http://{parsed_key_server.hostname}:{parsed_key_server.port or 11371}'
+    return f'{base_url}/pks/lookup?op=get&options=mr&search=0x{key_id}'
+
+def _get_key_cache_path(key_id):
+    return get_cache_directory(PGP_KEY_CACHE_NAME).joinpath(f'{key_id}.asc')
+
+def _matches_key_id(fingerprint, key_id):
+    # key_id is either a full fingerprint or a long key id, its last 16 hex digits
+    return fingerprint.upper().endswith(key_id.upper())
+
+def get_key_block_fingerprints(gpg_command, armored_key):
+    # Return the fingerprints of the primary keys in armored_key without importing it or None
+    # if gpg cannot read it
+    process_result = subprocess.run(gpg_command + ['--batch', '--with-colons',
+        '--import-options', 'show-only', '--import'], input=armored_key,
+        capture_output=True, text=True, encoding='utf8')
+    if process_result.returncode != 0:
+        return None
+
+    fingerprints = []
+    record_type = None
+    for line in process_result.stdout.splitlines():
+        fields = line.split(':')
+        if fields[0] == 'fpr' and record_type == 'pub' and len(fields) > 9:
+            fingerprints.append(fields[9])
+        if fields[0] != 'fpr':
+            record_type = fields[0]
+    return fingerprints
+
+def is_expected_key_block(gpg_command, armored_key, key_id):
+    # Return True if the only primary key in armored_key is key_id
+    fingerprints = get_key_block_fingerprints(gpg_command, armored_key)
+    return (
+        fingerprints is not None and
+        len(fingerprints) == 1 and
+        _matches_key_id(fingerprints[0], key_id)
+    )
+
+def _fetch_from_key_server(key_server, key_id):
+    response = httpclient.get(get_key_lookup_url(key_server, key_id),
+        timeout=PGP_KEY_FETCH_TIMEOUT, follow_redirects=True)
+    if response.status_code != 200 or PUBLIC_KEY_BLOCK_MARKER not in response.text:
+        return None
+    return response.text
+
+def fetch_public_key(gpg_command, key_id, log, key_servers=PGP_KEY_SERVERS):
+    # Return the armored public key for key_id from the cache or from the first key server
+    # that has it and nothing else. Returns None if no key server could provide it.
+
+    cache_path = _get_key_cache_path(key_id)
+    if cache_path.is_file():
+        try:
+            with open(cache_path, 'r', encoding='utf8') as key_file:
+                armored_key = key_file.read()
+            if is_expected_key_block(gpg_command, armored_key, key_id):
+                log.info(f'Using cached PGP key {key_id}')
+                return armored_key
+            log.warning(f'Cached PGP key {key_id} is not valid. It will be downloaded again.')
+            cache_path.unlink()
+        except OSError:
+            pass
+
+    for round_index in range(PGP_KEY_FETCH_ROUNDS):
+        if round_index > 0:
+            log.warning(f'We could not download the PGP key {key_id}. We will wait '
+                f'{PGP_KEY_FETCH_RETRY_DELAY} seconds and try again.')
+            time.sleep(PGP_KEY_FETCH_RETRY_DELAY)
+
+        log.info(f'Downloading PGP key {key_id} from {len(key_servers)} key servers...')
+
+        executor = ThreadPoolExecutor(max_workers=len(key_servers))
+        try:
+            futures = {
+                executor.submit(_fetch_from_key_server, key_server, key_id): key_server
+                for key_server in key_servers
+            }
+            for future in as_completed(futures):
+                key_server = futures[future]
+                try:
+                    armored_key = future.result()
+                except httpx.RequestError as exception:
+                    log.warning(f'Exception while downloading PGP key {key_id} from '
+                        f'{key_server}. {exception}')
+                    continue
+
+                if armored_key is None:
+                    log.warning(f'Key server {key_server} does not have PGP key {key_id}.')
+                    continue
+
+                if not is_expected_key_block(gpg_command, armored_key, key_id):
+                    log.warning(f'Key server {key_server} returned other keys than PGP key '
+                        f'{key_id}. Ignoring it.')
+                    continue
+
+                log.info(f'Downloaded PGP key {key_id} from {key_server}')
+
+                try:
+                    cache_path.parent.mkdir(parents=True, exist_ok=True)
+                    temp_path = cache_path.with_suffix('.tmp')
+                    with open(temp_path, 'w', encoding='utf8') as key_file:
+                        key_file.write(armored_key)
+                    os.replace(temp_path, cache_path)
+                except OSError as exception:
+                    log.warning(f'Unable to cache PGP key {key_id}. {exception}')
+
+                return armored_key
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return None
+
+def is_public_key_imported(gpg_command, key_id):
+    process_result = subprocess.run(gpg_command + ['--list-keys', '--with-colons', key_id],
+        capture_output=True)
+    return process_result.returncode == 0
+
+def import_public_key(gpg_command, key_id, log):
+    # Make sure the public key for key_id is in the gpg keyring. gpg_command is the command
+    # line used to call gpg. Returns True if the key is available.
+
+    if is_public_key_imported(gpg_command, key_id):
+        return True
+
+    armored_key = fetch_public_key(gpg_command, key_id, log)
+    if armored_key is None:
+        return False
+
+    process_result = subprocess.run(gpg_command + ['--batch', '--import'], input=armored_key,
+        capture_output=True, text=True, encoding='utf8')
+    if process_result.returncode != 0 or not is_public_key_imported(gpg_command, key_id):
+        log.error(f'Unable to import PGP key {key_id}. {process_result.stderr}')
+        try:
+            _get_key_cache_path(key_id).unlink()
+        except OSError:
+            pass
+        return False
+
+    return True
+
+def get_valid_signature_fingerprints(status_output):
+    # Return the fingerprints of the keys that made a valid signature from gpg --status-fd
+    # output. The primary key fingerprint is used when the signature was made by a subkey.
+    fingerprints = []
+    for line in status_output.splitlines():
+        fields = line.split()
+        if len(fields) < 3 or fields[0] != '[GNUPG:]' or fields[1] != 'VALIDSIG':
+            continue
+        fingerprints.append(fields[2])
+        if len(fields) > 11:
+            fingerprints.append(fields[11])
+    return fingerprints
+
+class SignatureVerifier:
+    # Verify a detached signature made by key_id with gpg while the signed data is downloaded.
+    # It can be used as a download consumer: the data is written to gpg as it arrives so the
+    # downloaded file does not have to be read again.
+
+    def __init__(self, gpg_command, signature_path, key_id, log):
+        self.gpg_command = gpg_command
+        self.signature_path = signature_path
+        self.key_id = key_id
+        self.log = log
+
+        self._process = None
+        self._broken = False
+
+    def start(self):
+        self._broken = False
+        self._process = subprocess.Popen(self.gpg_command + ['--batch', '--status-fd', '1',
+            '--verify', str(self.signature_path), '-'], stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE)
+
+    def update(self, data):
+        if self._broken:
+            return
+        try:
+            self._process.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            self._broken = True
+
+    def reset(self):
+        self.abort()
+        self.start()
+
+    def abort(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+
+    def finish(self):
+        # Returns True if the signature is valid for the data we received and made by key_id
+        try:
+            self._process.stdin.close()
+        except (BrokenPipeError, OSError):
+            self._broken = True
+        status_output = self._process.stdout.read().decode('utf8', errors='replace')
+        return_code = self._process.wait()
+        if return_code != 0 or self._broken:
+            self.log.error(f'gpg could not verify signature {self.signature_path} '
+                f'(return code {return_code}).')
+            return False
+        fingerprints = get_valid_signature_fingerprints(status_output)
+        if not any(_matches_key_id(fingerprint, self.key_id) for fingerprint in fingerprints):
+            self.log.error(f'Signature {self.signature_path} was not made by PGP key '
+                f'{self.key_id}.')
+            return False
+        return True
@@ -140,6 +140,17 @@ def get_install_steps(platform):
     
     return False
 
+def get_log(platform):
+    if platform == PLATFORM_UBUNTU:
+        from ethwizard.platforms.ubuntu.common import log as ubuntu_log
+        return ubuntu_log
+
+    elif platform == PLATFORM_WINDOWS10:
+        from ethwizard.platforms.windows.common import log as windows10_log
+        return windows10_log
+    
+    return False
+
 def get_save_state(platform):
     if platform == PLATFORM_UBUNTU:
         from ethwizard.platforms.ubuntu.common import save_state as ubuntu_save_state
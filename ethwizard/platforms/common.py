@@ -1,36 +1,59 @@
 from __future__ import annotations
 
-import httpx
 import json
 import os
 import time
-import humanize
 import asyncio
 import re
-
-from rfc3986 import urlparse, builder as urlbuilder
+import threading
 
 from datetime import timedelta
 
+from collections import deque
+
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    TimeoutError as FutureTimeoutError,
+    wait as futures_wait,
+    FIRST_COMPLETED
+)
+
 from dataclasses import dataclass
 
 from pathlib import Path
 
+from ethwizard import httpclient, gethrpc
+
+from ethwizard.releasecache import get_github_release
+from ethwizard.depositlookup import get_validator_deposits
+from ethwizard.steptiming import StepTimer, format_step_metrics
+from ethwizard.headless import (
+    radiolist_dialog,
+    button_dialog,
+    input_dialog,
+    is_headless,
+    get_answer,
+    get_log,
+    plain_text,
+    resolve_input,
+    HeadlessDialog
+)
+
 from ethwizard.constants import *
 
-from ethwizard.utils.CompactFIPS202 import Keccak_256
+from ethwizard.utils.keccak import Keccak_256
 
 from asyncio import get_event_loop
 
 from prompt_toolkit.formatted_text import HTML
-from prompt_toolkit.shortcuts import radiolist_dialog, button_dialog, input_dialog
 from prompt_toolkit.shortcuts.dialogs import _return_none, _create_app
 
-from typing import Optional, Callable, List
+from typing import Any, Optional, Callable, List
 
 from prompt_toolkit.application import Application
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.document import Document
 from prompt_toolkit.completion import Completer
 from prompt_toolkit.filters import FilterOrBool
 from prompt_toolkit.formatted_text import AnyFormattedText
@@ -50,8 +73,13 @@ from prompt_toolkit.widgets import (
     ValidationToolbar,
 )
 
-from yaml import safe_load
-from secrets import choice
+from ethwizard.lazyimport import lazy_import
+
+httpx = lazy_import('httpx')
+humanize = lazy_import('humanize')
+rfc3986 = lazy_import('rfc3986')
+urlbuilder = lazy_import('rfc3986.builder')
+yaml = lazy_import('yaml')
 
 
 @dataclass
@@ -59,6 +87,39 @@ class Step():
     step_id: str
     display_name: str
     exc_function: Callable[[Step, dict, StepSequence], dict]
+    # Context keys the step reads and writes. None means unknown.
+    reads: Optional[List[str]] = None
+    writes: Optional[List[str]] = None
+    # Ids of the steps that must complete before this one, for steps that depend on the side
+    # effects of another step instead of its context keys.
+    depends_on: Optional[List[str]] = None
+    # Interactive steps show dialogs. They are never run concurrently with other steps.
+    interactive: bool = True
+
+def steps_conflict(first: Step, second: Step) -> bool:
+    # Return True if second must wait for first to complete before running
+
+    if first.interactive or second.interactive:
+        return True
+
+    if second.depends_on is not None and first.step_id in second.depends_on:
+        return True
+
+    if (
+        first.reads is None or
+        first.writes is None or
+        second.reads is None or
+        second.writes is None
+        ):
+        return True
+
+    first_writes = set(first.writes)
+    second_writes = set(second.writes)
+
+    return bool(
+        first_writes & (set(second.reads) | second_writes) or
+        second_writes & set(first.reads)
+    )
 
 
 @dataclass
@@ -66,6 +127,7 @@ class StepSequence():
     steps: List[Step]
     save_state: Callable[[str, dict], bool]
     context_factory: Optional[Callable[[], dict]] = None
+    max_workers: int = STEP_SCHEDULER_MAX_WORKERS
     _steps_index: Optional[dict] = None
 
     def run_from_start(self, context: Optional[dict] = None) -> bool:
@@ -105,6 +167,58 @@ class StepSequence():
         for index, step in enumerate(self.steps):
             self._steps_index[step.step_id] = index
 
+    def _build_dependencies(self, indexes: List[int]) -> dict:
+        # Return the indexes each step must wait for among the steps to run
+        dependencies = {}
+
+        for position, index in enumerate(indexes):
+            dependencies[index] = set(
+                previous for previous in indexes[:position]
+                if steps_conflict(self.steps[previous], self.steps[index]))
+
+        return dependencies
+
+    def _start_timer(self, index: int, timers: dict) -> StepTimer:
+        # Create the timer for a step about to run. Steps running at the same time share the
+        # process wide counters so they are all marked as overlapped.
+        timer = StepTimer(self.steps[index].step_id)
+        if len(timers) > 0:
+            timer.overlapped = True
+            for running_timer in timers.values():
+                running_timer.overlapped = True
+        timers[index] = timer
+        return timer
+
+    def _run_step(self, step: Step, context: dict, timer: StepTimer) -> dict:
+        timer.start()
+        try:
+            return step.exc_function(step, context, self)
+        finally:
+            timer.stop()
+
+    def _merge_step_context(self, step: Step, context: dict, step_context: dict):
+        # Copy the keys a concurrent step writes from its own context into context. Keys the
+        # step removed are removed too.
+        if step.writes is None:
+            # The step conflicts with every other step so it ran alone
+            context.clear()
+            context.update(step_context)
+            return
+
+        for key in step.writes:
+            if key in step_context:
+                context[key] = step_context[key]
+            else:
+                context.pop(key, None)
+
+    def _record_metrics(self, step: Step, context: Optional[dict], timer: StepTimer):
+        # Keep the step metrics in the context so they are saved with the wizard state
+        if context is None or timer.metrics is None:
+            return
+        step_metrics = dict(context.get(CTX_STEP_METRICS, {}))
+        step_metrics[step.step_id] = timer.metrics
+        context[CTX_STEP_METRICS] = step_metrics
+
     def _run_from_index(self, step_index: int, context: Optional[dict] = None) -> bool:
         if self.steps is None or len(self.steps) == 0:
             return False
@@ -118,16 +232,135 @@ class StepSequence():
             else:
                 context = self.context_factory()
 
-        for index in range(step_index, len(self.steps)):
-            current_step = self.steps[index]
-            self.save_state(current_step.step_id, context)
+        # Steps are run following their dependency graph. Interactive steps run alone in list
+        # order and independent non-interactive steps run concurrently.
+        pending = list(range(step_index, len(self.steps)))
+        dependencies = self._build_dependencies(pending)
+        incomplete = set(pending)
+        completed = set()
+        running = {}
+        timers = {}
+
+        # Concurrent steps run with their own copy of the context. Only the keys they write
+        # are merged back by this thread. The lock guards the shared context, the incomplete
+        # steps and the saved state.
+        state_lock = threading.RLock()
+        step_contexts = {}
+
+        # Steps save their progress with their own step id. The resume point has to be the
+        # first step that is not completed yet since later steps might be done already.
+        save_state = self.save_state
+
+        def save_progress(step_id: str, step_context: dict) -> bool:
+            with state_lock:
+                running_index = step_contexts.get(id(step_context))
+                if running_index is not None:
+                    # Save the shared context with the progress of this concurrent step
+                    snapshot = dict(context)
+                    self._merge_step_context(self.steps[running_index], snapshot,
+                        step_context)
+                    step_context = snapshot
+                if step_id != WIZARD_COMPLETED_STEP_ID and len(incomplete) > 0:
+                    step_id = self.steps[min(incomplete)].step_id
+                return save_state(step_id, step_context)
+
+        self.save_state = save_progress
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while len(pending) > 0 or len(running) > 0:
+                ready = [index for index in pending if dependencies[index] <= completed]
+
+                if len(ready) > 0 and self.steps[ready[0]].interactive:
+                    index = ready[0]
+                    current_step = self.steps[index]
+                    pending.remove(index)
+                    self.save_state(current_step.step_id, context)
+
+                    timer = self._start_timer(index, timers)
+                    context = self._run_step(current_step, context, timer)
+                    del timers[index]
+
+                    with state_lock:
+                        incomplete.discard(index)
+                        completed.add(index)
+                        self._record_metrics(current_step, context, timer)
+                    continue
 
-            context = current_step.exc_function(current_step, context, self)
+                for index in ready:
+                    current_step = self.steps[index]
+                    pending.remove(index)
+                    self.save_state(current_step.step_id, context)
+
+                    with state_lock:
+                        step_context = dict(context)
+                        step_contexts[id(step_context)] = index
+
+                    timer = self._start_timer(index, timers)
+                    future = executor.submit(self._run_step, current_step, step_context, timer)
+                    running[future] = (index, step_context)
+
+                done, not_done = futures_wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, step_context = running.pop(future)
+                    timer = timers.pop(index)
+                    returned_context = future.result()
+                    if returned_context is None:
+                        returned_context = step_context
+
+                    with state_lock:
+                        del step_contexts[id(step_context)]
+                        self._merge_step_context(self.steps[index], context, returned_context)
+                        incomplete.discard(index)
+                        completed.add(index)
+                        self._record_metrics(self.steps[index], context, timer)
+                    self.save_state(self.steps[index].step_id, context)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.save_state = save_state
 
         self.save_state(WIZARD_COMPLETED_STEP_ID, context)
 
         return True
 
+@dataclass
+class Probe():
+    name: str
+    function: Callable[[], Any]
+    default: Any = UNKNOWN_VALUE
+    timeout: float = MAINTENANCE_PROBE_TIMEOUT
+
+def run_probes(probes: List[Probe], log) -> dict:
+    # Run independent probes concurrently and return their results by name. A probe that fails
+    # or that does not finish within its timeout gets its default value.
+
+    results = {}
+
+    if len(probes) == 0:
+        return results
+
+    executor = ThreadPoolExecutor(max_workers=len(probes))
+    started = time.monotonic()
+
+    try:
+        futures = [(probe, executor.submit(probe.function)) for probe in probes]
+
+        for probe, future in futures:
+            remaining = max(probe.timeout - (time.monotonic() - started), 0)
+            try:
+                results[probe.name] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                log.error(f'Probe {probe.name} did not complete within {probe.timeout} seconds.')
+                results[probe.name] = probe.default
+            except Exception as exception:
+                log.error(f'Exception while running probe {probe.name}: {exception}')
+                results[probe.name] = probe.default
+    finally:
+        # Do not wait for probes that timed out
+        executor.shutdown(wait=False)
+
+    return results
+
 def is_completed_state(state):
     return (
         state is not None and
@@ -138,6 +371,13 @@ def is_completed_state(state):
 def select_network(log):
     # Prompt for the selection on which network to perform the installation
 
+    if is_headless():
+        network = get_answer(ANSWER_NETWORK)
+        if network not in (NETWORK_MAINNET, NETWORK_GOERLI):
+            log.error(f'Unsupported network in answers file: {network}')
+            return False
+        return network
+
     unknown_joining_queue = '(No join queue information found)'
 
     network_queue_info = {
@@ -150,41 +390,41 @@ def select_network(log):
     }
 
     async def network_joining_validators(network):
-        async with httpx.AsyncClient() as client:
-            beaconcha_in_queue_query_url = (
-                BEACONCHA_IN_URLS[network] + BEACONCHA_VALIDATOR_QUEUE_API_URL)
-            try:
-                response = await client.get(beaconcha_in_queue_query_url, headers=headers,
-                    follow_redirects=True)
-            except httpx.RequestError as exception:
-                log.error(f'Exception: {exception} while querying beaconcha.in.')
-                return None
+        client = httpclient.get_async_client()
+        beaconcha_in_queue_query_url = (
+            BEACONCHA_IN_URLS[network] + BEACONCHA_VALIDATOR_QUEUE_API_URL)
+        try:
+            response = await client.get(beaconcha_in_queue_query_url, headers=headers,
+                follow_redirects=True)
+        except httpx.RequestError as exception:
+            log.error(f'Exception: {exception} while querying beaconcha.in.')
+            return None
 
-            if response.status_code != 200:
-                log.error(f'Status code: {response.status_code} while querying beaconcha.in.')
-                return None
+        if response.status_code != 200:
+            log.error(f'Status code: {response.status_code} while querying beaconcha.in.')
+            return None
 
-            response_json = response.json()
+        response_json = response.json()
 
-            if (
-                response_json and
-                'data' in response_json and
-                'beaconchain_entering' in response_json['data']):
+        if (
+            response_json and
+            'data' in response_json and
+            'beaconchain_entering' in response_json['data']):
 
-                validators_entering = int(response_json['data']['beaconchain_entering'])
-                active_validators = int(response_json['data'].get('validatorscount', 1))
+            validators_entering = int(response_json['data']['beaconchain_entering'])
+            active_validators = int(response_json['data'].get('validatorscount', 1))
 
-                churn_limit = max(MIN_PER_EPOCH_CHURN_LIMIT, active_validators // CHURN_LIMIT_QUOTIENT)
-                churn_limit_per_day = churn_limit * EPOCHS_PER_DAY
+            churn_limit = max(MIN_PER_EPOCH_CHURN_LIMIT, active_validators // CHURN_LIMIT_QUOTIENT)
+            churn_limit_per_day = churn_limit * EPOCHS_PER_DAY
 
-                waiting_td = timedelta(days=validators_entering / churn_limit_per_day)
+            waiting_td = timedelta(days=validators_entering / churn_limit_per_day)
 
-                queue_info = (
-                    f'({validators_entering} validators waiting to join '
-                    f'[{humanize.naturaldelta(waiting_td)}])'
-                )
-                return network, queue_info
-            
+            queue_info = (
+                f'({validators_entering} validators waiting to join '
+                f'[{humanize.naturaldelta(waiting_td)}])'
+            )
+            return network, queue_info
+        
         return None
 
     async_tasks = []
@@ -231,6 +471,9 @@ For which network would you like to perform this installation?
 def select_custom_ports(ports):
     # Prompt the user for modifying the default ports
 
+    if is_headless():
+        return _headless_custom_ports(ports)
+
     result = button_dialog(
         title='Open ports configuration',
         text=(HTML(
@@ -362,6 +605,29 @@ should also be different from the one you choose for execution node.
     
     return ports
 
+def _headless_custom_ports(ports):
+    # Use the ports from the answers file, the default ports when there are none
+    log = get_log()
+    answered_ports = get_answer(ANSWER_PORTS, {}) or {}
+
+    execution_port = answered_ports.get(ANSWER_EXECUTION_PORT, ports['eth1'])
+    consensus_port = answered_ports.get(ANSWER_CONSENSUS_PORT, ports['eth2_bn'])
+
+    for port in (execution_port, consensus_port):
+        if type(port) is not int or not (1024 <= port <= 65535):
+            log.error(f'Invalid port in answers file: {port}. Ports should be greater than '
+                f'1024 and lower than 65535.')
+            return False
+
+    if execution_port == consensus_port:
+        log.error('Execution and consensus ports in answers file should be different.')
+        return False
+
+    ports['eth1'] = execution_port
+    ports['eth2_bn'] = consensus_port
+
+    return ports
+
 def select_consensus_checkpoint_provider(network, log):
     # Prompt the user for consensus checkpoint provider (weak subjectivity checkpoint)
     
@@ -374,9 +640,24 @@ def select_consensus_checkpoint_provider(network, log):
 
     initial_state_url = None
 
+    if is_headless():
+        checkpoint_url = get_answer(ANSWER_CHECKPOINT_URL) or ''
+        if checkpoint_url == '':
+            return ''
+        if checkpoint_url != ANSWER_CHECKPOINT_COMMUNITY:
+            if not beacon_node_url_validator(network, checkpoint_url, log):
+                log.error(f'Checkpoint URL from answers file {checkpoint_url} is not a valid '
+                    f'beacon node for {NETWORK_LABEL[network]}.')
+                return False
+            return checkpoint_url
+
     while initial_state_url is None:
 
-        result = button_dialog(
+        if is_headless():
+            # Community checkpoint from the answers file
+            result = 1
+        else:
+            result = button_dialog(
                 title='Adding consensus checkpoint provider',
                 text=(HTML(
 f'''
@@ -411,13 +692,13 @@ Do you want add a consensus checkpoint provider?
             checkpoint_endpoints = []
 
             try:
-                response = httpx.get(checkpoint_yaml_file, follow_redirects=True)
+                response = httpclient.get(checkpoint_yaml_file, follow_redirects=True)
 
                 if response.status_code != 200:
                     log.error(f'Checkpoint YAML file returned an unexpected status code from {checkpoint_yaml_file}: {response.status_code}')
                     return False
 
-                checkpoint_endpoints = safe_load(response.text)
+                checkpoint_endpoints = yaml.safe_load(response.text)
                 
             except httpx.RequestError as exception:
                 log.error(f'Exception during request to download checkpoint YAML file from {checkpoint_yaml_file}: {exception}')
@@ -429,29 +710,18 @@ Do you want add a consensus checkpoint provider?
             
             log.info(f'{len(checkpoint_endpoints)} checkpoint sync endpoints to choose from.')
 
-            is_invalid = True
-
-            # Select a random endpoint from the YAML file
-            while is_invalid:
-                if len(checkpoint_endpoints) <= 0:
-                    log.error(f'No suitable checkpoint sync endpoint left to choose from.')
-                    return False
-                endpoint_details = choice(checkpoint_endpoints)
-                checkpoint_endpoints.remove(endpoint_details)
-
-                endpoint_name = endpoint_details.get('name', UNKNOWN_VALUE)
-                endpoint_url = endpoint_details.get('endpoint', '')
-
-                log.info(f'Random endpoint selected: {endpoint_name} at {endpoint_url}')
+            # Probe all the endpoints from the YAML file and use the fastest valid one
+            ranked_endpoints = rank_checkpoint_endpoints(network, checkpoint_endpoints, log)
+            if len(ranked_endpoints) == 0:
+                log.error(f'No suitable checkpoint sync endpoint left to choose from.')
+                return False
 
-                if endpoint_url == '':
-                    log.error(f'Endpoint does not have an URL. Skipping.')
-                    continue
+            log.info(format_checkpoint_endpoints(ranked_endpoints))
 
-                # Test if the endpoint works, select another one if not
-                is_invalid = not beacon_node_url_validator(network, endpoint_url, log)
-                if not is_invalid:
-                    initial_state_url = endpoint_url
+            selected_endpoint = ranked_endpoints[0]
+            log.info(f'Fastest endpoint selected: {selected_endpoint.name} at '
+                f'{selected_endpoint.url}')
+            initial_state_url = selected_endpoint.url
 
         elif result == 2:
             # Custom
@@ -500,6 +770,52 @@ Ethereum Beacon Node API. It should implement these endpoints:
 
     return initial_state_url
 
+def _is_valid_deposit_contract_response(network, response, log):
+    # Return true if response is a deposit contract response for the network
+
+    if response.status_code != 200:
+        log.error(f'Beacon node returned an unexpected status code: {response.status_code}')
+        return False
+    
+    try:
+        response_json = response.json()
+    except ValueError:
+        response_json = None
+
+    if not response_json:
+        log.error(f'Unexpected response from beacon node.')
+        return False
+
+    if (
+        'data' not in response_json or
+        'chain_id' not in response_json['data'] or
+        'address' not in response_json['data']
+    ):
+        log.error('Unexpected response from beacon node.')
+        return False
+    
+    chain_id = response_json['data']['chain_id']
+    deposit_contract = response_json['data']['address']
+
+    try:
+        chain_id_value = int(chain_id)
+    except (TypeError, ValueError):
+        log.error(f'Unexpected chain_id ({chain_id}) from beacon node.')
+        return False
+
+    if chain_id_value != BN_CHAIN_IDS[network]:
+        log.error(f'Unexpected chain_id ({chain_id}) from beacon node. We expected another '
+            f'value ({BN_CHAIN_IDS[network]}) for this network ({network}).')
+        return False
+    
+    if deposit_contract.lower() != BN_DEPOSIT_CONTRACTS[network].lower():
+        log.error(f'Unexpected deposit contract address ({deposit_contract}) from beacon '
+            f'node. We expected another value ({BN_DEPOSIT_CONTRACTS[network]}) for this '
+            f'network ({network}).')
+        return False
+
+    return True
+
 def beacon_node_url_validator(network, url, log):
     # Return true if this is a beacon chain endpoint for the network
 
@@ -514,50 +830,155 @@ def beacon_node_url_validator(network, url, log):
     }
 
     try:
-        response = httpx.get(deposit_contract_url, headers=headers, follow_redirects=True)
+        response = httpclient.get(deposit_contract_url, headers=headers, follow_redirects=True)
+    except httpx.RequestError as exception:
+        log.error(f'Exception during request to beacon node: {exception}')
+        return False
 
-        if response.status_code != 200:
-            log.error(f'Beacon node returned an unexpected status code: {response.status_code}')
-            return False
-        
-        response_json = response.json()
+    return _is_valid_deposit_contract_response(network, response, log)
 
-        if not response_json:
-            log.error(f'Unexpected response from beacon node.')
-            return False
+@dataclass
+class CheckpointEndpoint():
+    name: str
+    url: str
+    # Round trip time of the deposit contract request in seconds
+    latency: float = 0.0
+    # Finalized state download rate in bytes per second, None if it was not sampled
+    throughput: Optional[float] = None
+
+async def _probe_checkpoint_endpoint(network, endpoint, log) -> Optional[CheckpointEndpoint]:
+    # Validate a checkpoint sync endpoint and measure its latency. Returns None if the
+    # endpoint is not a valid beacon node for network.
+
+    client = httpclient.get_async_client()
+    base_url = urlbuilder.URIBuilder.from_uri(endpoint.url)
+    deposit_contract_url = base_url.add_path(BN_DEPOSIT_CONTRACT_URL).finalize().unsplit()
 
-        if (
-            'data' not in response_json or
-            'chain_id' not in response_json['data'] or
-            'address' not in response_json['data']
-        ):
-            log.error('Unexpected response from beacon node.')
-            return False
-        
-        chain_id = response_json['data']['chain_id']
-        deposit_contract = response_json['data']['address']
+    try:
+        started = time.monotonic()
+        response = await client.get(deposit_contract_url,
+            headers={'Content-Type': 'application/json'}, follow_redirects=True)
+        endpoint.latency = time.monotonic() - started
+    except httpx.RequestError as exception:
+        log.warning(f'Exception while probing checkpoint sync endpoint {endpoint.name}: '
+            f'{exception}')
+        return None
 
-        if int(chain_id) != BN_CHAIN_IDS[network]:
-            log.error(f'Unexpected chain_id ({chain_id}) from beacon node. We expected another '
-                f'value ({BN_CHAIN_IDS[network]}) for this network ({network}).')
-            return False
-        
-        if deposit_contract.lower() != BN_DEPOSIT_CONTRACTS[network].lower():
-            log.error(f'Unexpected deposit contract address ({deposit_contract}) from beacon '
-                f'node. We expected another value ({BN_DEPOSIT_CONTRACTS[network]}) for this '
-                f'network ({network}).')
-            return False
-        
+    if not _is_valid_deposit_contract_response(network, response, log):
+        return None
+
+    return endpoint
+
+async def _sample_checkpoint_throughput(endpoint, log):
+    # Download the start of the finalized state for at most CHECKPOINT_PROBE_SAMPLE_DURATION
+    # seconds to estimate the checkpoint download speed. What was received when the deadline
+    # hits still counts.
+
+    client = httpclient.get_async_client()
+    base_url = urlbuilder.URIBuilder.from_uri(endpoint.url)
+    finalized_state_url = base_url.add_path(BN_FINALIZED_STATE_URL).finalize().unsplit()
+
+    sample = {
+        'started': None,
+        'received': 0
+    }
+
+    async def download():
+        async with client.stream('GET', finalized_state_url,
+            headers={'Accept': 'application/octet-stream'},
+            follow_redirects=True) as response:
+
+            if response.status_code != 200:
+                log.warning(f'Checkpoint sync endpoint {endpoint.name} returned an unexpected '
+                    f'status code for the finalized state: {response.status_code}')
+                return
+
+            sample['started'] = time.monotonic()
+            async for data in response.aiter_bytes():
+                sample['received'] = sample['received'] + len(data)
+                if sample['received'] >= CHECKPOINT_PROBE_SAMPLE_SIZE:
+                    break
+
+    try:
+        await asyncio.wait_for(download(), CHECKPOINT_PROBE_SAMPLE_DURATION)
+    except asyncio.TimeoutError:
+        pass
     except httpx.RequestError as exception:
-        log.error(f'Exception during request to beacon node: {exception}')
-        return False
+        log.warning(f'Exception while sampling checkpoint sync endpoint {endpoint.name}: '
+            f'{exception}')
+
+    if sample['started'] is not None:
+        endpoint.throughput = sample['received'] / max(
+            time.monotonic() - sample['started'], 0.001)
+
+def rank_checkpoint_endpoints(network, checkpoint_endpoints, log) -> List[CheckpointEndpoint]:
+    # Validate all the checkpoint sync endpoints at once and return the valid ones, fastest
+    # first. Only the CHECKPOINT_PROBE_SAMPLE_ENDPOINTS endpoints with the lowest latency get
+    # their throughput sampled so they do not all compete for the same link.
+
+    endpoints = []
+    for endpoint_details in checkpoint_endpoints:
+        endpoint_name = endpoint_details.get('name', UNKNOWN_VALUE)
+        endpoint_url = endpoint_details.get('endpoint', '')
+        if endpoint_url == '' or not uri_validator(endpoint_url):
+            log.error(f'Endpoint {endpoint_name} does not have a valid URL. Skipping.')
+            continue
+        endpoints.append(CheckpointEndpoint(name=endpoint_name, url=endpoint_url))
 
-    return True
+    log.info(f'Probing {len(endpoints)} checkpoint sync endpoints...')
+
+    async def probe(endpoint):
+        try:
+            return await asyncio.wait_for(_probe_checkpoint_endpoint(network, endpoint, log),
+                CHECKPOINT_PROBE_TIMEOUT)
+        except asyncio.TimeoutError:
+            log.warning(f'Checkpoint sync endpoint {endpoint.name} did not answer in '
+                f'{CHECKPOINT_PROBE_TIMEOUT} seconds.')
+            return None
+
+    loop = asyncio.get_event_loop()
+    results = loop.run_until_complete(asyncio.gather(*(probe(endpoint) for endpoint in endpoints)))
+
+    valid_endpoints = [endpoint for endpoint in results if endpoint is not None]
+    valid_endpoints.sort(key=lambda endpoint: endpoint.latency)
+
+    sampled_endpoints = valid_endpoints[:CHECKPOINT_PROBE_SAMPLE_ENDPOINTS]
+    if len(sampled_endpoints) > 0:
+        log.info(f'Sampling the download speed of {len(sampled_endpoints)} checkpoint sync '
+            f'endpoints...')
+        loop.run_until_complete(asyncio.gather(
+            *(_sample_checkpoint_throughput(endpoint, log) for endpoint in sampled_endpoints)))
+
+    valid_endpoints.sort(key=lambda endpoint: (
+        -(endpoint.throughput or 0.0), endpoint.latency))
+
+    return valid_endpoints
+
+def format_checkpoint_endpoints(endpoints: List[CheckpointEndpoint]) -> str:
+    # Return a human readable ranking of checkpoint sync endpoints
+    lines = ['Checkpoint sync endpoints ranking:']
+    for position, endpoint in enumerate(endpoints, start=1):
+        throughput = 'speed not sampled'
+        if endpoint.throughput is not None:
+            throughput = f'{humanize.naturalsize(endpoint.throughput, binary=True)}/s'
+        lines.append(
+            f'{position}. {endpoint.name} ({endpoint.url}): {throughput}, '
+            f'latency {endpoint.latency * 1000.0:.0f}ms')
+    return '\n'.join(lines)
 
 def select_eth1_fallbacks(network):
     # Prompt the user for ethereum execution fallback nodes
     eth1_fallbacks = []
 
+    if is_headless():
+        eth1_fallbacks = get_answer(ANSWER_ETH1_FALLBACKS, []) or []
+        for eth1_fallback in eth1_fallbacks:
+            if not uri_validator(eth1_fallback):
+                get_log().error(f'Invalid execution fallback URL in answers file: '
+                    f'{eth1_fallback}')
+                return False
+        return eth1_fallbacks
+
     add_more_fallbacks = True
     eth1_network_name = ETH1_NETWORK_NAME[network]
     eth1_network_chainid = ETH1_NETWORK_CHAINID[network]
@@ -647,7 +1068,7 @@ you should keep secret if you used a service that requires an account.
         }
 
         try:
-            response = httpx.post(eth1_fallback, json=request_json, headers=headers,
+            response = httpclient.post(eth1_fallback, json=request_json, headers=headers,
                 follow_redirects=True)
         except httpx.RequestError as exception:
             result = button_dialog(
@@ -759,7 +1180,7 @@ selected at the beginning of this wizard.
 
 def uri_validator(uri):
     try:
-        result = urlparse(uri)
+        result = rfc3986.urlparse(uri)
         return all([result.scheme, result.netloc])
     except:
         return False
@@ -780,6 +1201,9 @@ def input_dialog_default(
     Return the given text, or None when cancelled.
     """
 
+    if is_headless():
+        return HeadlessDialog(lambda: resolve_input(title, default_input_text))
+
     def accept(buf: Buffer) -> bool:
         get_app().layout.focus(ok_button)
         return True  # Keep text.
@@ -815,6 +1239,66 @@ def input_dialog_default(
 
     return _create_app(dialog, style)
 
+class LogRingBuffer:
+    """
+    Fixed capacity log lines buffer. Text chunks are appended as they come and
+    only the last `max_lines` lines are kept.
+    """
+
+    def __init__(self, max_lines: int = LOG_PANE_MAX_LINES,
+        max_line_length: int = LOG_PANE_MAX_LINE_LENGTH) -> None:
+        self.max_line_length = max_line_length
+        self.lines = deque([''], maxlen=max_lines)
+        self.lock = threading.Lock()
+
+    def append(self, text: str) -> None:
+        new_lines = text.split('\n')
+        with self.lock:
+            # The first part continues the current last line
+            last_line = self.lines[-1] + new_lines[0]
+            self.lines[-1] = last_line[-self.max_line_length:]
+            for line in new_lines[1:]:
+                self.lines.append(line[-self.max_line_length:])
+
+    def text(self) -> str:
+        with self.lock:
+            return '\n'.join(self.lines)
+
+class ProgressLog:
+    """
+    Logger like object for work running inside a progress_log_dialog. Messages
+    go to the dialog log pane instead of the terminal that the dialog covers.
+    """
+
+    def __init__(self, log_text: Callable[[str], None]) -> None:
+        self.log_text = log_text
+
+    def info(self, message: str) -> None:
+        self.log_text(f'{message}\n')
+
+    def warning(self, message: str) -> None:
+        self.log_text(f'Warning: {message}\n')
+
+    def error(self, message: str) -> None:
+        self.log_text(f'Error: {message}\n')
+
+def _headless_progress_dialog(title, run_callback):
+    # Run the work of a progress dialog when run is called and send its output to the log
+    log = get_log()
+
+    def log_text(text: str) -> None:
+        log.info(text.rstrip())
+
+    def change_status(text: AnyFormattedText) -> None:
+        log.info(plain_text(text))
+
+    def run() -> Any:
+        log.info(plain_text(title))
+        return run_callback(lambda value: None, log_text, change_status, lambda result: None,
+            lambda: False)
+
+    return HeadlessDialog(run)
+
 def progress_log_dialog(
     title: AnyFormattedText = "",
     text: AnyFormattedText = "",
@@ -833,6 +1317,9 @@ def progress_log_dialog(
     :param run_callback: A function that receives as input a `set_percentage`
         function and it does the work.
     """
+    if is_headless():
+        return _headless_progress_dialog(title, run_callback)
+
     loop = get_event_loop()
 
     def wait_handler() -> None:
@@ -888,14 +1375,42 @@ def progress_log_dialog(
     app = _create_app(dialog, style)
     app.result = None
     app.exited = False
+    app.work_time = 0.0
+    app.min_redraw_interval = LOG_PANE_FLUSH_INTERVAL
+
+    # Log text is kept in a bounded ring buffer and flushed to the text area at
+    # most once every LOG_PANE_FLUSH_INTERVAL seconds, no matter how many
+    # log_text calls we get.
+    log_buffer = LogRingBuffer()
+    log_flush = {
+        'scheduled': False,
+        'last': 0.0
+    }
+    log_flush_lock = threading.Lock()
+
+    def flush_log() -> None:
+        with log_flush_lock:
+            log_flush['scheduled'] = False
+            log_flush['last'] = loop.time()
+        content = log_buffer.text()
+        text_area.buffer.set_document(Document(content, len(content)), bypass_readonly=True)
+        app.invalidate()
+
+    def schedule_flush_log() -> None:
+        delay = max(log_flush['last'] + LOG_PANE_FLUSH_INTERVAL - loop.time(), 0.0)
+        loop.call_later(delay, flush_log)
 
     def set_percentage(value: int) -> None:
         progressbar.percentage = int(value)
         app.invalidate()
 
     def log_text(text: str) -> None:
-        loop.call_soon_threadsafe(text_area.buffer.insert_text, text)
-        app.invalidate()
+        log_buffer.append(text)
+        with log_flush_lock:
+            if log_flush['scheduled']:
+                return
+            log_flush['scheduled'] = True
+        loop.call_soon_threadsafe(schedule_flush_log)
     
     def change_status(text: str) -> None:
         status.formatted_text_control.text = text
@@ -911,9 +1426,12 @@ def progress_log_dialog(
     # UI, so that it quits.
     def start() -> None:
         result = None
+        started = time.monotonic()
         try:
             result = run_callback(set_percentage, log_text, change_status, set_result, get_exited)
         finally:
+            # Time spent in the callback is not time spent waiting for the user
+            app.work_time = time.monotonic() - started
             if not app.exited:
                 app.exited = True
                 app.exit(result=result)
@@ -958,66 +1476,59 @@ def search_for_generated_keys(validator_keys_path):
 def get_bc_validator_deposits(network, public_keys, log):
     # Return the validator deposits from the beaconcha.in API
 
-    pubkey_arg = ','.join(public_keys)
-    bc_api_query_url = (BEACONCHA_IN_URLS[network] +
-        BEACONCHA_VALIDATOR_DEPOSITS_API_URL.format(indexOrPubkey=pubkey_arg))
-    headers = {'accept': 'application/json'}
+    validator_deposits = get_validator_deposits(network, public_keys, log)
+    if validator_deposits is False:
+        time.sleep(5)
+        return False
 
-    keep_retrying = True
+    return validator_deposits
 
-    retry_index = 0
-    retry_count = 5
-    retry_delay = 30
+def check_open_ports(ports, log):
+    # Test the selected ports once without any dialog. Returns True if they are all opened and
+    # exposed to the internet. test_open_ports can be used afterwards to let the user retry.
 
-    while keep_retrying and retry_index < retry_count:
-        try:
-            response = httpx.get(bc_api_query_url, headers=headers, follow_redirects=True)
-        except httpx.RequestError as exception:
-            log.error(f'Exception {exception} when trying to get {bc_api_query_url}')
+    params = {
+        'ports': str(ports['eth1']) + ',' + str(ports['eth2_bn'])
+    }
 
-            retry_index = retry_index + 1
-            log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
-            time.sleep(retry_delay)
-            continue
+    requested_ports = {ports['eth1'], ports['eth2_bn']}
 
-        if response.status_code != 200:
-            log.error(f'Error code {response.status_code} when trying to get {bc_api_query_url}')
-            
-            retry_index = retry_index + 1
-            log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
-            time.sleep(retry_delay)
-            continue
-        
+    log.info('Checking for open ports...')
+
+    try:
+        response = httpclient.get(STAKEHOUSE_PORT_CHECKER_URL, params=params,
+            follow_redirects=True)
+    except httpx.RequestError as exception:
+        log.warning(f'Exception while connecting to StakeHouse Port Checker. {exception}')
+        return False
+
+    if response.status_code != 200:
+        log.warning(f'HTTP error while connecting to StakeHouse Port Checker. '
+            f'Status code {response.status_code}')
+        return False
+
+    try:
         response_json = response.json()
+    except ValueError:
+        response_json = None
+
+    if (
+        not response_json or
+        'open_ports' not in response_json or
+        type(response_json['open_ports']) is not list
+    ):
+        log.warning(f'Unexpected response from StakeHouse Port Checker. {response.text}')
+        return False
 
-        if (
-            'status' not in response_json or
-            response_json['status'] != 'OK' or
-            'data' not in response_json
-            ):
-            log.error(f'Unexpected response data or structure from {bc_api_query_url}: '
-                f'{response_json}')
-            
-            retry_index = retry_index + 1
-            log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
-            time.sleep(retry_delay)
-            continue
-        
-        keep_retrying = False
-    
-    if keep_retrying:
-        log.error(f'We failed to get the validator deposits from the beaconcha.in API after '
-            f'{retry_count} retries.')
-        time.sleep(5)
+    opened_ports = set(response_json['open_ports'])
+
+    if requested_ports != opened_ports:
+        log.warning(f'Missing open ports. Tested ports: {requested_ports}, '
+            f'Open ports: {opened_ports or "None"}')
         return False
-    
-    validator_deposits = response_json['data']
-    # beaconcha.in API does not return a list for a single validator so
-    # we make it a list for ease of use
-    if type(validator_deposits) is not list:
-        validator_deposits = [validator_deposits]
 
-    return validator_deposits
+    log.info('Open ports are configured correctly.')
+    return True
 
 def test_open_ports(ports, log):
     # Test the selected ports to make sure they are opened and exposed to the internet
@@ -1035,7 +1546,7 @@ def test_open_ports(ports, log):
     while not all_ports_opened:
         try:
             log.info('Connecting to StakeHouse Port Checker...')
-            response = httpx.get(STAKEHOUSE_PORT_CHECKER_URL, params=params,
+            response = httpclient.get(STAKEHOUSE_PORT_CHECKER_URL, params=params,
                 follow_redirects=True)
 
             if response.status_code != 200:
@@ -1197,6 +1708,9 @@ def select_keys_directory(network):
     # Prompt the user for a directory that contains keys he generated already for the selected
     # network
 
+    if is_headless():
+        return _headless_keys_directory()
+
     valid_keys_directory = False
     no_deposit_data_found = False
     entered_directory = None
@@ -1293,8 +1807,45 @@ Would you like to retry with a directory that has your deposit data file?
 
     return entered_directory
 
+def _headless_keys_directory():
+    # Use the keys directory from the answers file. Without one, we cannot import keys so we
+    # quit instead of asking again.
+    log = get_log()
+    keys_directory = get_answer(ANSWER_KEYS_DIRECTORY)
+
+    if not keys_directory:
+        log.error(f'No keys directory in answers file. Keys can only be imported when running '
+            f'headless.')
+        return False
+
+    keys_directory = Path(keys_directory).expanduser()
+    if not keys_directory.is_dir():
+        log.error(f'Keys directory from answers file {keys_directory} does not exist.')
+        return False
+
+    generated_keys = search_for_generated_keys(keys_directory)
+    if len(generated_keys['keystore_paths']) == 0:
+        log.error(f'No keystore found in keys directory {keys_directory}.')
+        return False
+
+    if generated_keys['deposit_data_path'] is None:
+        log.warning(f'No deposit data file found in keys directory {keys_directory}. Make sure '
+            f'these keystores are not used by another running validator client.')
+
+    return keys_directory
+
 def select_fee_recipient_address():
     # Prompt the user for a fee recipient address
+
+    if is_headless():
+        entered_address = str(get_answer(ANSWER_FEE_RECIPIENT) or '')
+        if not is_address(entered_address):
+            get_log().error(f'Missing or invalid fee recipient address in answers file: '
+                f'{entered_address}')
+            return ''
+        if entered_address.lower()[:2] != '0x':
+            entered_address = '0x' + entered_address
+        return entered_address
     
     valid_address = False
     entered_address = None
@@ -1384,9 +1935,12 @@ to get in touch with the ethstaker community on:
         ]
     ).run()
 
-def show_public_keys(network, public_keys, log):
+def show_public_keys(network, public_keys, log, step_metrics=None):
     beaconcha_in_url = BEACONCHA_IN_URLS[network]
 
+    if step_metrics is not None:
+        log.info(format_step_metrics(step_metrics))
+
     newline = '\n'
 
     log.info(
@@ -1418,30 +1972,19 @@ def get_geth_running_version(log):
 
     log.info('Getting Geth running version...')
 
-    local_geth_jsonrpc_url = 'http://127.0.0.1:8545'
-    request_json = {
-        'jsonrpc': '2.0',
-        'method': 'web3_clientVersion',
-        'id': 67
-    }
-    headers = {
-        'Content-Type': 'application/json'
-    }
     try:
-        response = httpx.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
+        response, response_json = gethrpc.call('web3_clientVersion')
     except httpx.RequestError as exception:
         log.error(f'Cannot connect to Geth. Exception: {exception}')
         return UNKNOWN_VALUE
 
     if response.status_code != 200:
-        log.error(f'Unexpected status code from {local_geth_jsonrpc_url}. Status code: '
+        log.error(f'Unexpected status code from {LOCAL_GETH_JSONRPC_URL}. Status code: '
             f'{response.status_code}')
         return UNKNOWN_VALUE
-    
-    response_json = response.json()
 
-    if 'result' not in response_json:
-        log.error(f'Unexpected JSON response from {local_geth_jsonrpc_url}. result not found.')
+    if response_json is None or 'result' not in response_json:
+        log.error(f'Unexpected JSON response from {LOCAL_GETH_JSONRPC_URL}. result not found.')
         return UNKNOWN_VALUE
     
     version_agent = response_json['result']
@@ -1464,11 +2007,8 @@ def get_geth_latest_version(log):
 
     log.info('Getting Geth latest version...')
 
-    geth_gh_release_url = GITHUB_REST_API_URL + GETH_LATEST_RELEASE
-    headers = {'Accept': GITHUB_API_VERSION}
     try:
-        response = httpx.get(geth_gh_release_url, headers=headers,
-            follow_redirects=True)
+        response = get_github_release(GETH_LATEST_RELEASE, log)
     except httpx.RequestError as exception:
         log.error(f'Exception while getting the latest stable version for Geth. {exception}')
         return UNKNOWN_VALUE
@@ -1,9 +1,9 @@
 import sys
-import json
 import subprocess
 import re
 import os
 import stat
+import threading
 
 import logging
 import logging.handlers
@@ -14,34 +14,28 @@ from secrets import token_hex
 
 from typing import Optional
 
-from ethwizard import __version__
+from ethwizard import __version__, httpclient
+
+from ethwizard.statestore import get_state_store
 
 from ethwizard.constants import (
     LINUX_SAVE_DIRECTORY,
-    STATE_FILE,
     LINUX_JWT_TOKEN_DIRECTORY,
     LINUX_JWT_TOKEN_FILE_PATH
 )
 
 log = logging.getLogger(__name__)
 
-def save_state(step_id: str, context: dict) -> bool:
-    # Save wizard state
-
-    data_to_save = {
-        'step': step_id,
-        'context': context
-    }
+# APT and dpkg hold a lock while they run. Installation steps that run concurrently take turns
+# with this lock instead of failing on the dpkg lock.
+apt_lock = threading.Lock()
 
-    save_directory = Path(LINUX_SAVE_DIRECTORY)
-    if not save_directory.is_dir():
-        save_directory.mkdir(parents=True, exist_ok=True)
-    save_file = save_directory.joinpath(STATE_FILE)
+jwt_token_lock = threading.Lock()
 
-    with open(str(save_file), 'w', encoding='utf8') as output_file:
-        json.dump(data_to_save, output_file)
+def save_state(step_id: str, context: dict) -> bool:
+    # Save wizard state
 
-    return True
+    return get_state_store(LINUX_SAVE_DIRECTORY).save(step_id, context)
 
 def load_state() -> Optional[dict]:
     # Load wizard state
@@ -49,21 +43,13 @@ def load_state() -> Optional[dict]:
     save_directory = Path(LINUX_SAVE_DIRECTORY)
     if not save_directory.is_dir():
         return None
-    save_file = save_directory.joinpath(STATE_FILE)
-    if not save_file.is_file():
-        return None
-    
-    loaded_data = None
 
-    try:
-        with open(str(save_file), 'r', encoding='utf8') as input_file:
-            loaded_data = json.load(input_file)
-    except ValueError:
-        return None
-    
-    return loaded_data
+    return get_state_store(save_directory).load()
 
 def quit_app():
+    log.info(httpclient.format_stats())
+    httpclient.close_clients()
+
     log.info(f'Quitting eth-wizard')
     quit()
 
@@ -159,20 +145,23 @@ def setup_jwt_token_file():
     create_jwt_token = False
     jwt_token_path = Path(LINUX_JWT_TOKEN_FILE_PATH)
 
-    if not jwt_token_path.is_file():
-        create_jwt_token = True
-    
-    if create_jwt_token:
-        jwt_token_directory = Path(LINUX_JWT_TOKEN_DIRECTORY)
-        jwt_token_directory.mkdir(parents=True, exist_ok=True)
+    # The execution and consensus clients are installed concurrently. They must both end up
+    # with the same token.
+    with jwt_token_lock:
+        if not jwt_token_path.is_file():
+            create_jwt_token = True
+        
+        if create_jwt_token:
+            jwt_token_directory = Path(LINUX_JWT_TOKEN_DIRECTORY)
+            jwt_token_directory.mkdir(parents=True, exist_ok=True)
 
-        with open(LINUX_JWT_TOKEN_FILE_PATH, 'w') as jwt_token_file:
-            jwt_token_file.write(token_hex(32))
+            with open(LINUX_JWT_TOKEN_FILE_PATH, 'w') as jwt_token_file:
+                jwt_token_file.write(token_hex(32))
 
-        # Make the file readable for everyone
-        st = os.stat(LINUX_JWT_TOKEN_FILE_PATH)
-        os.chmod(LINUX_JWT_TOKEN_FILE_PATH,
-            st.st_mode | stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            # Make the file readable for everyone
+            st = os.stat(LINUX_JWT_TOKEN_FILE_PATH)
+            os.chmod(LINUX_JWT_TOKEN_FILE_PATH,
+                st.st_mode | stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
 
     return True
 
@@ -1,20 +1,49 @@
 import os
 import subprocess
-import httpx
-import hashlib
 import shutil
 import time
-import humanize
 import stat
 import json
 import re
+import threading
 
 from datetime import timedelta
 
+from html import escape
+
 from pathlib import Path
 
 from packaging.version import parse as parse_version
 
+from ethwizard import httpclient, gethrpc
+
+from ethwizard.lazyimport import lazy_import
+
+from ethwizard.releasecache import get_github_release
+
+from ethwizard.artifacts import download_artifact
+from ethwizard.pgp import import_public_key, SignatureVerifier
+from ethwizard.extract import StreamingTarExtractor
+from ethwizard.depositdata import read_deposit_public_keys
+from ethwizard.keystoreindex import get_keystore_public_keys
+from ethwizard.diskbench import (
+    DiskBenchmarkResult,
+    run_disk_benchmark,
+    load_disk_benchmark_results,
+    save_disk_benchmark_result,
+    format_disk_benchmark_details
+)
+
+from ethwizard.beaconwatch import BeaconNodeWatcher
+
+from ethwizard.headless import (
+    button_dialog,
+    radiolist_dialog,
+    input_dialog,
+    is_headless,
+    get_answer
+)
+
 from ethwizard.constants import *
 
 from ethwizard.platforms.common import (
@@ -23,28 +52,37 @@ from ethwizard.platforms.common import (
     select_eth1_fallbacks,
     select_consensus_checkpoint_provider,
     progress_log_dialog,
+    ProgressLog,
+    Probe,
+    run_probes,
     search_for_generated_keys,
     select_keys_directory,
     select_fee_recipient_address,
     get_bc_validator_deposits,
     test_open_ports,
+    check_open_ports,
     show_whats_next,
     show_public_keys,
     Step,
     test_context_variable
 )
 
+from ethwizard.platforms.ubuntu.journal import JournalFollower
+
 from ethwizard.platforms.ubuntu.common import (
     log,
     quit_app,
     get_systemd_service_details,
     is_package_installed,
     is_adx_supported,
-    setup_jwt_token_file
+    setup_jwt_token_file,
+    apt_lock
 )
 
 from prompt_toolkit.formatted_text import HTML
-from prompt_toolkit.shortcuts import button_dialog, radiolist_dialog, input_dialog
+
+httpx = lazy_import('httpx')
+humanize = lazy_import('humanize')
 
 def installation_steps():
 
@@ -75,36 +113,22 @@ def installation_steps():
             quit_app()
 
         if context[want_to_test] == 1:
-            if not context.get(disk_size_tested, False):
-                if not test_disk_size(context[selected_network]):
-                    # User asked to quit
-                    quit_app()
-                
-                context[disk_size_tested] = True
-                step_sequence.save_state(step.step_id, context)
+            system_tests = [
+                test for test in (
+                    disk_size_tested,
+                    disk_speed_tested,
+                    available_ram_tested,
+                    internet_speed_tested)
+                if not context.get(test, False)
+            ]
 
-            if not context.get(disk_speed_tested, False):
-                if not test_disk_speed():
+            if len(system_tests) > 0:
+                if not run_system_tests(context[selected_network], system_tests):
                     # User asked to quit
                     quit_app()
-                
-                context[disk_speed_tested] = True
-                step_sequence.save_state(step.step_id, context)
-            
-            if not context.get(available_ram_tested, False):
-                if not test_available_ram():
-                    # User asked to quit
-                    quit_app()
-                
-                context[available_ram_tested] = True
-                step_sequence.save_state(step.step_id, context)
 
-            if not context.get(internet_speed_tested, False):
-                if not test_internet_speed():
-                    # User asked to quit
-                    quit_app()
-                
-                context[internet_speed_tested] = True
+                for test in system_tests:
+                    context[test] = True
                 step_sequence.save_state(step.step_id, context)
         
         return context
@@ -164,21 +188,47 @@ def installation_steps():
         exc_function=select_custom_ports_function
     )
 
+    def plan_geth_install_function(step, context, step_sequence):
+        # Context variables
+        geth_install_plan = CTX_GETH_INSTALL_PLAN
+
+        if geth_install_plan not in context:
+            context[geth_install_plan] = plan_geth_install()
+            step_sequence.save_state(step.step_id, context)
+
+        if not context[geth_install_plan]:
+            # User asked to quit
+            del context[geth_install_plan]
+            step_sequence.save_state(step.step_id, context)
+
+            quit_app()
+
+        return context
+
+    plan_geth_install_step = Step(
+        step_id=PLAN_GETH_INSTALL_STEP_ID,
+        display_name='Geth installation options',
+        exc_function=plan_geth_install_function
+    )
+
     def install_geth_function(step, context, step_sequence):
         # Context variables
         selected_network = CTX_SELECTED_NETWORK
         selected_ports = CTX_SELECTED_PORTS
+        geth_install_plan = CTX_GETH_INSTALL_PLAN
         selected_execution_client = CTX_SELECTED_EXECUTION_CLIENT
 
         if not (
             test_context_variable(context, selected_network, log) and
-            test_context_variable(context, selected_ports, log)
+            test_context_variable(context, selected_ports, log) and
+            test_context_variable(context, geth_install_plan, log)
             ):
             # We are missing context variables, we cannot continue
             quit_app()
 
-        if not install_geth(context[selected_network], context[selected_ports]):
-            # User asked to quit or error
+        if not install_geth(context[selected_network], context[selected_ports],
+            context[geth_install_plan]):
+            # Error
             quit_app()
         
         context[selected_execution_client] = EXECUTION_CLIENT_GETH
@@ -188,7 +238,32 @@ def installation_steps():
     install_geth_step = Step(
         step_id=INSTALL_GETH_STEP_ID,
         display_name='Geth installation',
-        exc_function=install_geth_function
+        exc_function=install_geth_function,
+        reads=[CTX_SELECTED_NETWORK, CTX_SELECTED_PORTS, CTX_GETH_INSTALL_PLAN],
+        writes=[CTX_SELECTED_EXECUTION_CLIENT],
+        interactive=False
+    )
+
+    def verify_geth_function(step, context, step_sequence):
+        # Context variables
+        geth_install_plan = CTX_GETH_INSTALL_PLAN
+
+        if not (
+            test_context_variable(context, geth_install_plan, log)
+            ):
+            # We are missing context variables, we cannot continue
+            quit_app()
+
+        if not verify_geth(context[geth_install_plan]):
+            # User asked to quit or error
+            quit_app()
+
+        return context
+
+    verify_geth_step = Step(
+        step_id=VERIFY_GETH_STEP_ID,
+        display_name='Geth verification',
+        exc_function=verify_geth_function
     )
 
     def detect_merge_ready_function(step, context, step_sequence):
@@ -217,7 +292,10 @@ def installation_steps():
     detect_merge_ready_step = Step(
         step_id=DETECT_MERGE_READY_STEP_ID,
         display_name='Detect merge ready network',
-        exc_function=detect_merge_ready_function
+        exc_function=detect_merge_ready_function,
+        reads=[CTX_SELECTED_NETWORK],
+        writes=[CTX_MERGE_READY_NETWORK],
+        interactive=False
     )
 
     def select_eth1_fallbacks_function(step, context, step_sequence):
@@ -290,26 +368,52 @@ def installation_steps():
         exc_function=select_consensus_checkpoint_url_function
     )
 
+    def plan_lighthouse_install_function(step, context, step_sequence):
+        # Context variables
+        lighthouse_install_plan = CTX_LIGHTHOUSE_INSTALL_PLAN
+
+        if lighthouse_install_plan not in context:
+            context[lighthouse_install_plan] = plan_lighthouse_install()
+            step_sequence.save_state(step.step_id, context)
+
+        if not context[lighthouse_install_plan]:
+            # User asked to quit
+            del context[lighthouse_install_plan]
+            step_sequence.save_state(step.step_id, context)
+
+            quit_app()
+
+        return context
+
+    plan_lighthouse_install_step = Step(
+        step_id=PLAN_LIGHTHOUSE_INSTALL_STEP_ID,
+        display_name='Lighthouse installation options',
+        exc_function=plan_lighthouse_install_function
+    )
+
     def install_lighthouse_function(step, context, step_sequence):
         # Context variables
         selected_network = CTX_SELECTED_NETWORK
         selected_ports = CTX_SELECTED_PORTS
         selected_eth1_fallbacks = CTX_SELECTED_ETH1_FALLBACKS
         selected_consensus_checkpoint_url = CTX_SELECTED_CONSENSUS_CHECKPOINT_URL
+        lighthouse_install_plan = CTX_LIGHTHOUSE_INSTALL_PLAN
         selected_consensus_client = CTX_SELECTED_CONSENSUS_CLIENT
 
         if not (
             test_context_variable(context, selected_network, log) and
             test_context_variable(context, selected_ports, log) and
             test_context_variable(context, selected_eth1_fallbacks, log) and
-            test_context_variable(context, selected_consensus_checkpoint_url, log)
+            test_context_variable(context, selected_consensus_checkpoint_url, log) and
+            test_context_variable(context, lighthouse_install_plan, log)
             ):
             # We are missing context variables, we cannot continue
             quit_app()
         
         if not install_lighthouse(context[selected_network], context[selected_eth1_fallbacks],
-            context[selected_consensus_checkpoint_url], context[selected_ports]):
-            # User asked to quit or error
+            context[selected_consensus_checkpoint_url], context[selected_ports],
+            context[lighthouse_install_plan]):
+            # Error
             quit_app()
         
         context[selected_consensus_client] = CONSENSUS_CLIENT_LIGHTHOUSE
@@ -319,12 +423,39 @@ def installation_steps():
     install_lighthouse_step = Step(
         step_id=INSTALL_LIGHTHOUSE_STEP_ID,
         display_name='Lighthouse installation',
-        exc_function=install_lighthouse_function
+        exc_function=install_lighthouse_function,
+        reads=[CTX_SELECTED_NETWORK, CTX_SELECTED_PORTS, CTX_SELECTED_ETH1_FALLBACKS,
+            CTX_SELECTED_CONSENSUS_CHECKPOINT_URL, CTX_LIGHTHOUSE_INSTALL_PLAN],
+        writes=[CTX_SELECTED_CONSENSUS_CLIENT],
+        interactive=False
+    )
+
+    def verify_lighthouse_function(step, context, step_sequence):
+        # Context variables
+        lighthouse_install_plan = CTX_LIGHTHOUSE_INSTALL_PLAN
+
+        if not (
+            test_context_variable(context, lighthouse_install_plan, log)
+            ):
+            # We are missing context variables, we cannot continue
+            quit_app()
+
+        if not verify_lighthouse(context[lighthouse_install_plan]):
+            # User asked to quit or error
+            quit_app()
+
+        return context
+
+    verify_lighthouse_step = Step(
+        step_id=VERIFY_LIGHTHOUSE_STEP_ID,
+        display_name='Lighthouse verification',
+        exc_function=verify_lighthouse_function
     )
 
     def test_open_ports_function(step, context, step_sequence):
         # Context variables
         selected_ports = CTX_SELECTED_PORTS
+        open_ports_confirmed = CTX_OPEN_PORTS_CONFIRMED
 
         if not (
             test_context_variable(context, selected_ports, log)
@@ -332,16 +463,46 @@ def installation_steps():
             # We are missing context variables, we cannot continue
             quit_app()
         
-        if not test_open_ports(context[selected_ports], log):
-            # User asked to quit or error
-            quit_app()
+        context[open_ports_confirmed] = check_open_ports(context[selected_ports], log)
 
         return context
 
+    # The ports can only be seen as opened once the clients are listening on them
     test_open_ports_step = Step(
         step_id=TEST_OPEN_PORTS_STEP_ID,
         display_name='Testing open ports',
-        exc_function=test_open_ports_function
+        exc_function=test_open_ports_function,
+        reads=[CTX_SELECTED_PORTS],
+        writes=[CTX_OPEN_PORTS_CONFIRMED],
+        depends_on=[INSTALL_GETH_STEP_ID, INSTALL_LIGHTHOUSE_STEP_ID],
+        interactive=False
+    )
+
+    def confirm_open_ports_function(step, context, step_sequence):
+        # Context variables
+        selected_ports = CTX_SELECTED_PORTS
+        open_ports_confirmed = CTX_OPEN_PORTS_CONFIRMED
+
+        if not (
+            test_context_variable(context, selected_ports, log)
+            ):
+            # We are missing context variables, we cannot continue
+            quit_app()
+
+        if context.get(open_ports_confirmed, False):
+            return context
+
+        # Let the user fix their open ports and retry
+        if not test_open_ports(context[selected_ports], log):
+            # User asked to quit or error
+            quit_app()
+
+        return context
+
+    confirm_open_ports_step = Step(
+        step_id=CONFIRM_OPEN_PORTS_STEP_ID,
+        display_name='Confirming open ports',
+        exc_function=confirm_open_ports_function
     )
 
     def obtain_keys_function(step, context, step_sequence):
@@ -441,9 +602,41 @@ def installation_steps():
         exc_function=install_lighthouse_validator_function
     )
 
+    def plan_chrony_install_function(step, context, step_sequence):
+        # Context variables
+        chrony_install_plan = CTX_CHRONY_INSTALL_PLAN
+
+        if chrony_install_plan not in context:
+            context[chrony_install_plan] = plan_chrony_install()
+            step_sequence.save_state(step.step_id, context)
+
+        if not context[chrony_install_plan]:
+            # User asked to quit
+            del context[chrony_install_plan]
+            step_sequence.save_state(step.step_id, context)
+
+            quit_app()
+
+        return context
+
+    plan_chrony_install_step = Step(
+        step_id=PLAN_CHRONY_INSTALL_STEP_ID,
+        display_name='Improve time synchronization',
+        exc_function=plan_chrony_install_function
+    )
+
     def install_chrony_function(step, context, step_sequence):
-        if not install_chrony():
-            # User asked to quit or error
+        # Context variables
+        chrony_install_plan = CTX_CHRONY_INSTALL_PLAN
+
+        if not (
+            test_context_variable(context, chrony_install_plan, log)
+            ):
+            # We are missing context variables, we cannot continue
+            quit_app()
+
+        if not install_chrony(context[chrony_install_plan]):
+            # Error
             quit_app()
 
         return context
@@ -451,7 +644,10 @@ def installation_steps():
     install_chrony_step = Step(
         step_id=INSTALL_CHRONY_STEP_ID,
         display_name='Install chrony',
-        exc_function=install_chrony_function
+        exc_function=install_chrony_function,
+        reads=[CTX_CHRONY_INSTALL_PLAN],
+        writes=[],
+        interactive=False
     )
 
     def initiate_deposit_function(step, context, step_sequence):
@@ -512,7 +708,8 @@ def installation_steps():
             # We are missing context variables, we cannot continue
             quit_app()
         
-        show_public_keys(context[selected_network], context[public_keys], log)
+        show_public_keys(context[selected_network], context[public_keys], log,
+            context.get(CTX_STEP_METRICS))
 
         return context
     
@@ -522,6 +719,9 @@ def installation_steps():
         exc_function=show_public_keys_function
     )
 
+    # All the questions about the client installations are asked first. The installations
+    # themselves do not show any dialog so they run concurrently. Their results are verified
+    # with dialogs once they are all done.
     return [
         select_network_step,
         test_system_step,
@@ -529,13 +729,19 @@ def installation_steps():
         detect_merge_ready_step,
         select_consensus_checkpoint_url_step,
         select_eth1_fallbacks_step,
+        plan_lighthouse_install_step,
+        plan_geth_install_step,
+        plan_chrony_install_step,
         install_lighthouse_step,
         install_geth_step,
+        install_chrony_step,
         test_open_ports_step,
+        verify_geth_step,
+        verify_lighthouse_step,
+        confirm_open_ports_step,
         obtain_keys_step,
         select_fee_recipient_address_step,
         install_lighthouse_validator_step,
-        install_chrony_step,
         # TODO: Monitoring setup
         initiate_deposit_step,
         show_whats_next_step,
@@ -568,61 +774,220 @@ Do you want to test your system?
 
     return result
 
-def test_disk_size(network):
-    # Test disk size
+def run_system_tests(network, tests):
+    # Run the system tests in tests, a list of CTX_*_TESTED names, and show a single report.
+    # Disk size and memory size are instant. Disk speed and internet speed do not compete for
+    # the same resource so they run at the same time.
 
-    log.info('Running df to test disk size...')
-    process_result = subprocess.run([
-        'df', '-h', '--output=avail', '-B1MB', '/var/lib'
-        ], capture_output=True, text=True)
-    
-    if process_result.returncode != 0:
-        log.error(f'Unable to test disk size. Return code {process_result.returncode}.\n'
-            f'StdOut: {process_result.stdout}\nStdErr: {process_result.stderr}')
-        return False
-    
-    process_output = process_result.stdout
-    result = re.search(r'(\d+)', process_output)
-    available_space_gb = None
-    if result:
-        available_space_gb = int(result.group(1)) / 1000.0
+    use_fio = os.getenv(DISK_BENCHMARK_ENGINE_ENV, '').strip().lower() == 'fio'
+
+    tests_stopped = threading.Event()
+
+    def testing_callback(set_percentage, log_text, change_status, set_result, get_exited):
+        try:
+            return run_tests(set_percentage, log_text, change_status, get_exited)
+        finally:
+            tests_stopped.set()
+
+    def run_tests(set_percentage, log_text, change_status, get_exited):
+        progress_log = ProgressLog(log_text)
+        progress_lock = threading.Lock()
+        results = {}
+
+        running = [test for test in tests if not (test == CTX_DISK_SPEED_TESTED and use_fio)]
+        total = len(running)
+
+        def test_done(test):
+            with progress_lock:
+                running.remove(test)
+                set_percentage(round((total - len(running)) / total * 100.0))
+                if len(running) > 0:
+                    change_status('Running: ' + ', '.join(SYSTEM_TEST_LABEL[name] for name in running))
+                else:
+                    change_status('Done')
+
+        def tracked(test, function):
+            def run():
+                try:
+                    return function()
+                finally:
+                    test_done(test)
+            return run
+
+        if total == 0:
+            return results
+
+        change_status('Running: ' + ', '.join(SYSTEM_TEST_LABEL[name] for name in running))
+
+        if CTX_DISK_SIZE_TESTED in running:
+            results[CTX_DISK_SIZE_TESTED] = tracked(CTX_DISK_SIZE_TESTED,
+                lambda: measure_disk_size(progress_log))()
+        if CTX_AVAILABLE_RAM_TESTED in running:
+            results[CTX_AVAILABLE_RAM_TESTED] = tracked(CTX_AVAILABLE_RAM_TESTED,
+                lambda: measure_available_ram(progress_log))()
+
+        probes = []
+        if CTX_DISK_SPEED_TESTED in running:
+            probes.append(Probe(CTX_DISK_SPEED_TESTED, tracked(CTX_DISK_SPEED_TESTED,
+                lambda: run_disk_benchmark(LINUX_SAVE_DIRECTORY, progress_log,
+                    is_cancelled=get_exited)),
+                default=None, timeout=SYSTEM_TEST_TIMEOUT))
+        if CTX_INTERNET_SPEED_TESTED in running:
+            probes.append(Probe(CTX_INTERNET_SPEED_TESTED, tracked(CTX_INTERNET_SPEED_TESTED,
+                lambda: measure_internet_speed(progress_log, is_cancelled=get_exited)),
+                default=None, timeout=SYSTEM_TEST_TIMEOUT))
+
+        results.update(run_probes(probes, progress_log))
+
+        return results
+
+    results = progress_log_dialog(
+        title='Testing your system',
+        text=(
+'''
+We are testing your system to make sure it is fit for being a validator.
+This can take a few minutes.
+'''     ),
+        status_text='Starting the tests...',
+        run_callback=testing_callback
+    ).run()
 
-    if available_space_gb is None:
-        log.error(f'Unable to test disk size. Unexpected output from df command. '
-            f'Output: {process_output}')
+    if results is None:
+        # The tests stop on their own once the dialog is gone. Wait for them so the disk
+        # benchmark test file is removed before we quit.
+        log.warning('System tests were cancelled. Waiting for the running tests to stop...')
+        tests_stopped.wait(SYSTEM_TEST_TIMEOUT)
         return False
 
-    if not available_space_gb >= MIN_AVAILABLE_DISK_SPACE_GB[network]:
-        result = button_dialog(
-            title=HTML('Disk size test <style bg="red" fg="black">failed</style>'),
-            text=(HTML(
+    skipped = []
+
+    if CTX_DISK_SPEED_TESTED in tests:
+        disk_speed = results.get(CTX_DISK_SPEED_TESTED)
+
+        if disk_speed is None and not use_fio:
+            choice = button_dialog(
+                title='Disk speed test unavailable',
+                text=(
 f'''
-Your available space results seem to indicate that <style bg="red" fg="black">your disk size is
-<b>smaller than</b> what would be required</style> to be a fully working validator. Here are
-your results:
+We could not run our disk speed test on your system. You can install fio
+and use it to test your disk speed instead. It will write a 4 GB test file
+in {Path(Path.home(), 'ethwizard', 'fio')} and it can take a few minutes.
 
-* Available space in /var/lib: {available_space_gb:.1f}GB (>= {MIN_AVAILABLE_DISK_SPACE_GB[network]:.1f}GB for {NETWORK_LABEL[network]})
+Do you want to test your disk speed with fio?
+'''             ),
+                buttons=[
+                    ('Use fio', 1),
+                    ('Skip', 2),
+                    ('Quit', False)
+                ]
+            ).run()
 
-It might still be possible to be a validator but you should consider a
-larger disk for your system.
-'''         )),
-            buttons=[
-                ('Keep going', True),
-                ('Quit', False)
-            ]
-        ).run()
+            if not choice:
+                return choice
+            if choice == 2:
+                skipped.append(CTX_DISK_SPEED_TESTED)
+            else:
+                use_fio = True
 
-        return result
+        if disk_speed is None and use_fio:
+            disk_speed = run_fio_disk_benchmark()
 
-    result = button_dialog(
-        title=HTML('Disk size test <style bg="green" fg="white">passed</style>'),
-        text=(HTML(
+        if disk_speed is not None:
+            previous_results = load_disk_benchmark_results(LINUX_SAVE_DIRECTORY)
+            results['previous_disk_speed'] = (
+                previous_results[-1] if len(previous_results) > 0 else None)
+            save_disk_benchmark_result(LINUX_SAVE_DIRECTORY, disk_speed, log)
+
+        results[CTX_DISK_SPEED_TESTED] = disk_speed
+
+    return show_system_test_report(network, tests, results, skipped)
+
+def show_system_test_report(network, tests, results, skipped):
+    # Show the results of all the system tests in a single dialog
+
+    status_labels = {
+        'passed': '<style bg="green" fg="white">passed</style>',
+        'failed': '<style bg="red" fg="black">failed</style>',
+        'error': '<style bg="red" fg="black">could not complete</style>',
+        'skipped': 'skipped'
+    }
+
+    sections = []
+    any_failed = False
+    any_error = False
+
+    for test in tests:
+        result = results.get(test)
+        lines = []
+
+        if test in skipped:
+            status = 'skipped'
+        elif result is None:
+            status = 'error'
+        elif test == CTX_DISK_SIZE_TESTED:
+            passed = result >= MIN_AVAILABLE_DISK_SPACE_GB[network]
+            status = 'passed' if passed else 'failed'
+            lines.append(f'* Available space in /var/lib: {result:.1f}GB (>= {MIN_AVAILABLE_DISK_SPACE_GB[network]:.1f}GB for {NETWORK_LABEL[network]})')
+        elif test == CTX_DISK_SPEED_TESTED:
+            k_read_iops = result.read_iops / 1000.0
+            k_write_iops = result.write_iops / 1000.0
+            passed = (
+                k_read_iops >= MIN_SUSTAINED_K_READ_IOPS and
+                k_write_iops >= MIN_SUSTAINED_K_WRITE_IOPS)
+            status = 'passed' if passed else 'failed'
+            lines.append(f'* Read speed: {k_read_iops:.1f}K read IOPS (>= {MIN_SUSTAINED_K_READ_IOPS:.1f}K sustained read IOPS)')
+            lines.append(f'* Write speed: {k_write_iops:.1f}K write IOPS (>= {MIN_SUSTAINED_K_WRITE_IOPS:.1f}K sustained write IOPS)')
+            details = format_disk_benchmark_details(result, results.get('previous_disk_speed'))
+            if details:
+                lines.append(details)
+        elif test == CTX_AVAILABLE_RAM_TESTED:
+            passed = result >= MIN_AVAILABLE_RAM_GB
+            status = 'passed' if passed else 'failed'
+            lines.append(f'* Memory size: {result:.1f}GB of available RAM (>= {MIN_AVAILABLE_RAM_GB:.1f}GB of available RAM)')
+        elif test == CTX_INTERNET_SPEED_TESTED:
+            passed = result['down_mbs'] >= MIN_DOWN_MBS and result['up_mbs'] >= MIN_UP_MBS
+            status = 'passed' if passed else 'failed'
+            lines.append(f'* Download speed: {result["down_mbs"]:.1f}MB/s (>= {MIN_DOWN_MBS:.1f}MB/s)')
+            lines.append(f'* Upload speed: {result["up_mbs"]:.1f}MB/s (>= {MIN_UP_MBS:.1f}MB/s)')
+            lines.append(f'* Server: {escape(result["server_sponsor"])}, {escape(result["server_name"])}, {escape(result["server_country"])} ({result["server_lat"]}, {result["server_lon"]})')
+
+        if status in ('failed', 'error'):
+            any_failed = True
+        if status == 'error':
+            any_error = True
+
+        sections.append('\n'.join(
+            [f'{SYSTEM_TEST_LABEL[test]} test {status_labels[status]}'] + lines))
+
+    report = '\n\n'.join(sections)
+    if any_error:
+        report = report + '\n\nCheck the logs for the tests that could not complete.'
+
+    if any_failed:
+        title = HTML('System tests <style bg="red" fg="black">failed</style>')
+        text = (
+f'''
+Some of your results seem to indicate that <style bg="red" fg="black">your system is <b>not fit</b></style> to
+be a fully working validator. Here are your results:
+
+{report}
+
+It might still be possible to be a validator but you should consider
+improving the parts of your system that did not pass.
+'''     )
+    else:
+        title = HTML('System tests <style bg="green" fg="white">passed</style>')
+        text = (
 f'''
-Your available space results seem to indicate that <style bg="green" fg="white">your disk size is <b>large
-enough</b></style> to be a fully working validator. Here are your results:
+Your results seem to indicate that <style bg="green" fg="white">your system is <b>fit</b></style> to be a
+fully working validator. Here are your results:
 
-* Available space in /var/lib: {available_space_gb:.1f}GB (>= {MIN_AVAILABLE_DISK_SPACE_GB[network]:.1f}GB for {NETWORK_LABEL[network]})
-'''     )),
+{report}
+'''     )
+
+    result = button_dialog(
+        title=title,
+        text=HTML(text),
         buttons=[
             ('Keep going', True),
             ('Quit', False)
@@ -631,15 +996,27 @@ enough</b></style> to be a fully working validator. Here are your results:
 
     return result
 
-def test_disk_speed():
-    # Test disk speed using fio tool
+def measure_disk_size(log):
+    # Return the available space in /var/lib in GB or None
+
+    log.info('Inspecting /var/lib for available disk space...')
+    try:
+        stat_result = os.statvfs('/var/lib')
+    except OSError as exception:
+        log.error(f'Unable to test disk size. {exception}')
+        return None
+
+    return stat_result.f_bavail * stat_result.f_frsize / 1000000000.0
+
+def run_fio_disk_benchmark():
+    # Test disk speed using fio tool. Returns a DiskBenchmarkResult or None.
 
     # Install fio using APT
     fio_package_installed = False
     try:
         fio_package_installed = is_package_installed('fio')
     except Exception:
-        return False
+        return None
     
     if not fio_package_installed:
         log.info('Installing fio to test disk speed...')
@@ -661,6 +1038,8 @@ def test_disk_speed():
 
     log.info('Executing fio to test disk speed...')
 
+    started = time.monotonic()
+
     process_result = subprocess.run([
         'fio', '--randrepeat=1', '--ioengine=libaio', '--direct=1', '--gtod_reduce=1',
         '--name=test', '--filename=' + fio_target_filename, '--bs=4k', '--iodepth=64',
@@ -671,7 +1050,7 @@ def test_disk_speed():
     if process_result.returncode != 0:
         log.error(f'Error while running fio disk test. Return code {process_result.returncode}\n'
             f'StdOut: {process_result.stdout}\nStdErr: {process_result.stderr}')
-        return False
+        return None
     
     # Remove test file
     fio_target_path.unlink()
@@ -686,11 +1065,11 @@ def test_disk_speed():
 
     if results_json is None:
         log.error('Could not read the results from fio output file.')
-        return False
+        return None
     
     if 'jobs' not in results_json or type(results_json['jobs']) is not list:
         log.error('Unexpected structure from fio output file. No jobs list.')
-        return False
+        return None
     
     jobs = results_json['jobs']
 
@@ -699,7 +1078,7 @@ def test_disk_speed():
     for job in jobs:
         if 'jobname' not in job:
             log.error('Unexpected structure from fio output file. No jobname in a job.')
-            return False
+            return None
         jobname = job['jobname']
         if jobname == 'test':
             test_job = job
@@ -707,7 +1086,7 @@ def test_disk_speed():
 
     if test_job is None:
         log.error('Unable to find our test job in fio output file.')
-        return False
+        return None
     
     if not (
         'read' in test_job and
@@ -717,58 +1096,21 @@ def test_disk_speed():
         'iops' in test_job['write'] and
         type(test_job['write']['iops']) is float):
         log.error('Unexpected structure from fio output file. No read or write iops.')
-        return False
+        return None
     
-    k_read_iops = test_job['read']['iops'] / 1000.0
-    k_write_iops = test_job['write']['iops'] / 1000.0
-
-    # Test if disk speed is above minimal values
-    if not (
-        k_read_iops >= MIN_SUSTAINED_K_READ_IOPS and
-        k_write_iops >= MIN_SUSTAINED_K_WRITE_IOPS):
-
-        result = button_dialog(
-            title=HTML('Disk speed test <style bg="red" fg="black">failed</style>'),
-            text=(HTML(
-f'''
-Your disk speed results seem to indicate that <style bg="red" fg="black">your disk is <b>slower than</b>
-what would be required</style> to be a fully working validator. Here are your
-results:
-
-* Read speed: {k_read_iops:.1f}K read IOPS (>= {MIN_SUSTAINED_K_READ_IOPS:.1f}K sustained read IOPS)
-* Write speed: {k_write_iops:.1f}K write IOPS (>= {MIN_SUSTAINED_K_WRITE_IOPS:.1f}K sustained write IOPS)
-
-It might still be possible to be a validator but you should consider a
-faster disk.
-'''         )),
-            buttons=[
-                ('Keep going', True),
-                ('Quit', False)
-            ]
-        ).run()
-
-        return result
-
-    result = button_dialog(
-        title=HTML('Disk speed test <style bg="green" fg="white">passed</style>'),
-        text=(HTML(
-f'''
-Your disk speed results seem to indicate that <style bg="green" fg="white">your disk is <b>fast enough</b></style> to
-be a fully working validator. Here are your results:
-
-* Read speed: {k_read_iops:.1f}K read IOPS (>= {MIN_SUSTAINED_K_READ_IOPS:.1f}K sustained read IOPS)
-* Write speed: {k_write_iops:.1f}K write IOPS (>= {MIN_SUSTAINED_K_WRITE_IOPS:.1f}K sustained write IOPS)
-'''     )),
-        buttons=[
-            ('Keep going', True),
-            ('Quit', False)
-        ]
-    ).run()
-
-    return result
+    return DiskBenchmarkResult(
+        engine='fio',
+        directory=str(fio_path),
+        timestamp=time.time(),
+        duration=round(time.monotonic() - started, 3),
+        read_iops=round(test_job['read']['iops'], 1),
+        write_iops=round(test_job['write']['iops'], 1),
+        converged=True
+    )
 
-def test_internet_speed():
-    # Test for internet speed
+def measure_internet_speed(log, is_cancelled=lambda: False):
+    # Return the internet speed results from speedtest-cli as a dict or None. Returns None as
+    # soon as is_cancelled returns True.
 
     # Downloading speedtest script
     log.info('Downloading speedtest-cli script to test internet speed...')
@@ -779,33 +1121,52 @@ def test_internet_speed():
 
     try:
         with open(script_path, 'wb') as binary_file:
-            with httpx.stream('GET', SPEEDTEST_SCRIPT_URL, follow_redirects=True) as http_stream:
+            with httpclient.stream('GET', SPEEDTEST_SCRIPT_URL, follow_redirects=True) as http_stream:
                 if http_stream.status_code != 200:
                     log.error('HTTP error while downloading speedtest-cli script. '
                         f'Status code {http_stream.status_code}')
-                    return False
+                    return None
                 for data in http_stream.iter_bytes():
+                    if is_cancelled():
+                        break
                     binary_file.write(data)
     except httpx.RequestError as exception:
         log.error(f'Exception while downloading speedtest-cli script. {exception}')
-        return False
+        return None
+
+    if is_cancelled():
+        script_path.unlink()
+        log.info('Internet speed test cancelled.')
+        return None
     
     # Run speedtest script
     log.info('Running speedtest to test internet speed...')
 
-    process_result = subprocess.run([
+    process = subprocess.Popen([
         'python3', script_path, '--secure', '--json'
-        ], capture_output=True, text=True)
+        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    while True:
+        try:
+            process_stdout, process_stderr = process.communicate(timeout=1)
+            break
+        except subprocess.TimeoutExpired:
+            if is_cancelled():
+                process.kill()
+                process.communicate()
+                script_path.unlink()
+                log.info('Internet speed test cancelled.')
+                return None
 
     # Remove download leftovers
     script_path.unlink()
 
-    if process_result.returncode != 0:
-        log.error(f'Unable to run speedtest script. Return code {process_result.returncode}\n'
-            f'StdOut: {process_result.stdout}\nStdErr: {process_result.stderr}')
-        return False
+    if process.returncode != 0:
+        log.error(f'Unable to run speedtest script. Return code {process.returncode}\n'
+            f'StdOut: {process_stdout}\nStdErr: {process_stderr}')
+        return None
 
-    process_output = process_result.stdout
+    process_output = process_stdout
     speedtest_results = json.loads(process_output)
 
     if (
@@ -815,7 +1176,7 @@ def test_internet_speed():
         type(speedtest_results['upload']) is not float
     ):
         log.error(f'Unexpected response from speedtest. \n {speedtest_results}')
-        return False
+        return None
     
     down_mbs = speedtest_results['download'] / 1000000.0 / 8.0
     up_mbs = speedtest_results['upload'] / 1000000.0 / 8.0
@@ -833,125 +1194,46 @@ def test_internet_speed():
         server_lat = speedtest_server.get('lat', 'unknown')
         server_lon = speedtest_server.get('lon', 'unknown')
 
-    # Test if Internet speed is above minimal values
-    if not (down_mbs >= MIN_DOWN_MBS and up_mbs >= MIN_UP_MBS):
-
-        result = button_dialog(
-            title=HTML('Internet speed test <style bg="red" fg="black">failed</style>'),
-            text=(HTML(
-f'''
-Your speedtest results seem to indicate that <style bg="red" fg="black">your Internet speed is <b>slower
-than</b> what would be required</style> to be a fully working validator. Here are your
-results:
-
-* Download speed: {down_mbs:.1f}MB/s (>= {MIN_DOWN_MBS:.1f}MB/s)
-* Upload speed: {up_mbs:.1f}MB/s (>= {MIN_UP_MBS:.1f}MB/s)
-* Server sponsor: {server_sponsor}
-* Server name: {server_name}
-* Server country: {server_country}
-* Server location: {server_lat}, {server_lon}
-
-It might still be possible to be a validator but you should consider an
-improved Internet plan or a different Internet service provider.
-'''         )),
-            buttons=[
-                ('Keep going', True),
-                ('Quit', False)
-            ]
-        ).run()
-
-        return result
+    log.info(f'Internet speed: {down_mbs:.1f}MB/s down and {up_mbs:.1f}MB/s up')
 
-    result = button_dialog(
-        title=HTML('Internet speed test <style bg="green" fg="white">passed</style>'),
-        text=(HTML(
-f'''
-Your speedtest results seem to indicate that <style bg="green" fg="white">your Internet speed is <b>fast
-enough</b></style> to be a fully working validator. Here are your results:
-
-* Download speed: {down_mbs:.1f}MB/s (>= {MIN_DOWN_MBS:.1f}MB/s)
-* Upload speed: {up_mbs:.1f}MB/s (>= {MIN_UP_MBS:.1f}MB/s)
-* Server sponsor: {server_sponsor}
-* Server name: {server_name}
-* Server country: {server_country}
-* Server location: {server_lat}, {server_lon}
-'''     )),
-        buttons=[
-            ('Keep going', True),
-            ('Quit', False)
-        ]
-    ).run()
-
-    return result
+    return {
+        'down_mbs': down_mbs,
+        'up_mbs': up_mbs,
+        'server_sponsor': server_sponsor,
+        'server_name': server_name,
+        'server_country': server_country,
+        'server_lat': server_lat,
+        'server_lon': server_lon
+    }
 
-def test_available_ram():
-    # Test available RAM
+def measure_available_ram(log):
+    # Return the total RAM in GB from /proc/meminfo or None
 
     log.info('Inspecting /proc/meminfo for available RAM...')
-    process_result = subprocess.run([
-        'grep', 'MemTotal', '/proc/meminfo'
-        ], capture_output=True, text=True)
-    
-    if process_result.returncode != 0:
-        log.error(f'Unable to get available total RAM. Return code {process_result.returncode}\n'
-            f'StdOut: {process_result.stdout}\nStdErr: {process_result.stderr}')
-        return False
-    
-    process_output = process_result.stdout
-
-    total_available_ram_gb = 0.0
+    try:
+        with open('/proc/meminfo', 'r') as meminfo_file:
+            meminfo = meminfo_file.read()
+    except OSError as exception:
+        log.error(f'Unable to get available total RAM. {exception}')
+        return None
 
-    result = re.search(r'MemTotal:\s*(?P<memkb>\d+) kB', process_output)
-    if result:
-        total_available_ram_gb = int(result.group('memkb')) / 1000000.0
-    else:
+    result = re.search(r'MemTotal:\s*(?P<memkb>\d+) kB', meminfo)
+    if not result:
         log.error(f'Unable to parse the output of /proc/meminfo to get available total RAM. '
-            f'Output: {process_output}')
-        return False
-    
-    # Test if available RAM is above minimal values
-    if not total_available_ram_gb >= MIN_AVAILABLE_RAM_GB:
+            f'Output: {meminfo}')
+        return None
 
-        result = button_dialog(
-            title=HTML('Memory size test <style bg="red" fg="black">failed</style>'),
-            text=(HTML(
-f'''
-Your memory size results seem to indicate that <style bg="red" fg="black">your available RAM is <b>lower
-than</b> what would be required</style> to be a fully working validator. Here are your
-results:
+    return int(result.group('memkb')) / 1000000.0
 
-* Memory size: {total_available_ram_gb:.1f}GB of available RAM (>= {MIN_AVAILABLE_RAM_GB:.1f}GB of available RAM)
+def plan_geth_install():
+    # Ask how geth should be installed. Returns the installation plan or False if the user asked
+    # to quit. The installation itself is done by install_geth without any dialog.
 
-It might still be possible to be a validator but you should consider having
-more memory.
-'''         )),
-            buttons=[
-                ('Keep going', True),
-                ('Quit', False)
-            ]
-        ).run()
-
-        return result
-
-    result = button_dialog(
-        title=HTML('Memory size test <style bg="green" fg="white">passed</style>'),
-        text=(HTML(
-f'''
-Your memory size results seem to indicate that <style bg="green" fg="white">your available RAM is <b>large
-enough</b></style> to be a fully working validator. Here are your results:
-
-* Memory size: {total_available_ram_gb:.1f}GB of available RAM (>= {MIN_AVAILABLE_RAM_GB:.1f}GB of available RAM)
-'''     )),
-        buttons=[
-            ('Keep going', True),
-            ('Quit', False)
-        ]
-    ).run()
-
-    return result
-
-def install_geth(network, ports):
-    # Install geth for the selected network
+    plan = {
+        'skip': False,
+        'install_binary': True,
+        'remove_datadir': False
+    }
 
     # Check for existing systemd service
     geth_service_exists = False
@@ -990,11 +1272,8 @@ Do you want to skip installing geth and its service?
             return result
         
         if result == 1:
-            return True
-        
-        # User wants to proceed, make sure the geth service is stopped first
-        subprocess.run([
-            'systemctl', 'stop', geth_service_name])
+            plan['skip'] = True
+            return plan
 
     result = button_dialog(
         title='Geth installation',
@@ -1021,7 +1300,7 @@ properly.
 
     if not result:
         return result
-    
+
     # Check if geth is already installed
     geth_found = False
     geth_package_installed = False
@@ -1072,8 +1351,6 @@ properly.
     except FileNotFoundError:
         pass
     
-    install_geth_binary = True
-
     if geth_found:
         result = button_dialog(
             title='Geth binary found',
@@ -1099,43 +1376,8 @@ Do you want to skip installing the geth binary?
         if not result:
             return result
         
-        install_geth_binary = (result == 2)
+        plan['install_binary'] = (result == 2)
 
-    if install_geth_binary:
-        # Install Geth from PPA
-        spc_package_installed = False
-        try:
-            spc_package_installed = is_package_installed('software-properties-common')
-        except Exception:
-            return False
-        
-        if not spc_package_installed:
-            subprocess.run([
-                'apt', '-y', 'update'])
-            subprocess.run([
-                'apt', '-y', 'install', 'software-properties-common'])
-
-        subprocess.run([
-            'add-apt-repository', '-y', 'ppa:ethereum/ethereum'])
-        subprocess.run([
-            'apt', '-y', 'update'])
-        subprocess.run([
-            'apt', '-y', 'install', 'geth'])
-        
-        # Get Geth version
-        try:
-            process_result = subprocess.run([
-                'geth', 'version'
-                ], capture_output=True, text=True)
-            geth_found = True
-
-            process_output = process_result.stdout
-            result = re.search(r'Version: (.*?)\n', process_output)
-            if result:
-                geth_version = result.group(1).strip()
-        except FileNotFoundError:
-            pass
-    
     # Check if Geth user or directory already exists
     geth_datadir = Path('/var/lib/goethereum')
     if geth_datadir.is_dir():
@@ -1168,8 +1410,67 @@ Do you want to remove this directory first and start from nothing?
         if not result:
             return result
         
-        if result == 1:
-            shutil.rmtree(geth_datadir)
+        plan['remove_datadir'] = (result == 1)
+
+    return plan
+
+def install_geth(network, ports, plan):
+    # Install geth for the selected network following the installation plan. Nothing here shows
+    # a dialog since it runs concurrently with the other installation steps.
+
+    geth_service_name = GETH_SYSTEMD_SERVICE_NAME
+
+    if plan['skip']:
+        return True
+
+    # Make sure an existing geth service is stopped first
+    service_details = get_systemd_service_details(geth_service_name)
+
+    if service_details['LoadState'] == 'loaded':
+        subprocess.run([
+            'systemctl', 'stop', geth_service_name])
+
+    if plan['install_binary']:
+        # Install Geth from PPA
+        with apt_lock:
+            spc_package_installed = False
+            try:
+                spc_package_installed = is_package_installed('software-properties-common')
+            except Exception:
+                return False
+            
+            if not spc_package_installed:
+                subprocess.run([
+                    'apt', '-y', 'update'])
+                subprocess.run([
+                    'apt', '-y', 'install', 'software-properties-common'])
+
+            subprocess.run([
+                'add-apt-repository', '-y', 'ppa:ethereum/ethereum'])
+            subprocess.run([
+                'apt', '-y', 'update'])
+            subprocess.run([
+                'apt', '-y', 'install', 'geth'])
+    
+    # Get Geth version
+    geth_version = 'unknown'
+    try:
+        process_result = subprocess.run([
+            'geth', 'version'
+            ], capture_output=True, text=True)
+
+        process_output = process_result.stdout
+        result = re.search(r'Version: (.*?)\n', process_output)
+        if result:
+            geth_version = result.group(1).strip()
+    except FileNotFoundError:
+        log.error('We could not find the geth binary after its installation.')
+        return False
+
+    # Remove the existing Geth data directory if asked
+    geth_datadir = Path('/var/lib/goethereum')
+    if plan['remove_datadir'] and geth_datadir.is_dir():
+        shutil.rmtree(geth_datadir)
 
     geth_user_exists = False
     process_result = subprocess.run([
@@ -1234,6 +1535,16 @@ Unable to create JWT token file in {LINUX_JWT_TOKEN_FILE_PATH}
     log.info(f'We are giving Geth {delay} seconds to start before testing it.')
     time.sleep(delay)
 
+    return True
+
+def verify_geth(plan):
+    # Verify that the geth service installed by install_geth is running and syncing
+
+    geth_service_name = GETH_SYSTEMD_SERVICE_NAME
+
+    if plan['skip']:
+        return True
+
     # Verify proper Geth service installation
     service_details = get_systemd_service_details(geth_service_name)
 
@@ -1288,7 +1599,7 @@ $ sudo journalctl -ru {geth_service_name}
         'Content-Type': 'application/json'
     }
     try:
-        response = httpx.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
+        response = httpclient.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
     except httpx.RequestError as exception:
         result = button_dialog(
             title='Cannot connect to Geth',
@@ -1380,93 +1691,26 @@ $ sudo journalctl -ru {geth_service_name}
 
         set_percentage(10)
 
-        journalctl_cursor = None
-
-        while True:
-
-            if get_exited():
-                return {
-                    'exe_is_working': exe_is_working,
-                    'exe_is_syncing': exe_is_syncing,
-                    'exe_starting_block': exe_starting_block,
-                    'exe_current_block': exe_current_block,
-                    'exe_highest_block': exe_highest_block,
-                    'exe_connected_peers': exe_connected_peers
-                }
-
-            # Output logs
-            command = []
-            first_display = True
-            if journalctl_cursor is None:
-                command = ['journalctl', '--no-pager', '--show-cursor', '-q', '-n', '25',
-                    '-o', 'cat', '-u', geth_service_name]
-            else:
-                command = ['journalctl', '--no-pager', '--show-cursor', '-q',
-                    '-o', 'cat', '--after-cursor=' + journalctl_cursor, '-u', geth_service_name]
-                first_display = False
-
-            process_result = subprocess.run(command, capture_output=True, text=True)
-
-            process_output = ''
-            if process_result.returncode == 0:
-                process_output = process_result.stdout
-            else:
-                log_text(f'Return code: {process_result.returncode} while calling journalctl.')
-
-            # Parse journalctl cursor and remove it from process_output
-            log_length = len(process_output)
-            if log_length > 0:
-                result = re.search(r'-- cursor: (?P<cursor>[^\n]+)', process_output)
-                if result:
-                    journalctl_cursor = result.group('cursor')
-                    process_output = (
-                        process_output[:result.start()] +
-                        process_output[result.end():])
-                    process_output = process_output.rstrip()
-            
-                    log_length = len(process_output)
-
-            if log_length > 0:
-                if not first_display and process_output[0] != '\n':
-                    process_output = '\n' + process_output
-                log_text(process_output)
-
-            time.sleep(1)
-            
-            local_geth_jsonrpc_url = 'http://127.0.0.1:8545'
-            request_json = {
-                'jsonrpc': '2.0',
-                'method': 'eth_syncing',
-                'id': 1
-            }
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            try:
-                response = httpx.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
-            except httpx.RequestError as exception:
-                log_text(f'Exception: {exception} while querying Geth.')
-                continue
-
-            if response.status_code != 200:
-                log_text(
-                    f'Status code: {response.status_code} while querying Geth.')
-                continue
-        
-            response_json = response.json()
-            syncing_json = response_json
-
-            local_geth_jsonrpc_url = 'http://127.0.0.1:8545'
-            request_json = {
-                'jsonrpc': '2.0',
-                'method': 'net_peerCount',
-                'id': 1
-            }
-            headers = {
-                'Content-Type': 'application/json'
-            }
+        journal_follower = JournalFollower(geth_service_name, log_text)
+        journal_follower.start()
+
+        while True:
+
+            if get_exited():
+                journal_follower.stop()
+                return {
+                    'exe_is_working': exe_is_working,
+                    'exe_is_syncing': exe_is_syncing,
+                    'exe_starting_block': exe_starting_block,
+                    'exe_current_block': exe_current_block,
+                    'exe_highest_block': exe_highest_block,
+                    'exe_connected_peers': exe_connected_peers
+                }
+
+            time.sleep(1)
+            
             try:
-                response = httpx.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
+                response, geth_status = gethrpc.get_status()
             except httpx.RequestError as exception:
                 log_text(f'Exception: {exception} while querying Geth.')
                 continue
@@ -1476,8 +1720,8 @@ $ sudo journalctl -ru {geth_service_name}
                     f'Status code: {response.status_code} while querying Geth.')
                 continue
 
-            response_json = response.json()
-            peer_count_json = response_json
+            syncing_json = geth_status['eth_syncing']
+            peer_count_json = geth_status['net_peerCount']
 
             exe_starting_block = UNKNOWN_VALUE
             exe_current_block = UNKNOWN_VALUE
@@ -1521,6 +1765,7 @@ Connected Peers: {exe_connected_peers}
 
             if exe_is_syncing or exe_has_few_peers:
                 exe_is_working = True
+                journal_follower.stop()
                 return {
                     'exe_is_working': exe_is_working,
                     'exe_is_syncing': exe_is_syncing,
@@ -1614,8 +1859,75 @@ def detect_merge_ready(network):
 
     return {'result': is_merge_ready}
 
-def install_lighthouse(network, eth1_fallbacks, consensus_checkpoint_url, ports):
-    # Install Lighthouse for the selected network
+def get_lighthouse_release_assets():
+    # Return the binary and signature assets of the latest Lighthouse release for this CPU or
+    # None
+
+    try:
+        response = get_github_release(LIGHTHOUSE_LATEST_RELEASE, log)
+    except httpx.RequestError as exception:
+        log.error(f'Exception while downloading lighthouse binary. {exception}')
+        return None
+
+    if response.status_code != 200:
+        log.error(f'HTTP error while downloading lighthouse binary. '
+            f'Status code {response.status_code}')
+        return None
+    
+    release_json = response.json()
+
+    if 'assets' not in release_json:
+        log.error('No assets in Github release for lighthouse.')
+        return None
+    
+    binary_asset = None
+    signature_asset = None
+
+    archive_filename_comp = 'x86_64-unknown-linux-gnu.tar.gz'
+
+    use_optimized_binary = is_adx_supported()
+    if not use_optimized_binary:
+        log.warning('CPU does not support ADX instructions. '
+            'Using the portable version for Lighthouse.')
+        archive_filename_comp = 'x86_64-unknown-linux-gnu-portable.tar.gz'
+    
+    archive_filename_sig_comp = archive_filename_comp + '.asc'
+
+    for asset in release_json['assets']:
+        if 'name' not in asset:
+            continue
+        if 'browser_download_url' not in asset:
+            continue
+    
+        file_name = asset['name']
+        file_url = asset['browser_download_url']
+
+        if file_name.endswith(archive_filename_comp):
+            binary_asset = {
+                'file_name': file_name,
+                'file_url': file_url
+            }
+        elif file_name.endswith(archive_filename_sig_comp):
+            signature_asset = {
+                'file_name': file_name,
+                'file_url': file_url
+            }
+
+    if binary_asset is None or signature_asset is None:
+        log.error('Could not find binary or signature asset in Github release.')
+        return None
+
+    return binary_asset, signature_asset
+
+def plan_lighthouse_install():
+    # Ask how lighthouse should be installed. Returns the installation plan or False if the user
+    # asked to quit. The installation itself is done by install_lighthouse without any dialog.
+
+    plan = {
+        'skip': False,
+        'install_binary': True,
+        'remove_datadir': False
+    }
 
     # Check for existing systemd service
     lighthouse_bn_service_exists = False
@@ -1654,11 +1966,8 @@ Do you want to skip installing lighthouse and its beacon node service?
             return result
         
         if result == 1:
-            return True
-        
-        # User wants to proceed, make sure the lighthouse beacon node service is stopped first
-        subprocess.run([
-            'systemctl', 'stop', lighthouse_bn_service_name])
+            plan['skip'] = True
+            return plan
 
     result = button_dialog(
         title='Lighthouse installation',
@@ -1713,8 +2022,6 @@ with good hardware and good internet.
     except FileNotFoundError:
         pass
     
-    install_lighthouse_binary = True
-
     if lighthouse_found:
         result = button_dialog(
             title='Lighthouse binary found',
@@ -1738,222 +2045,153 @@ Do you want to skip installing the lighthouse binary?
         if not result:
             return result
         
-        install_lighthouse_binary = (result == 2)
-    
-    if install_lighthouse_binary:
-        # Getting latest Lighthouse release files
-        lighthouse_gh_release_url = GITHUB_REST_API_URL + LIGHTHOUSE_LATEST_RELEASE
-        headers = {'Accept': GITHUB_API_VERSION}
-        try:
-            response = httpx.get(lighthouse_gh_release_url, headers=headers,
-                follow_redirects=True)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading lighthouse binary. {exception}')
-            return False
+        plan['install_binary'] = (result == 2)
 
-        if response.status_code != 200:
-            log.error(f'HTTP error while downloading lighthouse binary. '
-                f'Status code {response.status_code}')
-            return False
+    # Check if lighthouse beacon node user or directory already exists
+    lighthouse_datadir_bn = Path('/var/lib/lighthouse/beacon')
+    if lighthouse_datadir_bn.exists() and lighthouse_datadir_bn.is_dir():
+        process_result = subprocess.run([
+            'du', '-sh', lighthouse_datadir_bn
+            ], capture_output=True, text=True)
         
-        release_json = response.json()
+        process_output = process_result.stdout
+        lighthouse_datadir_bn_size = process_output.split('\t')[0]
 
-        if 'assets' not in release_json:
-            log.error('No assets in Github release for lighthouse.')
-            return False
-        
-        binary_asset = None
-        signature_asset = None
+        result = button_dialog(
+            title='Lighthouse beacon node data directory found',
+            text=(
+f'''
+An existing lighthouse beacon node data directory has been found. Here are
+some details found:
 
-        archive_filename_comp = 'x86_64-unknown-linux-gnu.tar.gz'
+Location: {lighthouse_datadir_bn}
+Size: {lighthouse_datadir_bn_size}
 
-        use_optimized_binary = is_adx_supported()
-        if not use_optimized_binary:
-            log.warning('CPU does not support ADX instructions. '
-                'Using the portable version for Lighthouse.')
-            archive_filename_comp = 'x86_64-unknown-linux-gnu-portable.tar.gz'
-        
-        archive_filename_sig_comp = archive_filename_comp + '.asc'
+Do you want to remove this directory first and start from nothing?
+'''         ),
+            buttons=[
+                ('Remove', 1),
+                ('Keep', 2),
+                ('Quit', False)
+            ]
+        ).run()
 
-        for asset in release_json['assets']:
-            if 'name' not in asset:
-                continue
-            if 'browser_download_url' not in asset:
-                continue
+        if not result:
+            return result
         
-            file_name = asset['name']
-            file_url = asset['browser_download_url']
+        plan['remove_datadir'] = (result == 1)
 
-            if file_name.endswith(archive_filename_comp):
-                binary_asset = {
-                    'file_name': file_name,
-                    'file_url': file_url
-                }
-            elif file_name.endswith(archive_filename_sig_comp):
-                signature_asset = {
-                    'file_name': file_name,
-                    'file_url': file_url
-                }
+    return plan
+
+def install_lighthouse(network, eth1_fallbacks, consensus_checkpoint_url, ports, plan):
+    # Install lighthouse for the selected network following the installation plan. Nothing here
+    # shows a dialog since it runs concurrently with the other installation steps.
+
+    lighthouse_bn_service_name = LIGHTHOUSE_BN_SYSTEMD_SERVICE_NAME
+
+    if plan['skip']:
+        return True
+
+    # Make sure an existing lighthouse beacon node service is stopped first
+    service_details = get_systemd_service_details(lighthouse_bn_service_name)
+
+    if service_details['LoadState'] == 'loaded':
+        subprocess.run([
+            'systemctl', 'stop', lighthouse_bn_service_name])
 
-        if binary_asset is None or signature_asset is None:
-            log.error('Could not find binary or signature asset in Github release.')
+    if plan['install_binary']:
+        # Getting latest Lighthouse release files
+        release_assets = get_lighthouse_release_assets()
+        if release_assets is None:
             return False
+
+        binary_asset, signature_asset = release_assets
         
         # Downloading latest Lighthouse release files
         download_path = Path(Path.home(), 'ethwizard', 'downloads')
         download_path.mkdir(parents=True, exist_ok=True)
 
         binary_path = Path(download_path, binary_asset['file_name'])
-
-        try:
-            with open(binary_path, 'wb') as binary_file:
-                with httpx.stream('GET', binary_asset['file_url'],
-                    follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'HTTP error while downloading Lighthouse binary from Github. '
-                            f'Status code {http_stream.status_code}')
-                        return False
-                    for data in http_stream.iter_bytes():
-                        binary_file.write(data)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading Lighthouse binary from Github. {exception}')
-            return False
-        
         signature_path = Path(download_path, signature_asset['file_name'])
 
-        try:
-            with open(signature_path, 'wb') as signature_file:
-                with httpx.stream('GET', signature_asset['file_url'],
-                    follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'HTTP error while downloading Lighthouse signature from Github. '
-                            f'Status code {http_stream.status_code}')
-                        return False
-                    for data in http_stream.iter_bytes():
-                        signature_file.write(data)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading Lighthouse signature from Github. {exception}')
-            return False
+        with apt_lock:
+            # Test if gpg is already installed
+            gpg_is_installed = False
+            try:
+                gpg_is_installed = is_package_installed('gpg')
+            except Exception:
+                return False
 
-        # Test if gpg is already installed
-        gpg_is_installed = False
-        try:
-            gpg_is_installed = is_package_installed('gpg')
-        except Exception:
+            if not gpg_is_installed:
+                # Install gpg using APT
+                subprocess.run([
+                    'apt', '-y', 'update'])
+                subprocess.run([
+                    'apt', '-y', 'install', 'gpg'])
+
+        # Get Sigma Prime's PGP key
+        if not import_public_key(['gpg'], LIGHTHOUSE_PRIME_PGP_KEY_ID, log):
+            log.error('We failed to download the Sigma Prime\'s PGP key to verify the lighthouse '
+            'binary.')
             return False
 
-        if not gpg_is_installed:
-            # Install gpg using APT
-            subprocess.run([
-                'apt', '-y', 'update'])
-            subprocess.run([
-                'apt', '-y', 'install', 'gpg'])
-
-        # Verify PGP signature
-
-        command_line = ['gpg', '--list-keys', '--with-colons', LIGHTHOUSE_PRIME_PGP_KEY_ID]
-        process_result = subprocess.run(command_line)
-        pgp_key_found = process_result.returncode == 0
-
-        if not pgp_key_found:
-
-            retry_index = 0
-            retry_count = 15
+        if download_artifact(signature_asset['file_url'], signature_path, log,
+            'Lighthouse signature from Github') is None:
+            return False
 
-            key_server = PGP_KEY_SERVERS[retry_index % len(PGP_KEY_SERVERS)]
-            log.info(f'Downloading Sigma Prime\'s PGP key from {key_server} ...')
-            command_line = ['gpg', '--keyserver', key_server, '--recv-keys',
-                LIGHTHOUSE_PRIME_PGP_KEY_ID]
-            process_result = subprocess.run(command_line)
+        # Verify PGP signature and extract the binary while it is downloaded
+        signature_verifier = SignatureVerifier(['gpg'], signature_path,
+            LIGHTHOUSE_PRIME_PGP_KEY_ID, log)
+        signature_verifier.start()
 
-            if process_result.returncode != 0:
-                # GPG failed to download Sigma Prime's PGP key, let's wait and retry a few times
-                while process_result.returncode != 0 and retry_index < retry_count:
-                    retry_index = retry_index + 1
-                    delay = 5
-                    log.warning(f'GPG failed to download the PGP key. We will wait {delay} seconds '
-                        f'and try again from a different server.')
-                    time.sleep(delay)
+        binary_extractor = StreamingTarExtractor(Path(download_path, 'lighthouse-extract'), log,
+            required_files=['lighthouse'])
+        binary_extractor.start()
 
-                    key_server = PGP_KEY_SERVERS[retry_index % len(PGP_KEY_SERVERS)]
-                    log.info(f'Downloading Sigma Prime\'s PGP key from {key_server} ...')
-                    command_line = ['gpg', '--keyserver', key_server, '--recv-keys',
-                        LIGHTHOUSE_PRIME_PGP_KEY_ID]
+        if download_artifact(binary_asset['file_url'], binary_path, log,
+            'Lighthouse binary from Github',
+            consumers=[signature_verifier, binary_extractor]) is None:
+            signature_verifier.abort()
+            binary_extractor.abort()
+            return False
 
-                    process_result = subprocess.run(command_line)
-            
-            if process_result.returncode != 0:
-                log.error(
-f'''
-We failed to download the Sigma Prime's PGP key to verify the lighthouse
-binary after {retry_count} retries.
-'''
-                )
-                return False
-        
-        process_result = subprocess.run([
-            'gpg', '--verify', signature_path])
-        if process_result.returncode != 0:
+        if not signature_verifier.finish():
             log.error('The lighthouse binary signature is wrong. '
                 'We will stop here to protect you.')
+            binary_extractor.abort()
+            return False
+
+        if not binary_extractor.finish():
+            binary_extractor.abort()
             return False
         
-        # Extracting the Lighthouse binary archive
-        subprocess.run([
-            'tar', 'xvf', binary_path, '--directory', LIGHTHOUSE_INSTALLED_DIRECTORY])
+        # Installing the extracted Lighthouse binary
+        if not binary_extractor.install(LIGHTHOUSE_INSTALLED_DIRECTORY):
+            return False
         
         # Remove download leftovers
         binary_path.unlink()
         signature_path.unlink()
 
-        # Get Lighthouse version
-        try:
-            process_result = subprocess.run([
-                'lighthouse', '--version'
-                ], capture_output=True, text=True)
-            lighthouse_found = True
-
-            process_output = process_result.stdout
-            result = re.search(r'Lighthouse (.*?)\n', process_output)
-            if result:
-                lighthouse_version = result.group(1).strip()
-        except FileNotFoundError:
-            pass
-
-    # Check if lighthouse beacon node user or directory already exists
-    lighthouse_datadir_bn = Path('/var/lib/lighthouse/beacon')
-    if lighthouse_datadir_bn.exists() and lighthouse_datadir_bn.is_dir():
+    # Get Lighthouse version
+    lighthouse_version = 'unknown'
+    try:
         process_result = subprocess.run([
-            'du', '-sh', lighthouse_datadir_bn
+            'lighthouse', '--version'
             ], capture_output=True, text=True)
-        
-        process_output = process_result.stdout
-        lighthouse_datadir_bn_size = process_output.split('\t')[0]
-
-        result = button_dialog(
-            title='Lighthouse beacon node data directory found',
-            text=(
-f'''
-An existing lighthouse beacon node data directory has been found. Here are
-some details found:
-
-Location: {lighthouse_datadir_bn}
-Size: {lighthouse_datadir_bn_size}
 
-Do you want to remove this directory first and start from nothing?
-'''         ),
-            buttons=[
-                ('Remove', 1),
-                ('Keep', 2),
-                ('Quit', False)
-            ]
-        ).run()
+        process_output = process_result.stdout
+        result = re.search(r'Lighthouse (.*?)\n', process_output)
+        if result:
+            lighthouse_version = result.group(1).strip()
+    except FileNotFoundError:
+        log.error('We could not find the lighthouse binary after its installation.')
+        return False
 
-        if not result:
-            return result
-        
-        if result == 1:
-            shutil.rmtree(lighthouse_datadir_bn)
+    # Remove the existing Lighthouse beacon node data directory if asked
+    lighthouse_datadir_bn = Path('/var/lib/lighthouse/beacon')
+    if plan['remove_datadir'] and lighthouse_datadir_bn.is_dir():
+        shutil.rmtree(lighthouse_datadir_bn)
 
     lighthouse_bn_user_exists = False
     process_result = subprocess.run([
@@ -2047,6 +2285,17 @@ client is syncing.
     )
     time.sleep(delay)
 
+    return True
+
+def verify_lighthouse(plan):
+    # Verify that the lighthouse beacon node service installed by install_lighthouse is running
+    # and syncing
+
+    lighthouse_bn_service_name = LIGHTHOUSE_BN_SYSTEMD_SERVICE_NAME
+
+    if plan['skip']:
+        return True
+
     # Check if the Lighthouse beacon node service is still running
     service_details = get_systemd_service_details(lighthouse_bn_service_name)
 
@@ -2112,7 +2361,7 @@ $ sudo journalctl -ru {lighthouse_bn_service_name}
 
     while keep_retrying and retry_index < retry_count:
         try:
-            response = httpx.get(lighthouse_bn_query_url, headers=headers)
+            response = httpclient.get(lighthouse_bn_query_url, headers=headers)
         except httpx.RequestError as exception:
             last_exception = exception
 
@@ -2228,11 +2477,13 @@ $ sudo journalctl -ru {lighthouse_bn_service_name}
 
         set_percentage(10)
 
-        journalctl_cursor = None
+        journal_follower = JournalFollower(lighthouse_bn_service_name, log_text)
+        journal_follower.start()
 
         while True:
 
             if get_exited():
+                journal_follower.stop()
                 return {
                     'bn_is_working': bn_is_working,
                     'bn_is_syncing': bn_is_syncing,
@@ -2241,44 +2492,6 @@ $ sudo journalctl -ru {lighthouse_bn_service_name}
                     'bn_connected_peers': bn_connected_peers
                 }
 
-            # Output logs
-            command = []
-            first_display = True
-            if journalctl_cursor is None:
-                command = ['journalctl', '--no-pager', '--show-cursor', '-q', '-n', '25',
-                    '-o', 'cat', '-u', lighthouse_bn_service_name]
-            else:
-                command = ['journalctl', '--no-pager', '--show-cursor', '-q',
-                    '-o', 'cat', '--after-cursor=' + journalctl_cursor, '-u',
-                    lighthouse_bn_service_name]
-                first_display = False
-
-            process_result = subprocess.run(command, capture_output=True, text=True)
-
-            process_output = ''
-            if process_result.returncode == 0:
-                process_output = process_result.stdout
-            else:
-                log_text(f'Return code: {process_result.returncode} while calling journalctl.')
-
-            # Parse journalctl cursor and remove it from process_output
-            log_length = len(process_output)
-            if log_length > 0:
-                result = re.search(r'-- cursor: (?P<cursor>[^\n]+)', process_output)
-                if result:
-                    journalctl_cursor = result.group('cursor')
-                    process_output = (
-                        process_output[:result.start()] +
-                        process_output[result.end():])
-                    process_output = process_output.rstrip()
-            
-                    log_length = len(process_output)
-
-            if log_length > 0:
-                if not first_display and process_output[0] != '\n':
-                    process_output = '\n' + process_output
-                log_text(process_output)
-
             time.sleep(1)
             
             lighthouse_bn_syncing_query = BN_SYNCING_EP
@@ -2287,7 +2500,7 @@ $ sudo journalctl -ru {lighthouse_bn_service_name}
                 'accept': 'application/json'
             }
             try:
-                response = httpx.get(lighthouse_bn_query_url, headers=headers)
+                response = httpclient.get(lighthouse_bn_query_url, headers=headers)
             except httpx.RequestError as exception:
                 log_text(f'Exception: {exception} while querying Lighthouse beacon node.')
                 continue
@@ -2307,7 +2520,7 @@ $ sudo journalctl -ru {lighthouse_bn_service_name}
                 'accept': 'application/json'
             }
             try:
-                response = httpx.get(lighthouse_bn_query_url, headers=headers)
+                response = httpclient.get(lighthouse_bn_query_url, headers=headers)
             except httpx.RequestError as exception:
                 log_text(f'Exception: {exception} while querying Lighthouse beacon node.')
                 continue
@@ -2370,6 +2583,7 @@ Connected Peers: {bn_connected_peers}
 
             if bn_is_syncing or bn_has_few_peers:
                 bn_is_working = True
+                journal_follower.stop()
                 return {
                     'bn_is_working': bn_is_working,
                     'bn_is_syncing': bn_is_syncing,
@@ -2629,10 +2843,12 @@ Would you like to import your keys or generate them here?
 
             # Verify the generated keys
             imported_keys = search_for_generated_keys(validator_keys_path)
+            imported_public_keys = get_keystore_public_keys(validator_keys_path, log)
             
-            if len(imported_keys['keystore_paths']) == 0:
+            if len(imported_public_keys) == 0:
                 log.warning(f'No key has been found while importing them from {validator_keys_path}')
             else:
+                log.info(f'{len(imported_public_keys)} validator key(s) imported')
                 actual_keys = imported_keys
                 obtained_keys = True
 
@@ -2712,11 +2928,8 @@ Do you want to skip installing the staking-deposit-cli binary?
 
         if install_eth2_deposit_binary:
             # Getting latest staking-deposit-cli release files
-            eth2_cli_gh_release_url = GITHUB_REST_API_URL + ETH2_DEPOSIT_CLI_LATEST_RELEASE
-            headers = {'Accept': GITHUB_API_VERSION}
             try:
-                response = httpx.get(eth2_cli_gh_release_url, headers=headers,
-                    follow_redirects=True)
+                response = get_github_release(ETH2_DEPOSIT_CLI_LATEST_RELEASE, log)
             except httpx.RequestError as exception:
                 log.error(f'Cannot get latest staking-deposit-cli release from Github. '
                     f'Exception {exception}')
@@ -2770,43 +2983,24 @@ Do you want to skip installing the staking-deposit-cli binary?
             download_path.mkdir(parents=True, exist_ok=True)
 
             binary_path = Path(download_path, binary_asset['file_name'])
-            binary_hash = hashlib.sha256()
 
-            try:
-                with open(binary_path, 'wb') as binary_file:
-                    with httpx.stream('GET', binary_asset['file_url'],
-                        follow_redirects=True) as http_stream:
-                        if http_stream.status_code != 200:
-                            log.error(f'HTTP error while downloading staking-deposit-cli binary '
-                                f'from Github. Status code {http_stream.status_code}')
-                            return False
-                        for data in http_stream.iter_bytes():
-                            binary_file.write(data)
-                            if checksum_asset is not None:
-                                binary_hash.update(data)
-            except httpx.RequestError as exception:
-                log.error(f'Exception while downloading staking-deposit-cli binary from '
-                    f'Github. {exception}')
+            # Extract the binary while it is downloaded
+            binary_extractor = StreamingTarExtractor(Path(download_path, 'staking-deposit-cli-extract'),
+                log, strip_components=2, required_files=[eth2_deposit_cli_binary.name])
+            binary_extractor.start()
+
+            binary_hexdigest = download_artifact(binary_asset['file_url'], binary_path, log,
+                'staking-deposit-cli binary from Github', consumers=[binary_extractor])
+            if binary_hexdigest is None:
+                binary_extractor.abort()
                 return False
 
             if checksum_asset is not None:
-                binary_hexdigest = binary_hash.hexdigest().lower()
-
                 checksum_path = Path(download_path, checksum_asset['file_name'])
 
-                try:
-                    with open(checksum_path, 'wb') as signature_file:
-                        with httpx.stream('GET', checksum_asset['file_url'],
-                            follow_redirects=True) as http_stream:
-                            if http_stream.status_code != 200:
-                                log.error(f'HTTP error while downloading staking-deposit-cli '
-                                    f'checksum from Github. Status code {http_stream.status_code}')
-                                return False
-                            for data in http_stream.iter_bytes():
-                                signature_file.write(data)
-                except httpx.RequestError as exception:
-                    log.error(f'Exception while downloading staking-deposit-cli checksum from '
-                    f'Github. {exception}')
+                if download_artifact(checksum_asset['file_url'], checksum_path, log,
+                    'staking-deposit-cli checksum from Github') is None:
+                    binary_extractor.abort()
                     return False
 
                 # Verify SHA256 signature
@@ -2817,13 +3011,16 @@ Do you want to skip installing the staking-deposit-cli binary?
                         log.error(f'SHA256 checksum failed on staking-deposit-cli binary from '
                             f'Github. Expected {checksum} but we got {binary_hexdigest}. We will '
                             f'stop here to protect you')
+                        binary_extractor.abort()
                         return False
             
-            # Extracting the staking-deposit-cli binary archive
+            # Installing the extracted staking-deposit-cli binary
+            if not binary_extractor.finish():
+                binary_extractor.abort()
+                return False
             eth2_deposit_cli_path.mkdir(parents=True, exist_ok=True)
-            subprocess.run([
-                'tar', 'xvf', binary_path, '--strip-components', '2', '--directory',
-                eth2_deposit_cli_path])
+            if not binary_extractor.install(eth2_deposit_cli_path):
+                return False
             
             # Remove download leftovers
             binary_path.unlink()
@@ -2994,10 +3191,21 @@ this directory will also remove any key imported previously.
         'chmod', '700', lighthouse_datadir_vc])
     
     # Import keystore(s) if we have some
+    keystore_public_keys = get_keystore_public_keys(keys['validator_keys_path'], log)
     if len(keys['keystore_paths']) > 0:
-        subprocess.run([
-            LIGHTHOUSE_INSTALLED_PATH, '--network', network, 'account', 'validator', 'import',
-            '--directory', keys['validator_keys_path'], '--datadir', lighthouse_datadir])
+        keystore_password = get_answer(ANSWER_KEYSTORE_PASSWORD)
+        if is_headless() and keystore_password is not None:
+            # Give the keystore password on stdin since nobody is there to type it
+            subprocess.run([
+                LIGHTHOUSE_INSTALLED_PATH, '--network', network, 'account', 'validator',
+                'import', '--directory', keys['validator_keys_path'], '--datadir',
+                lighthouse_datadir, '--reuse-password', '--stdin-inputs'],
+                input=f'{keystore_password}\n', text=True)
+        else:
+            subprocess.run([
+                LIGHTHOUSE_INSTALLED_PATH, '--network', network, 'account', 'validator',
+                'import', '--directory', keys['validator_keys_path'], '--datadir',
+                lighthouse_datadir])
     else:
         log.warning('No keystore files found to import. We\'ll guess they were already imported '
             'for now.')
@@ -3014,6 +3222,12 @@ this directory will also remove any key imported previously.
         process_output = process_result.stdout
         public_keys = re.findall(r'0x[0-9a-f]{96}', process_output)
         public_keys = list(map(lambda x: x.strip(), public_keys))
+
+    missing_public_keys = set(keystore_public_keys) - set(public_keys)
+    if len(public_keys) > 0 and len(missing_public_keys) > 0:
+        log.warning(f'{len(missing_public_keys)} keystore(s) from {keys["validator_keys_path"]} '
+            f'were not imported by the lighthouse validator client: '
+            f'{", ".join(sorted(missing_public_keys))}')
         
     if len(public_keys) == 0:
         # We have no key imported
@@ -3163,11 +3377,16 @@ $ sudo journalctl -ru {lighthouse_vc_service_name}
 
     return public_keys
 
-def install_chrony():
-    # Prompt the user to install chrony to improve time sync
+def plan_chrony_install():
+    # Prompt the user to install chrony to improve time sync. Returns the installation plan or
+    # False if the user asked to quit.
+
+    plan = {
+        'install': False
+    }
 
     if is_package_installed('chrony'):
-        return True
+        return plan
     
     result = button_dialog(
         title='Improve time synchronization',
@@ -3190,15 +3409,26 @@ Would you like to improve your time synchronization?
     ).run()
 
     if result == 2:
-        return True
+        return plan
 
     if not result:
         return result
     
+    plan['install'] = True
+
+    return plan
+
+def install_chrony(plan):
+    # Install chrony following the installation plan
+
+    if not plan['install']:
+        return True
+
     env = os.environ.copy()
     env['DEBIAN_FRONTEND'] = 'noninteractive'
 
-    subprocess.run(['apt', '-y', 'install', 'chrony'], env=env)
+    with apt_lock:
+        subprocess.run(['apt', '-y', 'install', 'chrony'], env=env)
 
     return True
 
@@ -3269,7 +3499,7 @@ $ sudo journalctl -ru {lighthouse_bn_service_name}
         'accept': 'application/json'
     }
     try:
-        response = httpx.get(lighthouse_bn_query_url, headers=headers)
+        response = httpclient.get(lighthouse_bn_query_url, headers=headers)
     except httpx.RequestError as exception:
         result = button_dialog(
             title='Cannot connect to Lighthouse beacon node',
@@ -3362,11 +3592,17 @@ $ sudo journalctl -ru {lighthouse_bn_service_name}
 
             set_percentage(1)
 
-            journalctl_cursor = None
+            watcher = BeaconNodeWatcher(local_lighthouse_bn_http_base, log_text=log_text)
+            watcher.start()
+
+            journal_follower = JournalFollower(lighthouse_bn_service_name, log_text)
+            journal_follower.start()
 
             while True:
 
                 if get_exited():
+                    watcher.stop()
+                    journal_follower.stop()
                     return {
                         'bn_is_fully_sync': bn_is_fully_sync,
                         'bn_is_syncing': bn_is_syncing,
@@ -3375,117 +3611,12 @@ $ sudo journalctl -ru {lighthouse_bn_service_name}
                         'bn_connected_peers': bn_connected_peers
                     }
 
-                # Output logs
-                command = []
-                first_display = True
-                if journalctl_cursor is None:
-                    command = ['journalctl', '--no-pager', '--show-cursor', '-q', '-n', '25',
-                        '-o', 'cat', '-u', lighthouse_bn_service_name]
-                else:
-                    command = ['journalctl', '--no-pager', '--show-cursor', '-q',
-                        '-o', 'cat', '--after-cursor=' + journalctl_cursor, '-u',
-                        lighthouse_bn_service_name]
-                    first_display = False
-
-                process_result = subprocess.run(command, capture_output=True, text=True)
-
-                process_output = ''
-                if process_result.returncode == 0:
-                    process_output = process_result.stdout
-                else:
-                    log_text(f'Return code: {process_result.returncode} while calling journalctl.')
-
-                # Parse journalctl cursor and remove it from process_output
-                log_length = len(process_output)
-                if log_length > 0:
-                    result = re.search(r'-- cursor: (?P<cursor>[^\n]+)', process_output)
-                    if result:
-                        journalctl_cursor = result.group('cursor')
-                        process_output = (
-                            process_output[:result.start()] +
-                            process_output[result.end():])
-                        process_output = process_output.rstrip()
-                
-                        log_length = len(process_output)
-
-                if log_length > 0:
-                    if not first_display and process_output[0] != '\n':
-                        process_output = '\n' + process_output
-                    log_text(process_output)
-                
-                lighthouse_bn_syncing_query = BN_SYNCING_EP
-                lighthouse_bn_query_url = local_lighthouse_bn_http_base + lighthouse_bn_syncing_query
-                headers = {
-                    'accept': 'application/json'
-                }
-                try:
-                    response = httpx.get(lighthouse_bn_query_url, headers=headers)
-                except httpx.RequestError as exception:
-                    log_text(f'Exception: {exception} while querying Lighthouse beacon node.')
-                    continue
-
-                if response.status_code != 200:
-                    log_text(
-                        f'Status code: {response.status_code} while querying Lighthouse beacon node.')
-                    continue
-            
-                response_json = response.json()
-                syncing_json = response_json
-
-                lighthouse_bn_peer_count_query = BN_PEER_COUNT_EP
-                lighthouse_bn_query_url = (
-                    local_lighthouse_bn_http_base + lighthouse_bn_peer_count_query)
-                headers = {
-                    'accept': 'application/json'
-                }
-                try:
-                    response = httpx.get(lighthouse_bn_query_url, headers=headers)
-                except httpx.RequestError as exception:
-                    log_text(f'Exception: {exception} while querying Lighthouse beacon node.')
-                    continue
-
-                if response.status_code != 200:
-                    log_text(
-                        f'Status code: {response.status_code} while querying Lighthouse beacon node.')
-                    continue
-
-                response_json = response.json()
-                peer_count_json = response_json
-
-                if (
-                    syncing_json and
-                    'data' in syncing_json and
-                    'is_syncing' in syncing_json['data']
-                    ):
-                    bn_is_syncing = bool(syncing_json['data']['is_syncing'])
-                else:
-                    bn_is_syncing = False
-                
-                if (
-                    syncing_json and
-                    'data' in syncing_json and
-                    'head_slot' in syncing_json['data']
-                    ):
-                    bn_head_slot = int(syncing_json['data']['head_slot'])
-                else:
-                    bn_head_slot = UNKNOWN_VALUE
-
-                if (
-                    syncing_json and
-                    'data' in syncing_json and
-                    'sync_distance' in syncing_json['data']
-                    ):
-                    bn_sync_distance = int(syncing_json['data']['sync_distance'])
-                else:
-                    bn_sync_distance = UNKNOWN_VALUE
+                bn_status = watcher.status()
 
-                bn_connected_peers = 0
-                if (
-                    peer_count_json and
-                    'data' in peer_count_json and
-                    'connected' in peer_count_json['data']
-                    ):
-                    bn_connected_peers = int(peer_count_json['data']['connected'])
+                bn_is_syncing = bn_status['bn_is_syncing']
+                bn_head_slot = bn_status['bn_head_slot']
+                bn_sync_distance = bn_status['bn_sync_distance']
+                bn_connected_peers = bn_status['bn_connected_peers']
 
                 bn_is_fully_sync = bn_sync_distance == 0
 
@@ -3505,6 +3636,8 @@ Connected Peers: {bn_connected_peers}
 '''             ).strip())
 
                 if bn_is_fully_sync:
+                    watcher.stop()
+                    journal_follower.stop()
                     return {
                         'bn_is_fully_sync': bn_is_fully_sync,
                         'bn_is_syncing': bn_is_syncing,
@@ -3521,7 +3654,8 @@ Connected Peers: {bn_connected_peers}
                         'bn_connected_peers': bn_connected_peers
                     })
                 
-                time.sleep(1)
+                # Wake up on new beacon node events or at least every second for the logs
+                watcher.wait_for_update(1.0)
 
         unknown_joining_queue = 'no join queue information found'
 
@@ -3534,7 +3668,7 @@ Connected Peers: {bn_connected_peers}
         beaconcha_in_queue_query_url = (
             BEACONCHA_IN_URLS[network] + BEACONCHA_VALIDATOR_QUEUE_API_URL)
         try:
-            response = httpx.get(beaconcha_in_queue_query_url, headers=headers,
+            response = httpclient.get(beaconcha_in_queue_query_url, headers=headers,
                 follow_redirects=True)
 
             if response.status_code != 200:
@@ -3666,16 +3800,7 @@ When you are done with the deposit(s), click the "I'm done" button below.
     if not result:
         return result
 
-    public_keys = []
-
-    with open(keys['deposit_data_path'], 'r') as deposit_data_file:
-        deposit_data = json.loads(deposit_data_file.read(204800))
-        
-        for validator_data in deposit_data:
-            if 'pubkey' not in validator_data:
-                continue
-            public_key = validator_data['pubkey']
-            public_keys.append('0x' + public_key)
+    public_keys = read_deposit_public_keys(keys['deposit_data_path'], log)
     
     if len(public_keys) == 0:
         log.error('No public key(s) found in the deposit file.')
@@ -0,0 +1,125 @@
+import json
+import subprocess
+import threading
+
+# Journal follower. It follows the journal for a systemd unit from a background thread and
+# pushes each new log message into a log_text callback. It reads the journal natively when
+# python-systemd is installed, otherwise it uses a single long-lived journalctl process.
+
+try:
+    from systemd import journal as systemd_journal
+    systemd_journal_available = True
+except ImportError:
+    systemd_journal_available = False
+
+JOURNAL_FOLLOWER_INITIAL_LINES = 25
+JOURNAL_FOLLOWER_WAIT_TIMEOUT = 0.5
+
+def _message_text(message):
+    # MESSAGE can be a list of bytes values in journalctl JSON output when it is not valid UTF-8
+    if type(message) is list:
+        return bytes(message).decode('utf8', errors='replace')
+    if type(message) is bytes:
+        return message.decode('utf8', errors='replace')
+    if message is None:
+        return ''
+    return str(message)
+
+class JournalFollower:
+
+    def __init__(self, unit, log_text, lines=JOURNAL_FOLLOWER_INITIAL_LINES):
+        self.unit = unit
+        self.log_text = log_text
+        self.lines = lines
+
+        self._stopping = threading.Event()
+        self._process = None
+        self._thread = None
+        self._first_display = True
+
+    def start(self):
+        if systemd_journal_available:
+            target = self._follow_native
+        else:
+            target = self._follow_journalctl
+
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+
+        process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _output(self, message):
+        if self._stopping.is_set():
+            return
+
+        message = message.rstrip()
+        if not self._first_display:
+            message = '\n' + message
+        self._first_display = False
+
+        self.log_text(message)
+
+    def _follow_journalctl(self):
+        command = ['journalctl', '--no-pager', '-q', '-f', '-n', str(self.lines),
+            '-o', 'json', '--output-fields=MESSAGE', '-u', self.unit]
+
+        try:
+            self._process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL, text=True, encoding='utf8', errors='replace')
+        except OSError as exception:
+            self.log_text(f'Exception: {exception} while calling journalctl.')
+            return
+
+        for line in self._process.stdout:
+            if self._stopping.is_set():
+                break
+
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+
+            self._output(_message_text(entry.get('MESSAGE')))
+
+        return_code = self._process.wait()
+        if not self._stopping.is_set() and return_code != 0:
+            self.log_text(f'Return code: {return_code} while calling journalctl.')
+
+    def _follow_native(self):
+        reader = systemd_journal.Reader()
+        try:
+            reader.this_boot()
+            reader.add_match(_SYSTEMD_UNIT=self.unit)
+
+            # Display the last lines first like journalctl -n does
+            reader.seek_tail()
+            previous_entries = []
+            while len(previous_entries) < self.lines:
+                entry = reader.get_previous()
+                if not entry:
+                    break
+                previous_entries.append(entry)
+
+            for entry in reversed(previous_entries):
+                self._output(_message_text(entry.get('MESSAGE')))
+
+            reader.seek_tail()
+            reader.get_previous()
+
+            while not self._stopping.is_set():
+                if reader.wait(JOURNAL_FOLLOWER_WAIT_TIMEOUT) == systemd_journal.NOP:
+                    continue
+
+                for entry in reader:
+                    self._output(_message_text(entry.get('MESSAGE')))
+        finally:
+            reader.close()
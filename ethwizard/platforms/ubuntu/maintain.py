@@ -1,7 +1,5 @@
 import subprocess
-import httpx
 import re
-import time
 import os
 
 from packaging.version import parse as parse_version, Version
@@ -11,10 +9,22 @@ from prompt_toolkit.shortcuts import button_dialog
 
 from pathlib import Path
 
+from ethwizard import httpclient
+
+from ethwizard.lazyimport import lazy_import
+
+from ethwizard.releasecache import get_github_release
+
+from ethwizard.artifacts import download_artifact
+from ethwizard.pgp import import_public_key, SignatureVerifier
+from ethwizard.extract import StreamingTarExtractor
+
 from ethwizard.platforms.common import (
     select_fee_recipient_address,
     get_geth_running_version,
-    get_geth_latest_version
+    get_geth_latest_version,
+    Probe,
+    run_probes
 )
 
 from ethwizard.platforms.ubuntu.common import (
@@ -37,8 +47,6 @@ from ethwizard.constants import (
     CONSENSUS_CLIENT_LIGHTHOUSE,
     WIZARD_COMPLETED_STEP_ID,
     UNKNOWN_VALUE,
-    GITHUB_REST_API_URL,
-    GITHUB_API_VERSION,
     GETH_SYSTEMD_SERVICE_NAME,
     MIN_CLIENT_VERSION_FOR_MERGE,
     LINUX_JWT_TOKEN_FILE_PATH,
@@ -57,9 +65,11 @@ from ethwizard.constants import (
     LIGHTHOUSE_INSTALLED_PATH,
     LIGHTHOUSE_PRIME_PGP_KEY_ID,
     BN_VERSION_EP,
-    PGP_KEY_SERVERS,
+    MAINTENANCE_DETAILS_TIMEOUT,
 )
 
+httpx = lazy_import('httpx')
+
 def enter_maintenance(context):
     # Maintenance entry point for Ubuntu.
     # Maintenance is started after the wizard has completed.
@@ -89,9 +99,16 @@ def show_dashboard(context):
     current_consensus_client = context[selected_consensus_client]
     current_network = context[selected_network]
 
-    # Get execution client details
+    # Get execution and consensus client details concurrently
+
+    client_details = run_probes([
+        Probe('execution', lambda: get_execution_client_details(current_execution_client),
+            False, MAINTENANCE_DETAILS_TIMEOUT),
+        Probe('consensus', lambda: get_consensus_client_details(current_consensus_client),
+            False, MAINTENANCE_DETAILS_TIMEOUT)
+    ], log)
 
-    execution_client_details = get_execution_client_details(current_execution_client)
+    execution_client_details = client_details['execution']
     if not execution_client_details:
         log.error('Unable to get execution client details.')
         return False
@@ -172,7 +189,7 @@ def show_dashboard(context):
 
     # Get consensus client details
 
-    consensus_client_details = get_consensus_client_details(current_consensus_client)
+    consensus_client_details = client_details['consensus']
     if not consensus_client_details:
         log.error('Unable to get consensus client details.')
         return False
@@ -416,10 +433,18 @@ def get_execution_client_details(execution_client):
         details['service']['sub'] = service_details['SubState']
         details['service']['running'] = is_service_running(service_details)
 
-        details['versions']['installed'] = get_geth_installed_version()
-        details['versions']['running'] = get_geth_running_version(log)
-        details['versions']['available'] = get_geth_available_version()
-        details['versions']['latest'] = get_geth_latest_version(log)
+        # Versions are independent, get them all concurrently
+        probes_results = run_probes([
+            Probe('installed', get_geth_installed_version),
+            Probe('running', lambda: get_geth_running_version(log)),
+            Probe('available', get_geth_available_version),
+            Probe('latest', lambda: get_geth_latest_version(log))
+        ], log)
+
+        details['versions']['installed'] = probes_results['installed']
+        details['versions']['running'] = probes_results['running']
+        details['versions']['available'] = probes_results['available']
+        details['versions']['latest'] = probes_results['latest']
 
         if 'ExecStart' in service_details:
             details['exec'] = parse_exec_start(service_details['ExecStart'])
@@ -541,11 +566,27 @@ def get_consensus_client_details(consensus_client):
             'is_vc_merge_configured': UNKNOWN_VALUE
         }
         
+        lighthouse_bn_service_name = LIGHTHOUSE_BN_SYSTEMD_SERVICE_NAME
+        lighthouse_vc_service_name = LIGHTHOUSE_VC_SYSTEMD_SERVICE_NAME
+
+        # Services and versions are independent, get them all concurrently
+        unknown_service_details = {
+            'LoadState': UNKNOWN_VALUE
+        }
+        probes_results = run_probes([
+            Probe('bn_service', lambda: get_systemd_service_details(lighthouse_bn_service_name),
+                unknown_service_details),
+            Probe('vc_service', lambda: get_systemd_service_details(lighthouse_vc_service_name),
+                unknown_service_details),
+            Probe('installed', get_lighthouse_installed_version),
+            Probe('running', get_lighthouse_running_version),
+            Probe('latest', get_lighthouse_latest_version)
+        ], log)
+
         # Check for existing systemd services
         lighthouse_bn_service_exists = False
-        lighthouse_bn_service_name = LIGHTHOUSE_BN_SYSTEMD_SERVICE_NAME
 
-        service_details = get_systemd_service_details(lighthouse_bn_service_name)
+        service_details = probes_results['bn_service']
 
         if service_details['LoadState'] == 'loaded':
             lighthouse_bn_service_exists = True
@@ -573,9 +614,8 @@ def get_consensus_client_details(consensus_client):
                 execution_jwt_flag_found and execution_endpoint_flag_found)
 
         lighthouse_vc_service_exists = False
-        lighthouse_vc_service_name = LIGHTHOUSE_VC_SYSTEMD_SERVICE_NAME
 
-        service_details = get_systemd_service_details(lighthouse_vc_service_name)
+        service_details = probes_results['vc_service']
 
         if service_details['LoadState'] == 'loaded':
             lighthouse_vc_service_exists = True
@@ -597,9 +637,9 @@ def get_consensus_client_details(consensus_client):
             if details['is_vc_merge_configured'] == UNKNOWN_VALUE:
                 details['is_vc_merge_configured'] = False
 
-        details['versions']['installed'] = get_lighthouse_installed_version()
-        details['versions']['running'] = get_lighthouse_running_version()
-        details['versions']['latest'] = get_lighthouse_latest_version()
+        details['versions']['installed'] = probes_results['installed']
+        details['versions']['running'] = probes_results['running']
+        details['versions']['latest'] = probes_results['latest']
 
         return details
 
@@ -640,7 +680,7 @@ def get_lighthouse_running_version():
     local_lighthouse_bn_version_url = 'http://127.0.0.1:5052' + BN_VERSION_EP
 
     try:
-        response = httpx.get(local_lighthouse_bn_version_url)
+        response = httpclient.get(local_lighthouse_bn_version_url)
     except httpx.RequestError as exception:
         log.error(f'Cannot connect to Lighthouse. Exception: {exception}')
         return UNKNOWN_VALUE
@@ -676,11 +716,8 @@ def get_lighthouse_latest_version():
 
     log.info('Getting Lighthouse latest version...')
 
-    lighthouse_gh_release_url = GITHUB_REST_API_URL + LIGHTHOUSE_LATEST_RELEASE
-    headers = {'Accept': GITHUB_API_VERSION}
     try:
-        response = httpx.get(lighthouse_gh_release_url, headers=headers,
-            follow_redirects=True)
+        response = get_github_release(LIGHTHOUSE_LATEST_RELEASE, log)
     except httpx.RequestError as exception:
         log.error(f'Exception while getting the latest stable version for Lighthouse. {exception}')
         return UNKNOWN_VALUE
@@ -885,11 +922,8 @@ def upgrade_lighthouse():
     log.info('Upgrading Lighthouse client...')
 
     # Getting latest Lighthouse release files
-    lighthouse_gh_release_url = GITHUB_REST_API_URL + LIGHTHOUSE_LATEST_RELEASE
-    headers = {'Accept': GITHUB_API_VERSION}
     try:
-        response = httpx.get(lighthouse_gh_release_url, headers=headers,
-            follow_redirects=True)
+        response = get_github_release(LIGHTHOUSE_LATEST_RELEASE, log)
     except httpx.RequestError as exception:
         log.error(f'Exception while downloading lighthouse binary. {exception}')
         return False
@@ -947,37 +981,8 @@ def upgrade_lighthouse():
     download_path.mkdir(parents=True, exist_ok=True)
 
     binary_path = Path(download_path, binary_asset['file_name'])
-
-    try:
-        with open(binary_path, 'wb') as binary_file:
-            with httpx.stream('GET', binary_asset['file_url'],
-                follow_redirects=True) as http_stream:
-                if http_stream.status_code != 200:
-                    log.error(f'HTTP error while downloading Lighthouse binary from Github. '
-                        f'Status code {http_stream.status_code}')
-                    return False
-                for data in http_stream.iter_bytes():
-                    binary_file.write(data)
-    except httpx.RequestError as exception:
-        log.error(f'Exception while downloading Lighthouse binary from Github. {exception}')
-        return False
-    
     signature_path = Path(download_path, signature_asset['file_name'])
 
-    try:
-        with open(signature_path, 'wb') as signature_file:
-            with httpx.stream('GET', signature_asset['file_url'],
-                follow_redirects=True) as http_stream:
-                if http_stream.status_code != 200:
-                    log.error(f'HTTP error while downloading Lighthouse signature from Github. '
-                        f'Status code {http_stream.status_code}')
-                    return False
-                for data in http_stream.iter_bytes():
-                    signature_file.write(data)
-    except httpx.RequestError as exception:
-        log.error(f'Exception while downloading Lighthouse signature from Github. {exception}')
-        return False
-
     # Test if gpg is already installed
     gpg_is_installed = False
     try:
@@ -992,52 +997,40 @@ def upgrade_lighthouse():
         subprocess.run([
             'apt', '-y', 'install', 'gpg'])
 
-    # Verify PGP signature
-
-    command_line = ['gpg', '--list-keys', '--with-colons', LIGHTHOUSE_PRIME_PGP_KEY_ID]
-    process_result = subprocess.run(command_line)
-    pgp_key_found = process_result.returncode == 0
-
-    if not pgp_key_found:
-        retry_index = 0
-        retry_count = 15
-
-        key_server = PGP_KEY_SERVERS[retry_index % len(PGP_KEY_SERVERS)]
-        log.info(f'Downloading Sigma Prime\'s PGP key from {key_server} ...')
-        command_line = ['gpg', '--keyserver', key_server, '--recv-keys',
-            LIGHTHOUSE_PRIME_PGP_KEY_ID]
-        process_result = subprocess.run(command_line)
-
-        if process_result.returncode != 0:
-            # GPG failed to download Sigma Prime's PGP key, let's wait and retry a few times
-            while process_result.returncode != 0 and retry_index < retry_count:
-                retry_index = retry_index + 1
-                delay = 5
-                log.warning(f'GPG failed to download the PGP key. We will wait {delay} seconds '
-                    f'and try again from a different server.')
-                time.sleep(delay)
-
-                key_server = PGP_KEY_SERVERS[retry_index % len(PGP_KEY_SERVERS)]
-                log.info(f'Downloading Sigma Prime\'s PGP key from {key_server} ...')
-                command_line = ['gpg', '--keyserver', key_server, '--recv-keys',
-                    LIGHTHOUSE_PRIME_PGP_KEY_ID]
-
-                process_result = subprocess.run(command_line)
-        
-        if process_result.returncode != 0:
-            log.error(
-f'''
-We failed to download the Sigma Prime's PGP key to verify the lighthouse
-binary after {retry_count} retries.
-'''
-            )
-            return False
-    
-    process_result = subprocess.run([
-        'gpg', '--verify', signature_path])
-    if process_result.returncode != 0:
+    # Get Sigma Prime's PGP key
+    if not import_public_key(['gpg'], LIGHTHOUSE_PRIME_PGP_KEY_ID, log):
+        log.error('We failed to download the Sigma Prime\'s PGP key to verify the lighthouse '
+        'binary.')
+        return False
+
+    if download_artifact(signature_asset['file_url'], signature_path, log,
+        'Lighthouse signature from Github') is None:
+        return False
+
+    # Verify PGP signature and extract the binary while it is downloaded
+    signature_verifier = SignatureVerifier(['gpg'], signature_path,
+        LIGHTHOUSE_PRIME_PGP_KEY_ID, log)
+    signature_verifier.start()
+
+    binary_extractor = StreamingTarExtractor(Path(download_path, 'lighthouse-extract'), log,
+        required_files=['lighthouse'])
+    binary_extractor.start()
+
+    if download_artifact(binary_asset['file_url'], binary_path, log,
+        'Lighthouse binary from Github',
+        consumers=[signature_verifier, binary_extractor]) is None:
+        signature_verifier.abort()
+        binary_extractor.abort()
+        return False
+
+    if not signature_verifier.finish():
         log.error('The lighthouse binary signature is wrong. '
             'We will stop here to protect you.')
+        binary_extractor.abort()
+        return False
+
+    if not binary_extractor.finish():
+        binary_extractor.abort()
         return False
     
     # Stopping Lighthouse services before updating the binary
@@ -1047,14 +1040,19 @@ binary after {retry_count} retries.
 
     # Extracting the Lighthouse binary archive
     log.info('Updating Lighthouse binary...')
-    subprocess.run([
-        'tar', 'xvf', binary_path, '--directory', LIGHTHOUSE_INSTALLED_DIRECTORY])
+    installed = binary_extractor.install(LIGHTHOUSE_INSTALLED_DIRECTORY)
+    if not installed:
+        log.error('We could not update the lighthouse binary. The Lighthouse services will be '
+            'restarted with the previous binary.')
     
     # Restarting Lighthouse services after updating the binary
     log.info('Starting Lighthouse services...')
     subprocess.run(['systemctl', 'start', LIGHTHOUSE_BN_SYSTEMD_SERVICE_NAME,
         LIGHTHOUSE_VC_SYSTEMD_SERVICE_NAME])
 
+    if not installed:
+        return False
+
     # Remove download leftovers
     binary_path.unlink()
     signature_path.unlink()
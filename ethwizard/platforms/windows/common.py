@@ -1,9 +1,7 @@
 import os
 import sys
-import json
 import subprocess
 import re
-import httpx
 
 import logging
 
@@ -17,36 +15,33 @@ from secrets import token_hex
 
 from typing import Optional
 
-from ethwizard import __version__
+from ethwizard import __version__, httpclient
+
+from ethwizard.lazyimport import lazy_import
+
+from ethwizard.artifacts import download_artifact
+from ethwizard.headless import is_headless
+from ethwizard.statestore import get_state_store
 
 from ethwizard.constants import (
-    STATE_FILE,
     CHOCOLATEY_DEFAULT_BIN_PATH,
     GNUPG_DOWNLOAD_URL
 )
 
+httpx = lazy_import('httpx')
+
 log = logging.getLogger(__name__)
 
 def save_state(step_id: str, context: dict) -> bool:
     # Save wizard state
 
-    data_to_save = {
-        'step': step_id,
-        'context': context
-    }
-
     app_data = Path(os.getenv('LOCALAPPDATA', os.getenv('APPDATA', '')))
     if not app_data.is_dir():
         return False
     
     app_dir = app_data.joinpath('eth-wizard')
-    app_dir.mkdir(parents=True, exist_ok=True)
-    save_file = app_dir.joinpath(STATE_FILE)
-
-    with open(str(save_file), 'w', encoding='utf8') as output_file:
-        json.dump(data_to_save, output_file)
 
-    return True
+    return get_state_store(app_dir).save(step_id, context)
 
 def load_state() -> Optional[dict]:
     # Load wizard state
@@ -58,25 +53,19 @@ def load_state() -> Optional[dict]:
     app_dir = app_data.joinpath('eth-wizard')
     if not app_dir.is_dir():
         return None
-    
-    save_file = app_dir.joinpath(STATE_FILE)
-    if not save_file.is_file():
-        return None
-    
-    loaded_data = None
 
-    try:
-        with open(str(save_file), 'r', encoding='utf8') as input_file:
-            loaded_data = json.load(input_file)
-    except ValueError:
-        return None
-    
-    return loaded_data
+    return get_state_store(app_dir).load()
 
 def quit_app():
-    print('Press enter to quit')
-    input()
+    # Keep the console window open until the user read the output, unless nobody is there to
+    # press enter
+    if not is_headless():
+        print('Press enter to quit')
+        input()
     
+    log.info(httpclient.format_stats())
+    httpclient.close_clients()
+
     log.info(f'Quitting eth-wizard')
     sys.exit()
 
@@ -214,7 +203,7 @@ def install_gpg(base_directory):
     # Get the gnupg install URL
     gpg_installer_url = None
     try:
-        response = httpx.get(GNUPG_DOWNLOAD_URL, follow_redirects=True)
+        response = httpclient.get(GNUPG_DOWNLOAD_URL, follow_redirects=True)
         
         if response.status_code != 200:
             log.error(f'Cannot connect to GNUPG download URL {GNUPG_DOWNLOAD_URL}.\n'
@@ -246,18 +235,9 @@ def install_gpg(base_directory):
     if download_installer_path.is_file():
         download_installer_path.unlink()
 
-    try:
-        with open(download_installer_path, 'wb') as binary_file:
-            log.info('Downloading GNUPG installer...')
-            with httpx.stream('GET', gpg_installer_url, follow_redirects=True) as http_stream:
-                if http_stream.status_code != 200:
-                    log.error(f'Cannot download GNUPG installer {gpg_installer_url}.\n'
-                        f'Unexpected status code {http_stream.status_code}')
-                    return False
-                for data in http_stream.iter_bytes():
-                    binary_file.write(data)
-    except httpx.RequestError as exception:
-        log.error(f'Exception while downloading GNUPG installer. Exception {exception}')
+    log.info('Downloading GNUPG installer...')
+    if download_artifact(gpg_installer_url, download_installer_path, log,
+        f'GNUPG installer {gpg_installer_url}') is None:
         return False
 
     # Run installer silently
@@ -1,12 +1,9 @@
 import subprocess
 import time
-import httpx
-import humanize
 import re
 import os
 import shutil
 import json
-import hashlib
 import winreg
 import io
 
@@ -18,17 +15,25 @@ from urllib.parse import urljoin, urlparse
 
 from datetime import datetime, timedelta
 
-from defusedxml import ElementTree
+from zipfile import ZipFile
 
-from dateutil.parser import parse as dateparse
+from functools import partial
 
-from bs4 import BeautifulSoup
+from ethwizard import httpclient, gethrpc
 
-from rfc3986 import builder as urlbuilder
+from ethwizard.lazyimport import lazy_import
 
-from zipfile import ZipFile
+from ethwizard.releasecache import get_github_release
+from ethwizard.artifacts import download_artifact, fetch_stored, store
+from ethwizard.download import download_file
+from ethwizard.pgp import import_public_key, SignatureVerifier
+from ethwizard.depositdata import read_deposit_public_keys
+from ethwizard.keystoreindex import get_keystore_public_keys
+from ethwizard.resources import load_resource
 
-from functools import partial
+from ethwizard.beaconwatch import BeaconNodeWatcher
+
+from ethwizard.headless import button_dialog, input_dialog
 
 from ethwizard.constants import *
 
@@ -62,7 +67,13 @@ from ethwizard.platforms.windows.common import (
 )
 
 from prompt_toolkit.formatted_text import HTML
-from prompt_toolkit.shortcuts import button_dialog, input_dialog
+
+httpx = lazy_import('httpx')
+humanize = lazy_import('humanize')
+bs4 = lazy_import('bs4')
+urlbuilder = lazy_import('rfc3986.builder')
+ElementTree = lazy_import('defusedxml.ElementTree')
+dateutil_parser = lazy_import('dateutil.parser')
 
 def installation_steps(*args, **kwargs):
 
@@ -157,7 +168,10 @@ def installation_steps(*args, **kwargs):
     create_firewall_rule_step = Step(
         step_id=CREATE_FIREWALL_RULE_STEP_ID,
         display_name='Firewall rules creation',
-        exc_function=create_firewall_rule_function
+        exc_function=create_firewall_rule_function,
+        reads=[CTX_SELECTED_PORTS],
+        writes=[],
+        interactive=False
     )
 
     def install_chocolatey_function(step, context, step_sequence):
@@ -171,7 +185,10 @@ def installation_steps(*args, **kwargs):
     install_chocolatey_step = Step(
         step_id=INSTALL_CHOCOLATEY_STEP_ID,
         display_name='Chocolatey installation',
-        exc_function=install_chocolatey_function
+        exc_function=install_chocolatey_function,
+        reads=[],
+        writes=[],
+        interactive=False
     )
 
     def install_nssm_function(step, context, step_sequence):
@@ -185,7 +202,11 @@ def installation_steps(*args, **kwargs):
     install_nssm_step = Step(
         step_id=INSTALL_NSSM_STEP_ID,
         display_name='NSSM installation',
-        exc_function=install_nssm_function
+        exc_function=install_nssm_function,
+        reads=[],
+        writes=[],
+        depends_on=[INSTALL_CHOCOLATEY_STEP_ID],
+        interactive=False
     )
 
     def install_geth_function(step, context, step_sequence):
@@ -315,7 +336,10 @@ def installation_steps(*args, **kwargs):
     detect_merge_ready_step = Step(
         step_id=DETECT_MERGE_READY_STEP_ID,
         display_name='Detect merge ready network',
-        exc_function=detect_merge_ready_function
+        exc_function=detect_merge_ready_function,
+        reads=[CTX_SELECTED_DIRECTORY, CTX_SELECTED_NETWORK],
+        writes=[CTX_MERGE_READY_NETWORK],
+        interactive=False
     )
 
     def select_eth1_fallbacks_function(step, context, step_sequence):
@@ -567,7 +591,8 @@ def installation_steps(*args, **kwargs):
             # We are missing context variables, we cannot continue
             quit_app()
         
-        show_public_keys(context[selected_network], context[public_keys], log)
+        show_public_keys(context[selected_network], context[public_keys], log,
+            context.get(CTX_STEP_METRICS))
 
         return context
     
@@ -990,7 +1015,7 @@ Do you want to skip installing the geth binary?
                 if next_marker is not None:
                     params['marker'] = next_marker
 
-                response = httpx.get(GETH_STORE_BUILDS_URL, params=params, follow_redirects=True)
+                response = httpclient.get(GETH_STORE_BUILDS_URL, params=params, follow_redirects=True)
 
                 if response.status_code != 200:
                     log.error(f'Cannot connect to geth builds URL {GETH_STORE_BUILDS_URL}.\n'
@@ -1009,7 +1034,7 @@ Do you want to skip installing the geth binary?
                         continue
 
                     build_properties = blob.find('Properties')
-                    last_modified_date = dateparse(build_properties.find('Last-Modified').text)
+                    last_modified_date = dateutil_parser.parse(build_properties.find('Last-Modified').text)
 
                     windows_builds.append({
                         'name': build_name,
@@ -1042,85 +1067,47 @@ Do you want to skip installing the geth binary?
 
         latest_build_url = urljoin(GETH_BUILDS_BASE_URL, latest_build['name'])
 
-        try:
-            with open(geth_archive_path, 'wb') as binary_file:
-                log.info(f'Downloading geth archive {latest_build["name"]}...')
-                with httpx.stream('GET', latest_build_url, follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'Cannot download geth archive {latest_build_url}.\n'
-                            f'Unexpected status code {http_stream.status_code}')
-                        return False
-                    for data in http_stream.iter_bytes():
-                        binary_file.write(data)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading geth archive. Exception {exception}')
+        if not install_gpg(base_directory):
             return False
 
+        # Get Geth Windows Builder PGP key
+        gpg_binary_path = base_directory.joinpath('bin', 'gpg.exe')
+        gpg_command = [str(gpg_binary_path)]
+
+        pgp_key_found = import_public_key(gpg_command, GETH_WINDOWS_PGP_KEY_ID, log)
+        if not pgp_key_found:
+            log.warning('We failed to download the Geth Windows Builder PGP key to verify the geth '
+                'archive. We will skip signature verification.')
+
         geth_archive_sig_path = download_path.joinpath(latest_build['name'] + '.asc')
         if geth_archive_sig_path.is_file():
             geth_archive_sig_path.unlink()
 
         latest_build_sig_url = urljoin(GETH_BUILDS_BASE_URL, latest_build['name'] + '.asc')
 
-        try:
-            with open(geth_archive_sig_path, 'wb') as binary_file:
-                log.info(f'Downloading geth archive signature {latest_build["name"]}.asc...')
-                with httpx.stream('GET', latest_build_sig_url,
-                    follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'Cannot download geth archive signature {latest_build_sig_url}.\n'
-                            f'Unexpected status code {http_stream.status_code}')
-                        return False
-                    for data in http_stream.iter_bytes():
-                        binary_file.write(data)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading geth archive signature. Exception {exception}')
+        log.info(f'Downloading geth archive signature {latest_build["name"]}.asc...')
+        if download_artifact(latest_build_sig_url, geth_archive_sig_path, log,
+            f'geth archive signature {latest_build_sig_url}') is None:
             return False
 
-        if not install_gpg(base_directory):
+        # Verify PGP signature while the archive is downloaded
+        consumers = []
+        if pgp_key_found:
+            signature_verifier = SignatureVerifier(gpg_command, geth_archive_sig_path,
+                GETH_WINDOWS_PGP_KEY_ID, log)
+            signature_verifier.start()
+            consumers.append(signature_verifier)
+
+        log.info(f'Downloading geth archive {latest_build["name"]}...')
+        if download_artifact(latest_build_url, geth_archive_path, log,
+            f'geth archive {latest_build_url}', consumers=consumers) is None:
+            for consumer in consumers:
+                consumer.abort()
             return False
-        
-        # Verify PGP signature
-        gpg_binary_path = base_directory.joinpath('bin', 'gpg.exe')
 
-        retry_index = 0
-        retry_count = 15
-
-        key_server = PGP_KEY_SERVERS[retry_index % len(PGP_KEY_SERVERS)]
-        log.info(f'Downloading Geth Windows Builder PGP key from {key_server} ...')
-        command_line = [str(gpg_binary_path), '--keyserver', key_server,
-            '--recv-keys', GETH_WINDOWS_PGP_KEY_ID]
-        process_result = subprocess.run(command_line)
-
-        if process_result.returncode != 0:
-            # GPG failed to download Geth Windows Builder PGP key, let's wait and retry a few times
-            while process_result.returncode != 0 and retry_index < retry_count:
-                retry_index = retry_index + 1
-                delay = 5
-                log.warning(f'GPG failed to download the PGP key. We will wait {delay} seconds '
-                    f'and try again from a different server.')
-                time.sleep(delay)
-
-                key_server = PGP_KEY_SERVERS[retry_index % len(PGP_KEY_SERVERS)]
-                log.info(f'Downloading Geth Windows Builder PGP key from {key_server} ...')
-                command_line = [str(gpg_binary_path), '--keyserver', key_server,
-                    '--recv-keys', GETH_WINDOWS_PGP_KEY_ID]
-
-                process_result = subprocess.run(command_line)
-        
-        if process_result.returncode != 0:
-            log.warning(
-f'''
-We failed to download the Geth Windows Builder PGP key to verify the geth
-archive after {retry_count} retries. We will skip signature verification.
-'''
-            )
-        else:
-            process_result = subprocess.run([
-                str(gpg_binary_path), '--verify', str(geth_archive_sig_path)])
-            if process_result.returncode != 0:
-                log.error('The geth archive signature is wrong. We\'ll stop here to protect you.')
-                return False
+        if pgp_key_found and not signature_verifier.finish():
+            log.error('The geth archive signature is wrong. We\'ll stop here to protect you.')
+            return False
         
         # Remove download leftovers
         geth_archive_sig_path.unlink()        
@@ -1324,7 +1311,7 @@ To examine your geth service logs, inspect the following file:
         'Content-Type': 'application/json'
     }
     try:
-        response = httpx.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
+        response = httpclient.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
     except httpx.RequestError as exception:
         result = button_dialog(
             title='Cannot connect to Geth',
@@ -1443,17 +1430,8 @@ To examine your geth service logs, inspect the following file:
 
             time.sleep(1)
             
-            local_geth_jsonrpc_url = 'http://127.0.0.1:8545'
-            request_json = {
-                'jsonrpc': '2.0',
-                'method': 'eth_syncing',
-                'id': 1
-            }
-            headers = {
-                'Content-Type': 'application/json'
-            }
             try:
-                response = httpx.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
+                response, geth_status = gethrpc.get_status()
             except httpx.RequestError as exception:
                 log_text(f'Exception: {exception} while querying Geth.')
                 continue
@@ -1462,32 +1440,9 @@ To examine your geth service logs, inspect the following file:
                 log_text(
                     f'Status code: {response.status_code} while querying Geth.')
                 continue
-        
-            response_json = response.json()
-            syncing_json = response_json
-
-            local_geth_jsonrpc_url = 'http://127.0.0.1:8545'
-            request_json = {
-                'jsonrpc': '2.0',
-                'method': 'net_peerCount',
-                'id': 1
-            }
-            headers = {
-                'Content-Type': 'application/json'
-            }
-            try:
-                response = httpx.post(local_geth_jsonrpc_url, json=request_json, headers=headers)
-            except httpx.RequestError as exception:
-                log_text(f'Exception: {exception} while querying Geth.')
-                continue
 
-            if response.status_code != 200:
-                log_text(
-                    f'Status code: {response.status_code} while querying Geth.')
-                continue
-
-            response_json = response.json()
-            peer_count_json = response_json
+            syncing_json = geth_status['eth_syncing']
+            peer_count_json = geth_status['net_peerCount']
 
             exe_starting_block = UNKNOWN_VALUE
             exe_current_block = UNKNOWN_VALUE
@@ -1713,7 +1668,7 @@ Do you want to skip installing the JRE?
         try:
             log.info('Getting JRE builds...')
 
-            response = httpx.get(ADOPTIUM_17_API_URL, params=ADOPTIUM_17_API_PARAMS,
+            response = httpclient.get(ADOPTIUM_17_API_URL, params=ADOPTIUM_17_API_PARAMS,
                 follow_redirects=True)
 
             if response.status_code != 200:
@@ -1753,7 +1708,7 @@ Do you want to skip installing the JRE?
                     continue
 
                 package = binary['package']
-                updated_at = dateparse(binary['updated_at'])
+                updated_at = dateutil_parser.parse(binary['updated_at'])
 
                 if (
                     'name' not in package or
@@ -1794,19 +1749,9 @@ Do you want to skip installing the JRE?
         if jre_archive_path.is_file():
             jre_archive_path.unlink()
 
-        try:
-            with open(jre_archive_path, 'wb') as binary_file:
-                log.info(f'Downloading JRE archive {latest_build["name"]}...')
-                with httpx.stream('GET', latest_build['link'],
-                    follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'Cannot download JRE archive {latest_build["link"]}.\n'
-                            f'Unexpected status code {http_stream.status_code}')
-                        return False
-                    for data in http_stream.iter_bytes():
-                        binary_file.write(data)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading JRE archive. Exception {exception}')
+        log.info(f'Downloading JRE archive {latest_build["name"]}...')
+        if download_artifact(latest_build['link'], jre_archive_path, log,
+            f'JRE archive {latest_build["link"]}') is None:
             return False
         
         # Unzip JRE archive
@@ -1917,26 +1862,7 @@ Do you want to skip installing teku and its service?
                 'icacls', keys['validator_keys_path'], '/grant', 'Everyone:(R,RD)', '/t'
             ])
 
-            with os.scandir(keys['validator_keys_path']) as it:
-                for entry in it:
-                    if not entry.is_file():
-                        continue
-
-                    if not entry.name.startswith('keystore'):
-                        continue
-
-                    if not entry.name.endswith('.json'):
-                        continue
-
-                    with open(entry.path, 'r') as keystore_file:
-                        keystore = json.loads(keystore_file.read(204800))
-                
-                        if 'pubkey' not in keystore:
-                            log.error(f'No pubkey found in keystore file {entry.path}')
-                            continue
-                        
-                        public_key = keystore['pubkey']
-                        public_keys.append('0x' + public_key)
+            public_keys = get_keystore_public_keys(keys['validator_keys_path'], log)
 
             subprocess.run([
                 'icacls', keys['validator_keys_path'], '/remove:g', 'Everyone', '/t'
@@ -2035,10 +1961,8 @@ Do you want to skip installing the teku binary distribution?
     
     if install_teku_binary:
         # Getting latest Teku release files
-        teku_gh_release_url = GITHUB_REST_API_URL + TEKU_LATEST_RELEASE
-        headers = {'Accept': GITHUB_API_VERSION}
         try:
-            response = httpx.get(teku_gh_release_url, headers=headers, follow_redirects=True)
+            response = get_github_release(TEKU_LATEST_RELEASE, log)
         except httpx.RequestError as exception:
             log.error(f'Cannot connect to Github. Exception {exception}')
             return False
@@ -2082,11 +2006,13 @@ Do you want to skip installing the teku binary distribution?
         url_file_name = urlparse(zip_url).path.split('/')[-1]
 
         teku_archive_path = download_path.joinpath(url_file_name)
-        teku_archive_hash = hashlib.sha256()
         if teku_archive_path.is_file():
             teku_archive_path.unlink()
 
-        keep_retrying = True
+        # Use the stored archive if we already downloaded it
+        teku_archive_hexdigest = fetch_stored(zip_url, teku_archive_path, log, zip_sha256)
+
+        keep_retrying = teku_archive_hexdigest is None
 
         retry_index = 0
         retry_count = 6
@@ -2096,40 +2022,26 @@ Do you want to skip installing the teku binary distribution?
         last_status_code = None
 
         while keep_retrying and retry_index < retry_count:
-            last_exception = None
-            last_status_code = None
-            try:
-                with open(teku_archive_path, 'wb') as binary_file:
-                    log.info(f'Downloading teku archive {url_file_name}...')
-                    with httpx.stream('GET', zip_url, follow_redirects=True) as http_stream:
-                        if http_stream.status_code != 200:
-                            log.error(f'Cannot download teku archive {zip_url}.\n'
-                                f'Unexpected status code {http_stream.status_code}')
-                            last_status_code = http_stream.status_code
-
-                            retry_index = retry_index + 1
-                            log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
-                            time.sleep(retry_delay)
-                            retry_delay = retry_delay + retry_delay_increase
-                            continue
-
-                        for data in http_stream.iter_bytes():
-                            binary_file.write(data)
-                            teku_archive_hash.update(data)
-                    
-                    keep_retrying = False
+            log.info(f'Downloading teku archive {url_file_name}...')
+            result = download_file(zip_url, teku_archive_path, log, f'teku archive {zip_url}')
+            last_exception = result.exception
+            last_status_code = result.status_code
+
+            if last_status_code is not None:
+                log.error(f'Cannot download teku archive {zip_url}.\n'
+                    f'Unexpected status code {last_status_code}')
+            elif last_exception is not None:
+                log.error(f'Exception while downloading teku archive. Exception {last_exception}')
+            else:
+                teku_archive_hexdigest = result.sha256
+                keep_retrying = False
+                continue
 
-            except httpx.RequestError as exception:
-                
-                log.error(f'Exception while downloading teku archive. Exception {exception}')
-                last_exception = exception
+            retry_index = retry_index + 1
+            log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
+            time.sleep(retry_delay)
+            retry_delay = retry_delay + retry_delay_increase
 
-                retry_index = retry_index + 1
-                log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
-                time.sleep(retry_delay)
-                retry_delay = retry_delay + retry_delay_increase
-                continue
-        
         if keep_retrying:
             if last_exception is not None:
                 result = button_dialog(
@@ -2176,10 +2088,11 @@ is no network issue when we try to connect to the Internet.
 
         # Verify checksum
         log.info('Verifying teku archive checksum...')
-        teku_archive_hexdigest = teku_archive_hash.hexdigest()
         if teku_archive_hexdigest.lower() != zip_sha256.lower():
             log.error('Teku archive checksum does not match. We will stop here to protect you.')
             return False
+
+        store(zip_url, teku_archive_path, teku_archive_hexdigest.lower(), log)
         
         # Unzip teku archive
         archive_members = None
@@ -2452,7 +2365,7 @@ To examine your teku service logs, inspect the following files:
 
     while keep_retrying and retry_index < retry_count:
         try:
-            response = httpx.get(teku_query_url, headers=headers)
+            response = httpclient.get(teku_query_url, headers=headers)
         except httpx.RequestError as exception:
             last_exception = exception
 
@@ -2641,7 +2554,7 @@ To examine your teku service logs, inspect the following files:
                 'accept': 'application/json'
             }
             try:
-                response = httpx.get(teku_query_url, headers=headers)
+                response = httpclient.get(teku_query_url, headers=headers)
             except httpx.RequestError as exception:
                 log_text(f'Exception: {exception} while querying Teku.')
                 continue
@@ -2659,7 +2572,7 @@ To examine your teku service logs, inspect the following files:
                 'accept': 'application/json'
             }
             try:
-                response = httpx.get(teku_query_url, headers=headers)
+                response = httpclient.get(teku_query_url, headers=headers)
             except httpx.RequestError as exception:
                 log_text(f'Exception: {exception} while querying Teku.')
                 continue
@@ -2810,26 +2723,7 @@ Connected Peers: {result['bn_connected_peers']}
         'icacls', keys['validator_keys_path'], '/grant', 'Everyone:(R,RD)', '/t'
     ])
 
-    with os.scandir(keys['validator_keys_path']) as it:
-        for entry in it:
-            if not entry.is_file():
-                continue
-
-            if not entry.name.startswith('keystore'):
-                continue
-
-            if not entry.name.endswith('.json'):
-                continue
-
-            with open(entry.path, 'r') as keystore_file:
-                keystore = json.loads(keystore_file.read(204800))
-        
-                if 'pubkey' not in keystore:
-                    log.error(f'No pubkey found in keystore file {entry.path}')
-                    continue
-                
-                public_key = keystore['pubkey']
-                public_keys.append('0x' + public_key)
+    public_keys = get_keystore_public_keys(keys['validator_keys_path'], log)
 
     subprocess.run([
         'icacls', keys['validator_keys_path'], '/remove:g', 'Everyone', '/t'
@@ -2988,10 +2882,12 @@ Would you like to import your keys or generate them here?
 
             # Verify the generated keys
             imported_keys = search_for_generated_keys(keys_path)
+            imported_public_keys = get_keystore_public_keys(keys_path, log)
             
-            if len(imported_keys['keystore_paths']) == 0:
+            if len(imported_public_keys) == 0:
                 log.warning(f'No key has been found while importing them from {keys_path}')
             else:
+                log.info(f'{len(imported_public_keys)} validator key(s) imported')
                 actual_keys = imported_keys
                 obtained_keys = True
 
@@ -3071,10 +2967,8 @@ Do you want to skip installing the staking-deposit-cli binary?
 
         if install_eth2_deposit_binary:
             # Getting latest staking-deposit-cli release files
-            eth2_cli_gh_release_url = GITHUB_REST_API_URL + ETH2_DEPOSIT_CLI_LATEST_RELEASE
-            headers = {'Accept': GITHUB_API_VERSION}
             try:
-                response = httpx.get(eth2_cli_gh_release_url, headers=headers, follow_redirects=True)
+                response = get_github_release(ETH2_DEPOSIT_CLI_LATEST_RELEASE, log)
             except httpx.RequestError as exception:
                 log.error(f'Cannot get latest staking-deposit-cli release from Github. '
                     f'Exception {exception}')
@@ -3128,55 +3022,28 @@ Do you want to skip installing the staking-deposit-cli binary?
             download_path.mkdir(parents=True, exist_ok=True)
 
             binary_path = Path(download_path, binary_asset['file_name'])
-            binary_hash = hashlib.sha256()
 
             if binary_path.is_file():
                 binary_path.unlink()
 
-            try:
-                with open(binary_path, 'wb') as binary_file:
-                    log.info(f'Downloading staking-deposit-cli binary '
-                        f'{binary_asset["file_name"]}...')
-                    with httpx.stream('GET', binary_asset['file_url'],
-                        follow_redirects=True) as http_stream:
-                        if http_stream.status_code != 200:
-                            log.error(f'Cannot download staking-deposit-cli binary from Github '
-                                f'{binary_asset["file_url"]}.\nUnexpected status code '
-                                f'{http_stream.status_code}')
-                            return False
-                        for data in http_stream.iter_bytes():
-                            binary_file.write(data)
-                            if checksum_asset is not None:
-                                binary_hash.update(data)
-            except httpx.RequestError as exception:
-                log.error(f'Exception while downloading staking-deposit-cli binary from Github. '
-                    f'Exception {exception}')
+            log.info(f'Downloading staking-deposit-cli binary '
+                f'{binary_asset["file_name"]}...')
+            binary_hexdigest = download_artifact(binary_asset['file_url'], binary_path, log,
+                f'staking-deposit-cli binary from Github {binary_asset["file_url"]}')
+            if binary_hexdigest is None:
                 return False
 
             if checksum_asset is not None:
-                binary_hexdigest = binary_hash.hexdigest().lower()
-
                 checksum_path = Path(download_path, checksum_asset['file_name'])
 
                 if checksum_path.is_file():
                     checksum_path.unlink()
 
-                try:
-                    with open(checksum_path, 'wb') as signature_file:
-                        log.info(f'Downloading staking-deposit-cli checksum '
-                            f'{checksum_asset["file_name"]}...')
-                        with httpx.stream('GET', checksum_asset['file_url'],
-                            follow_redirects=True) as http_stream:
-                            if http_stream.status_code != 200:
-                                log.error(f'Cannot download staking-deposit-cli checksum from '
-                                    f'Github {checksum_asset["file_url"]}.\nUnexpected status code '
-                                    f'{http_stream.status_code}')
-                                return False
-                            for data in http_stream.iter_bytes():
-                                signature_file.write(data)
-                except httpx.RequestError as exception:
-                    log.error(f'Exception while downloading staking-deposit-cli checksum from '
-                        f'Github. Exception {exception}')
+                log.info(f'Downloading staking-deposit-cli checksum '
+                    f'{checksum_asset["file_name"]}...')
+                if download_artifact(checksum_asset['file_url'], checksum_path, log,
+                    f'staking-deposit-cli checksum from Github '
+                    f'{checksum_asset["file_url"]}') is None:
                     return False
 
                 # Verify SHA256 signature
@@ -3397,7 +3264,7 @@ To examine your teku service logs, inspect the following files:
         'accept': 'application/json'
     }
     try:
-        response = httpx.get(teku_query_url, headers=headers)
+        response = httpclient.get(teku_query_url, headers=headers)
     except httpx.RequestError as exception:
 
         result = button_dialog(
@@ -3493,12 +3360,17 @@ To examine your teku service logs, inspect the following files:
 
             set_percentage(1)
 
+            watcher = BeaconNodeWatcher(local_teku_http_base, log_text=log_text,
+                peers_endpoint=BN_PEERS_EP)
+            watcher.start()
+
             out_log_read_index = 0
             err_log_read_index = 0
 
             while True:
 
                 if get_exited():
+                    watcher.stop()
                     return {
                         'bn_is_fully_sync': bn_is_fully_sync,
                         'bn_is_syncing': bn_is_syncing,
@@ -3528,80 +3400,12 @@ To examine your teku service logs, inspect the following files:
                 if err_log_length > 0:
                     log_text(err_log_text)
                 
-                teku_syncing_query = BN_SYNCING_EP
-                teku_query_url = local_teku_http_base + teku_syncing_query
-                headers = {
-                    'accept': 'application/json'
-                }
-                try:
-                    response = httpx.get(teku_query_url, headers=headers)
-                except httpx.RequestError as exception:
-                    log_text(f'Exception: {exception} while querying Teku.')
-                    continue
+                bn_status = watcher.status()
 
-                if response.status_code != 200:
-                    log_text(f'Status code: {response.status_code} while querying Teku.')
-                    continue
-            
-                response_json = response.json()
-                syncing_json = response_json
-
-                teku_peers_query = BN_PEERS_EP
-                teku_query_url = local_teku_http_base + teku_peers_query
-                headers = {
-                    'accept': 'application/json'
-                }
-                try:
-                    response = httpx.get(teku_query_url, headers=headers)
-                except httpx.RequestError as exception:
-                    log_text(f'Exception: {exception} while querying Teku.')
-                    continue
-
-                if response.status_code != 200:
-                    log_text(f'Status code: {response.status_code} while querying Teku.')
-                    continue
-
-                response_json = response.json()
-                peers_json = response_json
-
-                if (
-                    syncing_json and
-                    'data' in syncing_json and
-                    'is_syncing' in syncing_json['data']
-                    ):
-                    bn_is_syncing = bool(syncing_json['data']['is_syncing'])
-                else:
-                    bn_is_syncing = False
-                
-                if (
-                    syncing_json and
-                    'data' in syncing_json and
-                    'head_slot' in syncing_json['data']
-                    ):
-                    bn_head_slot = int(syncing_json['data']['head_slot'])
-                else:
-                    bn_head_slot = UNKNOWN_VALUE
-
-                if (
-                    syncing_json and
-                    'data' in syncing_json and
-                    'sync_distance' in syncing_json['data']
-                    ):
-                    bn_sync_distance = int(syncing_json['data']['sync_distance'])
-                else:
-                    bn_sync_distance = UNKNOWN_VALUE
-
-                bn_connected_peers = 0
-                if (
-                    peers_json and
-                    'data' in peers_json and
-                    type(peers_json['data']) is list
-                    ):
-                    for peer in peers_json['data']:
-                        if 'state' not in peer:
-                            continue
-                        if peer['state'] == 'connected':
-                            bn_connected_peers = bn_connected_peers + 1
+                bn_is_syncing = bn_status['bn_is_syncing']
+                bn_head_slot = bn_status['bn_head_slot']
+                bn_sync_distance = bn_status['bn_sync_distance']
+                bn_connected_peers = bn_status['bn_connected_peers']
                 
                 bn_is_fully_sync = bn_sync_distance == 0
 
@@ -3621,6 +3425,7 @@ Connected Peers: {bn_connected_peers}
 '''         ).strip())
 
                 if bn_is_fully_sync:
+                    watcher.stop()
                     return {
                         'bn_is_fully_sync': bn_is_fully_sync,
                         'bn_is_syncing': bn_is_syncing,
@@ -3637,7 +3442,8 @@ Connected Peers: {bn_connected_peers}
                         'bn_connected_peers': bn_connected_peers
                     })
                 
-                time.sleep(1)
+                # Wake up on new beacon node events or at least every second for the logs
+                watcher.wait_for_update(1.0)
 
         unknown_joining_queue = 'no join queue information found'
 
@@ -3650,7 +3456,7 @@ Connected Peers: {bn_connected_peers}
         beaconcha_in_queue_query_url = (
             BEACONCHA_IN_URLS[network] + BEACONCHA_VALIDATOR_QUEUE_API_URL)
         try:
-            response = httpx.get(beaconcha_in_queue_query_url, headers=headers,
+            response = httpclient.get(beaconcha_in_queue_query_url, headers=headers,
                 follow_redirects=True)
 
             if response.status_code != 200:
@@ -3775,16 +3581,7 @@ When you are done with the deposit(s), click the "I'm done" button below.
     if not result:
         return result
 
-    public_keys = []
-
-    with open(deposit_file_path, 'r', encoding='utf8') as deposit_data_file:
-        deposit_data = json.loads(deposit_data_file.read(204800))
-        
-        for validator_data in deposit_data:
-            if 'pubkey' not in validator_data:
-                continue
-            public_key = validator_data['pubkey']
-            public_keys.append('0x' + public_key)
+    public_keys = read_deposit_public_keys(deposit_file_path, log)
     
     if len(public_keys) == 0:
         log.error('No public key(s) found in the deposit file.')
@@ -4191,11 +3988,8 @@ Do you want to skip installing the prometheus binary distribution?
     
     if install_prometheus_binary:
         # Getting latest Prometheus release files
-        prometheus_gh_release_url = GITHUB_REST_API_URL + PROMETHEUS_LATEST_RELEASE
-        headers = {'Accept': GITHUB_API_VERSION}
         try:
-            response = httpx.get(prometheus_gh_release_url, headers=headers,
-                follow_redirects=True)
+            response = get_github_release(PROMETHEUS_LATEST_RELEASE, log)
         except httpx.RequestError as exception:
             log.error(f'Cannot get latest Prometheus release from Github. '
                     f'Exception {exception}')
@@ -4242,23 +4036,12 @@ Do you want to skip installing the prometheus binary distribution?
         zip_url = binary_asset['file_url']
 
         prometheus_archive_path = download_path.joinpath(url_file_name)
-        prometheus_archive_hash = hashlib.sha256()
         if prometheus_archive_path.is_file():
             prometheus_archive_path.unlink()
 
-        try:
-            with open(prometheus_archive_path, 'wb') as binary_file:
-                log.info(f'Downloading prometheus archive {url_file_name}...')
-                with httpx.stream('GET', zip_url, follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'Cannot download prometheus archive {zip_url}.\n'
-                            f'Unexpected status code {http_stream.status_code}')
-                        return False
-                    for data in http_stream.iter_bytes():
-                        binary_file.write(data)
-                        prometheus_archive_hash.update(data)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading prometheus archive. Exception {exception}')
+        log.info(f'Downloading prometheus archive {url_file_name}...')
+        if download_artifact(zip_url, prometheus_archive_path, log,
+            f'prometheus archive {zip_url}') is None:
             return False
         
         # Unzip prometheus archive
@@ -4354,7 +4137,7 @@ Do you want to remove this directory first and start from nothing?
         prometheus_config_file.unlink()
     
     with open(str(prometheus_config_file), 'w', encoding='utf8') as config_file:
-        config_file.write(PROMETHEUS_CONFIG_WINDOWS)
+        config_file.write(load_resource(PROMETHEUS_CONFIG_WINDOWS_RESOURCE))
 
     # Setup prometheus service
     log_path = base_directory.joinpath('var', 'log')
@@ -4465,7 +4248,7 @@ To examine your prometheus service logs, inspect the following file:
         'time': datetime.now().timestamp()
     }
     try:
-        response = httpx.get(local_prometheus_query_url, params=params)
+        response = httpclient.get(local_prometheus_query_url, params=params)
     except httpx.RequestError as exception:
         result = button_dialog(
             title='Cannot connect to Prometheus',
@@ -4590,7 +4373,7 @@ To examine your prometheus service logs, inspect the following file:
             'time': datetime.now().timestamp()
         }
         try:
-            response = httpx.get(local_prometheus_query_url, params=params)
+            response = httpclient.get(local_prometheus_query_url, params=params)
         except httpx.RequestError as exception:
             result = button_dialog(
                 title='Cannot connect to Prometheus',
@@ -4816,10 +4599,8 @@ Do you want to skip installing windows exporter?
                 return False
         
         # Getting latest Windows Exporter release files
-        we_gh_release_url = GITHUB_REST_API_URL + WINDOWS_EXPORTER_LATEST_RELEASE
-        headers = {'Accept': GITHUB_API_VERSION}
         try:
-            response = httpx.get(we_gh_release_url, headers=headers, follow_redirects=True)
+            response = get_github_release(WINDOWS_EXPORTER_LATEST_RELEASE, log)
         except httpx.RequestError as exception:
             log.error(f'Cannot get latest Windows Exporter release from Github. '
                     f'Exception {exception}')
@@ -4867,19 +4648,9 @@ Do you want to skip installing windows exporter?
 
         we_installer_path = download_path.joinpath(url_file_name)
 
-        try:
-            with open(we_installer_path, 'wb') as binary_file:
-                log.info(f'Downloading windows exporter installer {url_file_name}...')
-                with httpx.stream('GET', installer_url, follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'Cannot download windows exporter installer {installer_url}.\n'
-                            f'Unexpected status code {http_stream.status_code}')
-                        return False
-                    for data in http_stream.iter_bytes():
-                        binary_file.write(data)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading windows exporter installer. '
-                f'Exception {exception}')
+        log.info(f'Downloading windows exporter installer {url_file_name}...')
+        if download_artifact(installer_url, we_installer_path, log,
+            f'windows exporter installer {installer_url}') is None:
             return False
 
         # Installing Windows Exporter
@@ -4909,7 +4680,7 @@ Do you want to skip installing windows exporter?
     # Test Windows Exporter to see if we can read some metrics
     local_we_query_url = 'http://localhost:9182/metrics'
     try:
-        response = httpx.get(local_we_query_url)
+        response = httpclient.get(local_we_query_url)
     except httpx.RequestError as exception:
         result = button_dialog(
             title='Cannot connect to Windows Exporter',
@@ -5022,7 +4793,7 @@ Viewer for Application with source windows_exporter.
         time.sleep(5)
 
         try:
-            response = httpx.get(local_we_query_url)
+            response = httpclient.get(local_we_query_url)
         except httpx.RequestError as exception:
             result = button_dialog(
                 title='Cannot connect to Windows Exporter',
@@ -5251,7 +5022,7 @@ Do you want to skip installing the grafana binary distribution?
         ) and retry_index < retry_count:
             try:
                 timeout_delay = base_timeout + (timeout_retry_increment * retry_index)
-                response = httpx.get(GRAFANA_DOWNLOAD_URL, params=GRAFANA_WINDOWS_PARAM,
+                response = httpclient.get(GRAFANA_DOWNLOAD_URL, params=GRAFANA_WINDOWS_PARAM,
                     timeout=timeout_delay, follow_redirects=True)
             except httpx.RequestError as exception:
                 log.error(f'Cannot connect to Grafana download page. Exception {exception}.')
@@ -5278,7 +5049,7 @@ Do you want to skip installing the grafana binary distribution?
             return False
         
         response_text = response.text
-        soup = BeautifulSoup(response_text, "html.parser")
+        soup = bs4.BeautifulSoup(response_text, "html.parser")
 
         results = soup.find_all('div', class_='download-package')
 
@@ -5314,29 +5085,18 @@ Do you want to skip installing the grafana binary distribution?
         zip_url = archive_url
 
         grafana_archive_path = download_path.joinpath(url_file_name)
-        grafana_archive_hash = hashlib.sha256()
         if grafana_archive_path.is_file():
             grafana_archive_path.unlink()
 
-        try:
-            with open(grafana_archive_path, 'wb') as binary_file:
-                log.info(f'Downloading grafana archive {url_file_name}...')
-                with httpx.stream('GET', zip_url, follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'Cannot download grafana archive {zip_url}.\n'
-                            f'Unexpected status code {http_stream.status_code}')
-                        return False
-                    for data in http_stream.iter_bytes():
-                        binary_file.write(data)
-                        grafana_archive_hash.update(data)
-        except httpx.RequestError as exception:
-            log.error(f'Exception while downloading grafana archive. Exception {exception}')
+        log.info(f'Downloading grafana archive {url_file_name}...')
+        grafana_archive_hexdigest = download_artifact(zip_url, grafana_archive_path, log,
+            f'grafana archive {zip_url}')
+        if grafana_archive_hexdigest is None:
             return False
         
         # Verify checksum
         if archive_sha256 is not None:
             log.info('Verifying grafana archive checksum...')
-            grafana_archive_hexdigest = grafana_archive_hash.hexdigest().lower()
             if grafana_archive_hexdigest != archive_sha256:
                 log.error(f'Grafana archive checksum does not match. Expected {archive_sha256} '
                     f'but we got {grafana_archive_hexdigest}. We will stop here to protect you.')
@@ -5443,7 +5203,7 @@ Do you want to remove this directory first and start from nothing?
 
     prometheus_datasource_file = grafana_datasourcedir.joinpath('prometheus.yaml')
     with open(prometheus_datasource_file, 'w', encoding='utf8') as datasource_file:
-        datasource_file.write(GRAFANA_PROMETHEUS_DATASOURCE)
+        datasource_file.write(load_resource(GRAFANA_PROMETHEUS_DATASOURCE_RESOURCE))
 
     # Setup dashboard provisioning for Geth, Teku and Windows Exporter dashboards
     grafana_dashboardprovdir = grafana_provisioningdir.joinpath('dashboards')
@@ -5485,23 +5245,23 @@ providers:
     
     geth_dashboard_file = grafana_dashboard_dir.joinpath('geth.json')
     with open(geth_dashboard_file, 'w', encoding='utf8') as dashboard_file:
-        dashboard_file.write(GETH_GRAFANA_DASHBOARD)
+        dashboard_file.write(load_resource(GETH_GRAFANA_DASHBOARD_RESOURCE))
     
     windows_system_dashboard_file = grafana_dashboard_dir.joinpath('windows-system.json')
     with open(windows_system_dashboard_file, 'w', encoding='utf8') as dashboard_file:
-        dashboard_file.write(WINDOWS_SYSTEM_OVERVIEW_GRAFANA_DASHBOARD)
+        dashboard_file.write(load_resource(WINDOWS_SYSTEM_OVERVIEW_GRAFANA_DASHBOARD_RESOURCE))
     
     windows_services_dashboard_file = grafana_dashboard_dir.joinpath('windows-services.json')
     with open(windows_services_dashboard_file, 'w', encoding='utf8') as dashboard_file:
-        dashboard_file.write(WINDOWS_SERVICES_PROCESSES_GRAFANA_DASHBOARD)
+        dashboard_file.write(load_resource(WINDOWS_SERVICES_PROCESSES_GRAFANA_DASHBOARD_RESOURCE))
     
     teku_dashboard_file = grafana_dashboard_dir.joinpath('teku.json')
     with open(teku_dashboard_file, 'w', encoding='utf8') as dashboard_file:
-        dashboard_file.write(TEKU_GRAFANA_DASHBOARD)
+        dashboard_file.write(load_resource(TEKU_GRAFANA_DASHBOARD_RESOURCE))
     
     home_dashboard_file = grafana_dashboard_dir.joinpath('home.json')
     with open(home_dashboard_file, 'w', encoding='utf8') as dashboard_file:
-        dashboard_file.write(HOME_GRAFANA_DASHBOARD)
+        dashboard_file.write(load_resource(HOME_GRAFANA_DASHBOARD_RESOURCE))
 
     # Create grafana custom config file
     sample_config_content = None
@@ -5670,7 +5430,7 @@ To examine your grafana service logs, inspect the following file:
     # Test if Grafana is working properly
     local_grafana_url = 'http://localhost:3000/login'
     try:
-        response = httpx.get(local_grafana_url)
+        response = httpclient.get(local_grafana_url)
     except httpx.RequestError as exception:
         result = button_dialog(
             title='Cannot connect to Grafana',
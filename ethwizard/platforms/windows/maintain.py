@@ -1,20 +1,14 @@
 import subprocess
-import httpx
 import re
 import time
 import os
 import shlex
-import hashlib
 import shutil
 
 from pathlib import Path
 
 from urllib.parse import urljoin, urlparse
 
-from defusedxml import ElementTree
-
-from dateutil.parser import parse as dateparse
-
 from zipfile import ZipFile
 
 from packaging.version import parse as parse_version, Version
@@ -22,10 +16,22 @@ from packaging.version import parse as parse_version, Version
 from prompt_toolkit.formatted_text import HTML
 from prompt_toolkit.shortcuts import button_dialog
 
+from ethwizard import httpclient
+
+from ethwizard.lazyimport import lazy_import
+
+from ethwizard.releasecache import get_github_release
+
+from ethwizard.artifacts import download_artifact, fetch_stored, store
+from ethwizard.download import download_file
+from ethwizard.pgp import import_public_key, SignatureVerifier
+
 from ethwizard.platforms.common import (
     select_fee_recipient_address,
     get_geth_running_version,
-    get_geth_latest_version
+    get_geth_latest_version,
+    Probe,
+    run_probes
 )
 
 from ethwizard.platforms.windows.common import (
@@ -60,19 +66,21 @@ from ethwizard.constants import (
     MAINTENANCE_IMPROVE_TIMEOUT,
     WINDOWS_SERVICE_RUNNING,
     BN_VERSION_EP,
-    GITHUB_REST_API_URL,
-    GITHUB_API_VERSION,
     TEKU_LATEST_RELEASE,
     GETH_STORE_BUILDS_PARAMS,
     GETH_STORE_BUILDS_URL,
     GETH_BUILDS_BASE_URL,
-    PGP_KEY_SERVERS,
     GETH_WINDOWS_PGP_KEY_ID,
     NETWORK_GOERLI,
     CTX_EXECUTION_IMPROVED_SERVICE_TIMEOUT,
-    CTX_CONSENSUS_IMPROVED_SERVICE_TIMEOUT
+    CTX_CONSENSUS_IMPROVED_SERVICE_TIMEOUT,
+    MAINTENANCE_DETAILS_TIMEOUT
 )
 
+httpx = lazy_import('httpx')
+ElementTree = lazy_import('defusedxml.ElementTree')
+dateutil_parser = lazy_import('dateutil.parser')
+
 def enter_maintenance(context):
     # Maintenance entry point for Windows.
     # Maintenance is started after the wizard has completed.
@@ -106,10 +114,16 @@ def show_dashboard(context):
     current_execution_improved_service_timeout = context[execution_improved_service_timeout]
     current_consensus_improved_service_timeout = context[consensus_improved_service_timeout]
 
-    # Get execution client details
+    # Get execution and consensus client details concurrently
+
+    client_details = run_probes([
+        Probe('execution', lambda: get_execution_client_details(current_directory,
+            current_execution_client), False, MAINTENANCE_DETAILS_TIMEOUT),
+        Probe('consensus', lambda: get_consensus_client_details(current_directory,
+            current_consensus_client), False, MAINTENANCE_DETAILS_TIMEOUT)
+    ], log)
 
-    execution_client_details = get_execution_client_details(current_directory,
-        current_execution_client)
+    execution_client_details = client_details['execution']
     if not execution_client_details:
         log.error('Unable to get execution client details.')
         return False
@@ -183,8 +197,7 @@ def show_dashboard(context):
 
     # Get consensus client details
 
-    consensus_client_details = get_consensus_client_details(current_directory,
-        current_consensus_client)
+    consensus_client_details = client_details['consensus']
     if not consensus_client_details:
         log.error('Unable to get consensus client details.')
         return False
@@ -401,9 +414,16 @@ def get_execution_client_details(base_directory, execution_client):
         details['service']['parameters'] = service_details['parameters']['AppParameters']
         details['service']['running'] = is_service_running(service_details)
 
-        details['versions']['installed'] = get_geth_installed_version(base_directory)
-        details['versions']['running'] = get_geth_running_version(log)
-        details['versions']['latest'] = get_geth_latest_version(log)
+        # Versions are independent, get them all concurrently
+        probes_results = run_probes([
+            Probe('installed', lambda: get_geth_installed_version(base_directory)),
+            Probe('running', lambda: get_geth_running_version(log)),
+            Probe('latest', lambda: get_geth_latest_version(log))
+        ], log)
+
+        details['versions']['installed'] = probes_results['installed']
+        details['versions']['running'] = probes_results['running']
+        details['versions']['latest'] = probes_results['latest']
 
         details['exec']['path'] = service_details['install']
         details['exec']['argv'] = shlex.split(service_details['parameters']['AppParameters'], posix=False)
@@ -544,9 +564,16 @@ def get_consensus_client_details(base_directory, consensus_client):
         if details['is_vc_merge_configured'] == UNKNOWN_VALUE:
             details['is_vc_merge_configured'] = False
 
-        details['versions']['installed'] = get_teku_installed_version(base_directory)
-        details['versions']['running'] = get_teku_running_version()
-        details['versions']['latest'] = get_teku_latest_version()
+        # Versions are independent, get them all concurrently
+        probes_results = run_probes([
+            Probe('installed', lambda: get_teku_installed_version(base_directory)),
+            Probe('running', get_teku_running_version),
+            Probe('latest', get_teku_latest_version)
+        ], log)
+
+        details['versions']['installed'] = probes_results['installed']
+        details['versions']['running'] = probes_results['running']
+        details['versions']['latest'] = probes_results['latest']
 
         return details
 
@@ -608,7 +635,7 @@ def get_teku_running_version():
     local_teku_bn_version_url = 'http://127.0.0.1:5051' + BN_VERSION_EP
 
     try:
-        response = httpx.get(local_teku_bn_version_url)
+        response = httpclient.get(local_teku_bn_version_url)
     except httpx.RequestError as exception:
         log.error(f'Cannot connect to Teku. Exception: {exception}')
         return UNKNOWN_VALUE
@@ -644,11 +671,8 @@ def get_teku_latest_version():
 
     log.info('Getting Teku latest version...')
 
-    teku_gh_release_url = GITHUB_REST_API_URL + TEKU_LATEST_RELEASE
-    headers = {'Accept': GITHUB_API_VERSION}
     try:
-        response = httpx.get(teku_gh_release_url, headers=headers,
-            follow_redirects=True)
+        response = get_github_release(TEKU_LATEST_RELEASE, log)
     except httpx.RequestError as exception:
         log.error(f'Exception while getting the latest stable version for Teku. {exception}')
         return UNKNOWN_VALUE
@@ -863,7 +887,7 @@ def upgrade_geth(base_directory, nssm_binary):
             if next_marker is not None:
                 params['marker'] = next_marker
 
-            response = httpx.get(GETH_STORE_BUILDS_URL, params=params, follow_redirects=True)
+            response = httpclient.get(GETH_STORE_BUILDS_URL, params=params, follow_redirects=True)
 
             if response.status_code != 200:
                 log.error(f'Cannot connect to geth builds URL {GETH_STORE_BUILDS_URL}.\n'
@@ -882,7 +906,7 @@ def upgrade_geth(base_directory, nssm_binary):
                     continue
 
                 build_properties = blob.find('Properties')
-                last_modified_date = dateparse(build_properties.find('Last-Modified').text)
+                last_modified_date = dateutil_parser.parse(build_properties.find('Last-Modified').text)
 
                 windows_builds.append({
                     'name': build_name,
@@ -915,18 +939,16 @@ def upgrade_geth(base_directory, nssm_binary):
 
     latest_build_url = urljoin(GETH_BUILDS_BASE_URL, latest_build['name'])
 
-    try:
-        with open(geth_archive_path, 'wb') as binary_file:
-            log.info(f'Downloading geth archive {latest_build["name"]}...')
-            with httpx.stream('GET', latest_build_url, follow_redirects=True) as http_stream:
-                if http_stream.status_code != 200:
-                    log.error(f'Cannot download geth archive {latest_build_url}.\n'
-                        f'Unexpected status code {http_stream.status_code}')
-                    return False
-                for data in http_stream.iter_bytes():
-                    binary_file.write(data)
-    except httpx.RequestError as exception:
-        log.error(f'Exception while downloading geth archive. Exception {exception}')
+    if not install_gpg(base_directory):
+        return False
+
+    # Get Geth Windows Builder PGP key
+    gpg_binary_path = base_directory.joinpath('bin', 'gpg.exe')
+    gpg_command = [str(gpg_binary_path)]
+
+    if not import_public_key(gpg_command, GETH_WINDOWS_PGP_KEY_ID, log):
+        log.error('We failed to download the Geth Windows Builder PGP key to verify the geth '
+            'archive.')
         return False
 
     geth_archive_sig_path = download_path.joinpath(latest_build['name'] + '.asc')
@@ -935,70 +957,23 @@ def upgrade_geth(base_directory, nssm_binary):
 
     latest_build_sig_url = urljoin(GETH_BUILDS_BASE_URL, latest_build['name'] + '.asc')
 
-    try:
-        with open(geth_archive_sig_path, 'wb') as binary_file:
-            log.info(f'Downloading geth archive signature {latest_build["name"]}.asc...')
-            with httpx.stream('GET', latest_build_sig_url,
-                follow_redirects=True) as http_stream:
-                if http_stream.status_code != 200:
-                    log.error(f'Cannot download geth archive signature {latest_build_sig_url}.\n'
-                        f'Unexpected status code {http_stream.status_code}')
-                    return False
-                for data in http_stream.iter_bytes():
-                    binary_file.write(data)
-    except httpx.RequestError as exception:
-        log.error(f'Exception while downloading geth archive signature. Exception {exception}')
-        return False
-
-    if not install_gpg(base_directory):
+    log.info(f'Downloading geth archive signature {latest_build["name"]}.asc...')
+    if download_artifact(latest_build_sig_url, geth_archive_sig_path, log,
+        f'geth archive signature {latest_build_sig_url}') is None:
         return False
-    
-    # Verify PGP signature
-    gpg_binary_path = base_directory.joinpath('bin', 'gpg.exe')
-
-    command_line = [str(gpg_binary_path), '--list-keys', '--with-colons', GETH_WINDOWS_PGP_KEY_ID]
-    process_result = subprocess.run(command_line)
-    pgp_key_found = process_result.returncode == 0
-
-    if not pgp_key_found:
-
-        retry_index = 0
-        retry_count = 15
-
-        key_server = PGP_KEY_SERVERS[retry_index % len(PGP_KEY_SERVERS)]
-        log.info(f'Downloading Geth Windows Builder PGP key from {key_server} ...')
-        command_line = [str(gpg_binary_path), '--keyserver', key_server,
-            '--recv-keys', GETH_WINDOWS_PGP_KEY_ID]
-        process_result = subprocess.run(command_line)
 
-        if process_result.returncode != 0:
-            # GPG failed to download Geth Windows Builder PGP key, let's wait and retry a few times
-            while process_result.returncode != 0 and retry_index < retry_count:
-                retry_index = retry_index + 1
-                delay = 5
-                log.warning(f'GPG failed to download the PGP key. We will wait {delay} seconds '
-                    f'and try again from a different server.')
-                time.sleep(delay)
+    # Verify PGP signature while the archive is downloaded
+    signature_verifier = SignatureVerifier(gpg_command, geth_archive_sig_path,
+        GETH_WINDOWS_PGP_KEY_ID, log)
+    signature_verifier.start()
 
-                key_server = PGP_KEY_SERVERS[retry_index % len(PGP_KEY_SERVERS)]
-                log.info(f'Downloading Geth Windows Builder PGP key from {key_server} ...')
-                command_line = [str(gpg_binary_path), '--keyserver', key_server,
-                    '--recv-keys', GETH_WINDOWS_PGP_KEY_ID]
+    log.info(f'Downloading geth archive {latest_build["name"]}...')
+    if download_artifact(latest_build_url, geth_archive_path, log,
+        f'geth archive {latest_build_url}', consumers=[signature_verifier]) is None:
+        signature_verifier.abort()
+        return False
 
-                process_result = subprocess.run(command_line)
-        
-        if process_result.returncode != 0:
-            log.error(
-f'''
-We failed to download the Geth Windows Builder PGP key to verify the geth
-archive after {retry_count} retries.
-'''
-            )
-            return False
-    
-    process_result = subprocess.run([
-        str(gpg_binary_path), '--verify', str(geth_archive_sig_path)])
-    if process_result.returncode != 0:
+    if not signature_verifier.finish():
         log.error('The geth archive signature is wrong. We\'ll stop here to protect you.')
         return False
     
@@ -1112,10 +1087,8 @@ def upgrade_teku(base_directory, nssm_binary):
     java_home = base_directory.joinpath('bin', 'jre')
 
     # Getting latest Teku release files
-    teku_gh_release_url = GITHUB_REST_API_URL + TEKU_LATEST_RELEASE
-    headers = {'Accept': GITHUB_API_VERSION}
     try:
-        response = httpx.get(teku_gh_release_url, headers=headers, follow_redirects=True)
+        response = get_github_release(TEKU_LATEST_RELEASE, log)
     except httpx.RequestError as exception:
         log.error(f'Cannot connect to Github. Exception {exception}')
         return False
@@ -1158,11 +1131,13 @@ def upgrade_teku(base_directory, nssm_binary):
     url_file_name = urlparse(zip_url).path.split('/')[-1]
 
     teku_archive_path = download_path.joinpath(url_file_name)
-    teku_archive_hash = hashlib.sha256()
     if teku_archive_path.is_file():
         teku_archive_path.unlink()
 
-    keep_retrying = True
+    # Use the stored archive if we already downloaded it
+    teku_archive_hexdigest = fetch_stored(zip_url, teku_archive_path, log, zip_sha256)
+
+    keep_retrying = teku_archive_hexdigest is None
 
     retry_index = 0
     retry_count = 6
@@ -1172,40 +1147,26 @@ def upgrade_teku(base_directory, nssm_binary):
     last_status_code = None
 
     while keep_retrying and retry_index < retry_count:
-        last_exception = None
-        last_status_code = None
-        try:
-            with open(teku_archive_path, 'wb') as binary_file:
-                log.info(f'Downloading teku archive {url_file_name}...')
-                with httpx.stream('GET', zip_url, follow_redirects=True) as http_stream:
-                    if http_stream.status_code != 200:
-                        log.error(f'Cannot download teku archive {zip_url}.\n'
-                            f'Unexpected status code {http_stream.status_code}')
-                        last_status_code = http_stream.status_code
-
-                        retry_index = retry_index + 1
-                        log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
-                        time.sleep(retry_delay)
-                        retry_delay = retry_delay + retry_delay_increase
-                        continue
-
-                    for data in http_stream.iter_bytes():
-                        binary_file.write(data)
-                        teku_archive_hash.update(data)
-                
-                keep_retrying = False
-
-        except httpx.RequestError as exception:
-            
-            log.error(f'Exception while downloading teku archive. Exception {exception}')
-            last_exception = exception
-
-            retry_index = retry_index + 1
-            log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
-            time.sleep(retry_delay)
-            retry_delay = retry_delay + retry_delay_increase
+        log.info(f'Downloading teku archive {url_file_name}...')
+        result = download_file(zip_url, teku_archive_path, log, f'teku archive {zip_url}')
+        last_exception = result.exception
+        last_status_code = result.status_code
+
+        if last_status_code is not None:
+            log.error(f'Cannot download teku archive {zip_url}.\n'
+                f'Unexpected status code {last_status_code}')
+        elif last_exception is not None:
+            log.error(f'Exception while downloading teku archive. Exception {last_exception}')
+        else:
+            teku_archive_hexdigest = result.sha256
+            keep_retrying = False
             continue
-    
+
+        retry_index = retry_index + 1
+        log.info(f'We will retry in {retry_delay} seconds (retry index = {retry_index})')
+        time.sleep(retry_delay)
+        retry_delay = retry_delay + retry_delay_increase
+
     if keep_retrying:
         if last_exception is not None:
             result = button_dialog(
@@ -1252,10 +1213,11 @@ is no network issue when we try to connect to the Internet.
 
     # Verify checksum
     log.info('Verifying teku archive checksum...')
-    teku_archive_hexdigest = teku_archive_hash.hexdigest()
     if teku_archive_hexdigest.lower() != zip_sha256.lower():
         log.error('Teku archive checksum does not match. We will stop here to protect you.')
         return False
+
+    store(zip_url, teku_archive_path, teku_archive_hexdigest.lower(), log)
     
     # Unzip teku archive
     archive_members = None
@@ -0,0 +1,107 @@
+import os
+import re
+import json
+import time
+
+from ethwizard.lazyimport import lazy_import
+
+from ethwizard import httpclient
+
+from ethwizard.cache import get_cache_directory
+
+from ethwizard.constants import (
+    GITHUB_REST_API_URL,
+    GITHUB_API_VERSION,
+    GITHUB_RELEASE_CACHE_NAME,
+    GITHUB_RELEASE_CACHE_TTL
+)
+
+httpx = lazy_import('httpx')
+
+# On-disk cache for Github release metadata. Fresh entries are returned without any request.
+# Stale entries are revalidated with a conditional request (If-None-Match/If-Modified-Since)
+# and a 304 response does not count against the Github API rate limit.
+
+def _cache_path(release_path):
+    cache_name = re.sub(r'[^A-Za-z0-9]+', '_', release_path.strip('/')) + '.json'
+    return get_cache_directory(GITHUB_RELEASE_CACHE_NAME).joinpath(cache_name)
+
+def _load_entry(cache_path):
+    if not cache_path.is_file():
+        return None
+
+    try:
+        with open(cache_path, 'r', encoding='utf8') as cache_file:
+            entry = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(entry, dict) or 'body' not in entry:
+        return None
+
+    return entry
+
+def _save_entry(cache_path, entry, log):
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf8') as cache_file:
+            json.dump(entry, cache_file)
+        os.replace(temp_path, cache_path)
+    except OSError as exception:
+        log.warning(f'Unable to save Github release cache {cache_path}. {exception}')
+
+def _cached_response(url, entry):
+    return httpx.Response(200, headers={'Content-Type': 'application/json'},
+        content=entry['body'].encode('utf8'), request=httpx.Request('GET', url))
+
+def get_github_release(release_path, log, ttl=GITHUB_RELEASE_CACHE_TTL):
+    # Get a Github release from the API using the cache. Returns an httpx response like
+    # httpclient.get would. httpx.RequestError is raised if we cannot connect and there is
+    # nothing in the cache.
+
+    url = GITHUB_REST_API_URL + release_path
+    cache_path = _cache_path(release_path)
+    entry = _load_entry(cache_path)
+
+    if entry is not None and time.time() - entry.get('fetched', 0) < ttl:
+        log.info(f'Using cached Github release metadata for {release_path}')
+        return _cached_response(url, entry)
+
+    headers = {'Accept': GITHUB_API_VERSION}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    try:
+        response = httpclient.get(url, headers=headers, follow_redirects=True)
+    except httpx.RequestError as exception:
+        if entry is None:
+            raise
+        log.warning(f'Exception while getting Github release {release_path}. Using cached '
+            f'release metadata. {exception}')
+        return _cached_response(url, entry)
+
+    if response.status_code == 304 and entry is not None:
+        log.info(f'Github release metadata for {release_path} was not modified')
+        entry['fetched'] = time.time()
+        _save_entry(cache_path, entry, log)
+        return _cached_response(url, entry)
+
+    if response.status_code == 200:
+        _save_entry(cache_path, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched': time.time(),
+            'body': response.text
+        }, log)
+    elif entry is not None and response.status_code in (403, 429):
+        # Rate limited, stale metadata is better than nothing
+        log.warning(f'Github API rate limit reached while getting {release_path}. Using cached '
+            f'release metadata.')
+        return _cached_response(url, entry)
+
+    return response
@@ -0,0 +1,31 @@
+import gzip
+import pkgutil
+import threading
+
+# Package data. Large text resources like the Grafana dashboards and the Windows monitoring
+# configuration files live next to this module as gzip files instead of string literals in
+# ethwizard.constants so they are only read and decompressed the first time they are used.
+# pkgutil.get_data also reads them from inside the zipapp bundle. To edit one of them,
+# decompress it with gzip -d, edit it and compress it back with gzip -9n.
+
+_resources_lock = threading.Lock()
+_resources = {}
+
+def load_resource(name) -> str:
+    # Return the content of the resource name, a path relative to this package like
+    # grafana/home-dashboard.json.gz. Raises OSError if the resource cannot be read.
+
+    with _resources_lock:
+        if name in _resources:
+            return _resources[name]
+
+        data = pkgutil.get_data(__name__, name)
+        if data is None:
+            raise OSError(f'Unable to load resource {name}')
+
+        if name.endswith('.gz'):
+            data = gzip.decompress(data)
+
+        content = data.decode('utf8')
+        _resources[name] = content
+        return content
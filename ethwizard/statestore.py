@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import threading
+
+from pathlib import Path
+
+from typing import Optional
+
+from ethwizard.constants import (
+    STATE_FILE,
+    STATE_JOURNAL_FILE,
+    STATE_JOURNAL_COMPACT_THRESHOLD
+)
+
+# Wizard state store. The state is kept in a snapshot file that is written atomically
+# (temporary file, fsync and rename) and in an append-only journal of context changes. Saving
+# only appends the context keys that changed since the last save and nothing is written when
+# nothing changed. The journal is replayed on load and compacted into a new snapshot once it
+# holds STATE_JOURNAL_COMPACT_THRESHOLD records.
+
+log = logging.getLogger(__name__)
+
+_stores_lock = threading.Lock()
+_stores = {}
+
+def _fsync_directory(directory):
+    # Make a rename durable. Directories cannot be opened on Windows.
+    if os.name == 'nt':
+        return
+    directory_fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(directory_fd)
+    finally:
+        os.close(directory_fd)
+
+def write_file_atomically(file_path, content):
+    file_path = Path(file_path)
+    temp_path = file_path.with_name(file_path.name + '.tmp')
+    with open(temp_path, 'w', encoding='utf8') as output_file:
+        output_file.write(content)
+        output_file.flush()
+        os.fsync(output_file.fileno())
+    os.replace(temp_path, file_path)
+    _fsync_directory(file_path.parent)
+
+def _serialize_context(context):
+    return {key: json.dumps(value, sort_keys=True) for key, value in context.items()}
+
+def _join_serialized(serialized):
+    # Build a JSON object from already serialized values
+    members = (f'{json.dumps(key)}: {value}' for key, value in serialized.items())
+    return '{' + ', '.join(members) + '}'
+
+class StateStore:
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.snapshot_path = self.directory.joinpath(STATE_FILE)
+        self.journal_path = self.directory.joinpath(STATE_JOURNAL_FILE)
+
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._step = None
+        self._persisted = None
+        self._journal_records = 0
+
+    def load(self) -> Optional[dict]:
+        # Return the saved state as a dict with step and context keys or None if there is no
+        # usable saved state.
+
+        with self._lock:
+            if not self.snapshot_path.is_file():
+                return None
+
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf8') as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+            except ValueError as exception:
+                log.error(f'Saved wizard state {self.snapshot_path} is corrupted. {exception}')
+                return None
+
+            if not isinstance(snapshot, dict):
+                log.error(f'Saved wizard state {self.snapshot_path} is corrupted.')
+                return None
+
+            generation = snapshot.get('generation', 0)
+            step = snapshot.get('step')
+            context = snapshot.get('context', {})
+            journal_records = 0
+
+            if self.journal_path.is_file():
+                with open(self.journal_path, 'rb+') as journal_file:
+                    valid_length = 0
+                    for line in journal_file:
+                        try:
+                            if not line.endswith(b'\n'):
+                                raise ValueError('Missing end of record')
+                            record = json.loads(line)
+                        except ValueError:
+                            # Incomplete last record from an interrupted save. Drop it so new
+                            # records are not appended to it.
+                            log.warning(f'Ignoring incomplete record in {self.journal_path}.')
+                            journal_file.truncate(valid_length)
+                            break
+
+                        valid_length = valid_length + len(line)
+
+                        if record.get('generation') != generation:
+                            # Leftover from before the last compaction
+                            continue
+
+                        context.update(record.get('set', {}))
+                        for key in record.get('unset', []):
+                            context.pop(key, None)
+                        step = record.get('step', step)
+                        journal_records = journal_records + 1
+
+            self._generation = generation
+            self._step = step
+            self._persisted = _serialize_context(context)
+            self._journal_records = journal_records
+
+            return {
+                'step': step,
+                'context': context
+            }
+
+    def save(self, step_id: str, context: dict) -> bool:
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+            serialized = _serialize_context(context)
+
+            if (
+                self._persisted is None or
+                self._journal_records >= STATE_JOURNAL_COMPACT_THRESHOLD
+                ):
+                self._compact(step_id, serialized)
+                return True
+
+            changed = {
+                key: value for key, value in serialized.items()
+                if self._persisted.get(key) != value
+            }
+            removed = [key for key in self._persisted if key not in serialized]
+
+            if len(changed) == 0 and len(removed) == 0 and step_id == self._step:
+                return True
+
+            record = (f'{{"generation": {self._generation}, "step": {json.dumps(step_id)}, '
+                f'"set": {_join_serialized(changed)}, "unset": {json.dumps(removed)}}}\n')
+
+            with open(self.journal_path, 'a', encoding='utf8') as journal_file:
+                journal_file.write(record)
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+            self._persisted.update(changed)
+            for key in removed:
+                del self._persisted[key]
+            self._step = step_id
+            self._journal_records = self._journal_records + 1
+
+            return True
+
+    def _compact(self, step_id, serialized):
+        # Write a complete snapshot and start a new journal generation
+        generation = self._generation + 1
+
+        write_file_atomically(self.snapshot_path, f'{{"generation": {generation}, '
+            f'"step": {json.dumps(step_id)}, "context": {_join_serialized(serialized)}}}')
+
+        if self.journal_path.is_file():
+            self.journal_path.unlink()
+
+        self._generation = generation
+        self._step = step_id
+        self._persisted = serialized
+        self._journal_records = 0
+
+def get_state_store(directory) -> StateStore:
+    # Return the state store for directory, sharing it between callers
+    directory = Path(directory)
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            store = StateStore(directory)
+            _stores[directory] = store
+        return store
@@ -0,0 +1,228 @@
+import os
+import sys
+import logging
+import time
+import threading
+
+from ethwizard.lazyimport import lazy_import
+
+from ethwizard.cache import get_cache_directory
+from ethwizard.download import get_downloaded_bytes
+
+from ethwizard.constants import (
+    STEP_PROFILER_ENV,
+    STEP_PROFILE_STEPS_ENV,
+    STEP_PROFILE_CACHE_NAME
+)
+
+humanize = lazy_import('humanize')
+
+# Step instrumentation. StepTimer measures the wall time, the CPU time, the bytes downloaded,
+# the subprocesses spawned and the time spent waiting on dialogs while a step runs. The counters
+# are process wide so steps that ran at the same time as other steps are marked as overlapped:
+# their counters include the activity of those other steps. A profiler can be attached to each
+# step by setting the ETHWIZARD_PROFILER environment variable to cprofile or pyinstrument.
+# ETHWIZARD_PROFILE_STEPS can limit profiling to a comma separated list of step ids.
+
+log = logging.getLogger(__name__)
+
+_counters_lock = threading.Lock()
+_subprocesses = 0
+_input_time = 0.0
+
+_installed = False
+_install_lock = threading.Lock()
+
+def _audit_hook(event, args):
+    global _subprocesses
+    if event == 'subprocess.Popen' or event == 'os.system':
+        with _counters_lock:
+            _subprocesses = _subprocesses + 1
+
+def _add_input_time(duration):
+    global _input_time
+    with _counters_lock:
+        _input_time = _input_time + duration
+
+def _timed_application_run(application_run):
+    # Wrap Application.run to measure how long dialogs wait for the user. Dialogs doing work
+    # while they are shown, like progress_log_dialog, report it in their work_time attribute.
+
+    def run(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            return application_run(self, *args, **kwargs)
+        finally:
+            duration = time.monotonic() - started - getattr(self, 'work_time', 0.0)
+            _add_input_time(max(duration, 0.0))
+
+    run.__wrapped__ = application_run
+    return run
+
+def install_instrumentation():
+    # Start counting subprocesses and dialog time. Safe to call more than once.
+    global _installed
+
+    with _install_lock:
+        if _installed:
+            return
+
+        from prompt_toolkit.application import Application
+
+        sys.addaudithook(_audit_hook)
+        Application.run = _timed_application_run(Application.run)
+        _installed = True
+
+def _children_cpu_time():
+    # CPU time used by terminated child processes. Always 0 on Windows.
+    times = os.times()
+    return times.children_user + times.children_system
+
+def _read_counters():
+    with _counters_lock:
+        return {
+            'downloaded_bytes': get_downloaded_bytes(),
+            'subprocesses': _subprocesses,
+            'input_time': _input_time,
+            'children_cpu_time': _children_cpu_time()
+        }
+
+def _get_profiler(step_id):
+    # Return the name of the profiler to use for step_id or None
+    profiler = os.getenv(STEP_PROFILER_ENV, '').strip().lower()
+    if profiler not in ('cprofile', 'pyinstrument'):
+        return None
+
+    profile_steps = os.getenv(STEP_PROFILE_STEPS_ENV, '').strip()
+    if profile_steps != '':
+        step_ids = [value.strip() for value in profile_steps.split(',')]
+        if step_id not in step_ids:
+            return None
+
+    return profiler
+
+class StepTimer:
+    # Measure a single step run. The profiler, when enabled, only sees the thread running
+    # the step.
+
+    def __init__(self, step_id):
+        self.step_id = step_id
+
+        self.overlapped = False
+        self.metrics = None
+
+        self._started = None
+        self._thread_started = None
+        self._counters = None
+        self._profiler_name = None
+        self._profiler = None
+
+    def start(self):
+        install_instrumentation()
+
+        self._profiler_name = _get_profiler(self.step_id)
+        if self._profiler_name == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif self._profiler_name == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                log.warning('pyinstrument is not installed. Steps will not be profiled.')
+                self._profiler_name = None
+            else:
+                self._profiler = Profiler()
+                self._profiler.start()
+
+        self._counters = _read_counters()
+        self._started = time.monotonic()
+        self._thread_started = time.thread_time()
+
+    def stop(self) -> dict:
+        # Stop measuring and return the step metrics
+        wall_time = time.monotonic() - self._started
+        thread_time = time.thread_time() - self._thread_started
+        counters = _read_counters()
+
+        self._stop_profiler()
+
+        self.metrics = {
+            'wall_time': round(wall_time, 3),
+            'cpu_time': round(thread_time +
+                counters['children_cpu_time'] - self._counters['children_cpu_time'], 3),
+            'downloaded_bytes': counters['downloaded_bytes'] - self._counters['downloaded_bytes'],
+            'subprocesses': counters['subprocesses'] - self._counters['subprocesses'],
+            'input_time': round(counters['input_time'] - self._counters['input_time'], 3),
+            'overlapped': self.overlapped
+        }
+
+        return self.metrics
+
+    def _stop_profiler(self):
+        if self._profiler is None:
+            return
+
+        profiles_directory = get_cache_directory(STEP_PROFILE_CACHE_NAME)
+        try:
+            profiles_directory.mkdir(parents=True, exist_ok=True)
+            if self._profiler_name == 'cprofile':
+                self._profiler.disable()
+                profile_path = profiles_directory.joinpath(f'{self.step_id}.prof')
+                self._profiler.dump_stats(str(profile_path))
+            else:
+                self._profiler.stop()
+                profile_path = profiles_directory.joinpath(f'{self.step_id}.html')
+                with open(profile_path, 'w', encoding='utf8') as profile_file:
+                    profile_file.write(self._profiler.output_html())
+            log.info(f'Saved profile for step {self.step_id} in {profile_path}')
+        except OSError as exception:
+            log.warning(f'Unable to save profile for step {self.step_id}. {exception}')
+        finally:
+            self._profiler = None
+
+def format_step_metrics(step_metrics) -> str:
+    # Return a summary table of the step metrics saved in the context
+
+    if not step_metrics:
+        return 'No step timing recorded.'
+
+    header = ('Step', 'Wall', 'CPU', 'Input', 'Download', 'Procs')
+    rows = []
+    totals = {'wall_time': 0.0, 'cpu_time': 0.0, 'input_time': 0.0, 'downloaded_bytes': 0,
+        'subprocesses': 0}
+
+    for step_id, metrics in step_metrics.items():
+        for key in totals:
+            totals[key] = totals[key] + metrics.get(key, 0)
+        name = step_id + ('*' if metrics.get('overlapped') else '')
+        rows.append((
+            name,
+            f'{metrics.get("wall_time", 0.0):.1f}s',
+            f'{metrics.get("cpu_time", 0.0):.1f}s',
+            f'{metrics.get("input_time", 0.0):.1f}s',
+            humanize.naturalsize(metrics.get('downloaded_bytes', 0), binary=True),
+            str(metrics.get('subprocesses', 0))
+        ))
+
+    rows.append((
+        'total',
+        f'{totals["wall_time"]:.1f}s',
+        f'{totals["cpu_time"]:.1f}s',
+        f'{totals["input_time"]:.1f}s',
+        humanize.naturalsize(totals['downloaded_bytes'], binary=True),
+        str(totals['subprocesses'])
+    ))
+
+    widths = [max(len(row[column]) for row in [header] + rows) for column in range(len(header))]
+
+    def format_row(row):
+        cells = [row[0].ljust(widths[0])]
+        cells.extend(cell.rjust(widths[column + 1]) for column, cell in enumerate(row[1:]))
+        return '  '.join(cells)
+
+    lines = ['Step timing (* ran alongside other steps, counters are shared):',
+        format_row(header)]
+    lines.extend(format_row(row) for row in rows)
+
+    return '\n'.join(lines)
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import struct
+
+# Keccak and SHA-3 hash functions with the same API as CompactFIPS202.
+#
+# Keccak_256 is delegated to pycryptodome or pysha3 when one of them is installed. hashlib only
+# implements the FIPS 202 padding so it backs SHA3_* and SHAKE* but not Keccak_256, which uses
+# the original Keccak padding like Ethereum does. Without those libraries, the Keccak-f[1600]
+# permutation below works on a flat list of 25 lanes with the rotation offsets inlined in an
+# unrolled round and precomputed round constants. It is much faster than CompactFIPS202 which
+# is kept as the reference implementation.
+
+try:
+    from Crypto.Hash import keccak as _pycryptodome_keccak
+except ImportError:
+    _pycryptodome_keccak = None
+
+try:
+    import sha3 as _pysha3
+except ImportError:
+    _pysha3 = None
+
+_MASK = (1 << 64) - 1
+
+ROUND_CONSTANTS = (
+    0x0000000000000001, 0x0000000000008082, 0x800000000000808A,
+    0x8000000080008000, 0x000000000000808B, 0x0000000080000001,
+    0x8000000080008081, 0x8000000000008009, 0x000000000000008A,
+    0x0000000000000088, 0x0000000080008009, 0x000000008000000A,
+    0x000000008000808B, 0x800000000000008B, 0x8000000000008089,
+    0x8000000000008003, 0x8000000000008002, 0x8000000000000080,
+    0x000000000000800A, 0x800000008000000A, 0x8000000080008081,
+    0x8000000000008080, 0x0000000080000001, 0x8000000080008008,
+)
+
+# Rotation offsets indexed by x + 5 * y. They are inlined in KeccakF1600onLanes.
+ROTATION_OFFSETS = (
+    0, 1, 62, 28, 27,
+    36, 44, 6, 55, 20,
+    3, 10, 43, 25, 39,
+    41, 45, 15, 21, 8,
+    18, 2, 61, 56, 14,
+)
+
+_STATE_STRUCT = struct.Struct('<25Q')
+
+def KeccakF1600onLanes(lanes):
+    # Apply Keccak-f[1600] to a list of 25 lanes indexed by x + 5 * y
+    (
+        a00, a01, a02, a03, a04, a05, a06, a07, a08, a09, a10, a11, a12, a13, a14, a15, a16,
+        a17, a18, a19, a20, a21, a22, a23, a24
+    ) = lanes
+    mask = _MASK
+
+    for rc in ROUND_CONSTANTS:
+        # θ
+        c0 = a00 ^ a05 ^ a10 ^ a15 ^ a20
+        c1 = a01 ^ a06 ^ a11 ^ a16 ^ a21
+        c2 = a02 ^ a07 ^ a12 ^ a17 ^ a22
+        c3 = a03 ^ a08 ^ a13 ^ a18 ^ a23
+        c4 = a04 ^ a09 ^ a14 ^ a19 ^ a24
+        d0 = c4 ^ (((c1 << 1) | (c1 >> 63)) & mask)
+        d1 = c0 ^ (((c2 << 1) | (c2 >> 63)) & mask)
+        d2 = c1 ^ (((c3 << 1) | (c3 >> 63)) & mask)
+        d3 = c2 ^ (((c4 << 1) | (c4 >> 63)) & mask)
+        d4 = c3 ^ (((c0 << 1) | (c0 >> 63)) & mask)
+        # ρ and π
+        b00 = a00 ^ d0
+        t = a01 ^ d1
+        b10 = ((t << 1) | (t >> 63)) & mask
+        t = a02 ^ d2
+        b20 = ((t << 62) | (t >> 2)) & mask
+        t = a03 ^ d3
+        b05 = ((t << 28) | (t >> 36)) & mask
+        t = a04 ^ d4
+        b15 = ((t << 27) | (t >> 37)) & mask
+        t = a05 ^ d0
+        b16 = ((t << 36) | (t >> 28)) & mask
+        t = a06 ^ d1
+        b01 = ((t << 44) | (t >> 20)) & mask
+        t = a07 ^ d2
+        b11 = ((t << 6) | (t >> 58)) & mask
+        t = a08 ^ d3
+        b21 = ((t << 55) | (t >> 9)) & mask
+        t = a09 ^ d4
+        b06 = ((t << 20) | (t >> 44)) & mask
+        t = a10 ^ d0
+        b07 = ((t << 3) | (t >> 61)) & mask
+        t = a11 ^ d1
+        b17 = ((t << 10) | (t >> 54)) & mask
+        t = a12 ^ d2
+        b02 = ((t << 43) | (t >> 21)) & mask
+        t = a13 ^ d3
+        b12 = ((t << 25) | (t >> 39)) & mask
+        t = a14 ^ d4
+        b22 = ((t << 39) | (t >> 25)) & mask
+        t = a15 ^ d0
+        b23 = ((t << 41) | (t >> 23)) & mask
+        t = a16 ^ d1
+        b08 = ((t << 45) | (t >> 19)) & mask
+        t = a17 ^ d2
+        b18 = ((t << 15) | (t >> 49)) & mask
+        t = a18 ^ d3
+        b03 = ((t << 21) | (t >> 43)) & mask
+        t = a19 ^ d4
+        b13 = ((t << 8) | (t >> 56)) & mask
+        t = a20 ^ d0
+        b14 = ((t << 18) | (t >> 46)) & mask
+        t = a21 ^ d1
+        b24 = ((t << 2) | (t >> 62)) & mask
+        t = a22 ^ d2
+        b09 = ((t << 61) | (t >> 3)) & mask
+        t = a23 ^ d3
+        b19 = ((t << 56) | (t >> 8)) & mask
+        t = a24 ^ d4
+        b04 = ((t << 14) | (t >> 50)) & mask
+        # χ and ι
+        a00 = b00 ^ (~b01 & b02) ^ rc
+        a01 = b01 ^ (~b02 & b03)
+        a02 = b02 ^ (~b03 & b04)
+        a03 = b03 ^ (~b04 & b00)
+        a04 = b04 ^ (~b00 & b01)
+        a05 = b05 ^ (~b06 & b07)
+        a06 = b06 ^ (~b07 & b08)
+        a07 = b07 ^ (~b08 & b09)
+        a08 = b08 ^ (~b09 & b05)
+        a09 = b09 ^ (~b05 & b06)
+        a10 = b10 ^ (~b11 & b12)
+        a11 = b11 ^ (~b12 & b13)
+        a12 = b12 ^ (~b13 & b14)
+        a13 = b13 ^ (~b14 & b10)
+        a14 = b14 ^ (~b10 & b11)
+        a15 = b15 ^ (~b16 & b17)
+        a16 = b16 ^ (~b17 & b18)
+        a17 = b17 ^ (~b18 & b19)
+        a18 = b18 ^ (~b19 & b15)
+        a19 = b19 ^ (~b15 & b16)
+        a20 = b20 ^ (~b21 & b22)
+        a21 = b21 ^ (~b22 & b23)
+        a22 = b22 ^ (~b23 & b24)
+        a23 = b23 ^ (~b24 & b20)
+        a24 = b24 ^ (~b20 & b21)
+
+    return [
+        a00, a01, a02, a03, a04, a05, a06, a07, a08, a09, a10, a11, a12, a13, a14, a15, a16,
+        a17, a18, a19, a20, a21, a22, a23, a24
+    ]
+
+def KeccakF1600(state):
+    lanes = KeccakF1600onLanes(list(_STATE_STRUCT.unpack(bytes(state))))
+    return bytearray(_STATE_STRUCT.pack(*lanes))
+
+def Keccak(rate, capacity, inputBytes, delimitedSuffix, outputByteLen):
+    if (((rate + capacity) != 1600) or ((rate % 64) != 0)):
+        return
+    rateInBytes = rate//8
+    rateInLanes = rate//64
+    block_struct = struct.Struct(f'<{rateInLanes}Q')
+
+    # === Pad the input to a whole number of blocks ===
+    inputBytes = bytes(inputBytes)
+    padding = bytearray(rateInBytes - (len(inputBytes) % rateInBytes))
+    padding[0] = delimitedSuffix
+    if ((delimitedSuffix & 0x80) != 0) and (len(padding) == 1):
+        # The suffix fills the last byte of the block, the final bit goes in a new block
+        padding = padding + bytearray(rateInBytes)
+    padding[-1] = padding[-1] ^ 0x80
+    paddedBytes = inputBytes + bytes(padding)
+
+    # === Absorb all the input blocks ===
+    lanes = [0] * 25
+    for offset in range(0, len(paddedBytes), rateInBytes):
+        block = block_struct.unpack_from(paddedBytes, offset)
+        for i in range(rateInLanes):
+            lanes[i] = lanes[i] ^ block[i]
+        lanes = KeccakF1600onLanes(lanes)
+
+    # === Squeeze out all the output blocks ===
+    outputBytes = bytearray()
+    while True:
+        outputBytes = outputBytes + block_struct.pack(*lanes[:rateInLanes])
+        if len(outputBytes) >= outputByteLen:
+            return outputBytes[:outputByteLen]
+        lanes = KeccakF1600onLanes(lanes)
+
+def _hashlib_digest(name, inputBytes, outputByteLen=None):
+    # Return the digest from hashlib or None if the algorithm is not available
+    try:
+        hash_object = hashlib.new(name, bytes(inputBytes))
+    except ValueError:
+        return None
+    if outputByteLen is None:
+        return bytearray(hash_object.digest())
+    return bytearray(hash_object.digest(outputByteLen))
+
+def SHAKE128(inputBytes, outputByteLen):
+    outputBytes = _hashlib_digest('shake_128', inputBytes, outputByteLen)
+    if outputBytes is not None:
+        return outputBytes
+    return Keccak(1344, 256, inputBytes, 0x1F, outputByteLen)
+
+def SHAKE256(inputBytes, outputByteLen):
+    outputBytes = _hashlib_digest('shake_256', inputBytes, outputByteLen)
+    if outputBytes is not None:
+        return outputBytes
+    return Keccak(1088, 512, inputBytes, 0x1F, outputByteLen)
+
+def SHA3_224(inputBytes):
+    outputBytes = _hashlib_digest('sha3_224', inputBytes)
+    if outputBytes is not None:
+        return outputBytes
+    return Keccak(1152, 448, inputBytes, 0x06, 224//8)
+
+def SHA3_256(inputBytes):
+    outputBytes = _hashlib_digest('sha3_256', inputBytes)
+    if outputBytes is not None:
+        return outputBytes
+    return Keccak(1088, 512, inputBytes, 0x06, 256//8)
+
+def Keccak_256(inputBytes):
+    if _pycryptodome_keccak is not None:
+        return bytearray(_pycryptodome_keccak.new(data=bytes(inputBytes), digest_bits=256).digest())
+    if _pysha3 is not None:
+        return bytearray(_pysha3.keccak_256(bytes(inputBytes)).digest())
+    return Keccak(1088, 512, inputBytes, 0x01, 256//8)
+
+def SHA3_384(inputBytes):
+    outputBytes = _hashlib_digest('sha3_384', inputBytes)
+    if outputBytes is not None:
+        return outputBytes
+    return Keccak(832, 768, inputBytes, 0x06, 384//8)
+
+def SHA3_512(inputBytes):
+    outputBytes = _hashlib_digest('sha3_512', inputBytes)
+    if outputBytes is not None:
+        return outputBytes
+    return Keccak(576, 1024, inputBytes, 0x06, 512//8)
@@ -1,15 +1,23 @@
+import os
 import sys
 
 from ethwizard import __version__
 
 from prompt_toolkit.formatted_text import HTML
-from prompt_toolkit.shortcuts import button_dialog
+
+from ethwizard.constants import (
+    HEADLESS_ANSWERS_ENV,
+    HEADLESS_ANSWERS_ARGUMENT
+)
+
+from ethwizard.headless import button_dialog, is_headless, load_answers
 
 from ethwizard.platforms import (
     get_install_steps,
     supported_platform,
     has_su_perm,
     init_logging,
+    get_log,
     quit_app,
     get_save_state,
     get_load_state,
@@ -30,6 +38,10 @@ def run():
     
     init_logging(platform)
 
+    answers_path = get_answers_path()
+    if answers_path is not None and not load_answers(answers_path, get_log(platform)):
+        quit_app(platform)
+
     if not has_su_perm(platform):
         # User is not a super user
         show_not_su()
@@ -41,6 +53,21 @@ def run():
 
     self_update()
 
+    # Detect if installation is already started and resume if needed
+    saved_state = get_load_state(platform)()
+
+    # If the wizard was completed, enter maintenance. The installation steps and their
+    # dependencies are not loaded in this case.
+    if is_completed_state(saved_state):
+        if is_headless():
+            get_log(platform).info('Installation is already completed. Maintenance is '
+                'not available when running headless.')
+            quit_app(platform)
+
+        # Enter maintenance mode
+        enter_maintenance(platform, saved_state['context'])
+        quit_app(platform)
+
     steps = get_install_steps(platform)
     if not steps:
         # Steps were not found for the current platform
@@ -55,19 +82,11 @@ def run():
     
     sequence = StepSequence(steps=steps(), save_state=save_state)
 
-    # Detect if installation is already started and resume if needed
-    saved_state = get_load_state(platform)()
     if (
         saved_state is not None and
         'step' in saved_state and
         'context' in saved_state
         ):
-        # If the wizard was completed, enter maintenance
-        if is_completed_state(saved_state):
-            # Enter maintenance mode
-            enter_maintenance(platform, saved_state['context'])
-            quit_app(platform)
-        
         # Check if we might be able to resume from an earlier execution
         saved_step = sequence.get_step(saved_state['step'])
         if saved_step is not None:
@@ -90,6 +109,19 @@ def run():
     sequence.run_from_start()
     quit_app(platform)
 
+def get_answers_path():
+    # Return the answers file path given with --answers or ETHWIZARD_ANSWERS, None if there is
+    # none. An answers file makes the wizard run headless.
+
+    arguments = sys.argv[1:]
+    for index, argument in enumerate(arguments):
+        if argument == HEADLESS_ANSWERS_ARGUMENT and index + 1 < len(arguments):
+            return arguments[index + 1]
+        if argument.startswith(HEADLESS_ANSWERS_ARGUMENT + '='):
+            return argument[len(HEADLESS_ANSWERS_ARGUMENT) + 1:]
+
+    return os.getenv(HEADLESS_ANSWERS_ENV)
+
 def show_welcome():
     # Show a welcome message about this wizard
 
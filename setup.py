@@ -11,6 +11,31 @@ from setuptools import Command
 with open('ethwizard/__init__.py', 'rt') as f:
     version = re.search(r'__version__ = \'(.*?)\'', f.read()).group(1)
 
+# Directories from the installed requirements that the wizard never imports
+PRUNED_DIRECTORY_NAMES = ['tests', 'test', 'testing', 'docs', 'doc', 'examples']
+PRUNED_PACKAGE_PATHS = [
+    Path('bin'),
+    Path('prompt_toolkit', 'contrib', 'completers'),
+    Path('prompt_toolkit', 'contrib', 'regular_languages'),
+    Path('prompt_toolkit', 'contrib', 'ssh'),
+    Path('prompt_toolkit', 'contrib', 'telnet'),
+]
+PRUNED_FILE_SUFFIXES = ['.pyi', '.typed']
+
+# Compile the bundle with the target python binary. Bytecode is written next to each source
+# file (legacy layout) because zipimport does not read __pycache__ directories. Unchecked
+# hash based .pyc files are not validated against the zip timestamps of the sources and a
+# python version using a different bytecode falls back to the sources.
+COMPILE_SCRIPT = '''
+import compileall
+import py_compile
+import sys
+
+result = compileall.compile_dir(sys.argv[1], quiet=1, legacy=True, optimize=int(sys.argv[2]),
+    invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+sys.exit(0 if result else 1)
+'''
+
 def get_python_binary():
     try:
         process_result = subprocess.run(['python3', '--version'])
@@ -67,11 +92,60 @@ def include_requirements(target_path):
             if entry.name.endswith('.dist-info'):
                 shutil.rmtree(entry.path)
 
-def create_zipapp():
+    prune_requirements(target_path)
+
+def prune_requirements(target_path):
+    # Remove tests, docs and unused subpackages from the installed requirements
+    target_path = Path(target_path)
+    pruned_size = 0
+
+    for package_path in PRUNED_PACKAGE_PATHS:
+        pruned_path = target_path.joinpath(package_path)
+        if pruned_path.is_dir():
+            pruned_size = pruned_size + get_directory_size(pruned_path)
+            shutil.rmtree(pruned_path)
+
+    dir_list = []
+    dir_list.append(target_path)
+    while len(dir_list) > 0:
+        next_dir = dir_list.pop()
+        with os.scandir(next_dir) as it:
+            for entry in it:
+                if next_dir == target_path and entry.name == 'ethwizard':
+                    continue
+                if entry.is_dir():
+                    if entry.name in PRUNED_DIRECTORY_NAMES:
+                        pruned_size = pruned_size + get_directory_size(entry.path)
+                        shutil.rmtree(entry.path)
+                    else:
+                        dir_list.append(entry.path)
+                elif any(entry.name.endswith(suffix) for suffix in PRUNED_FILE_SUFFIXES):
+                    pruned_size = pruned_size + entry.stat().st_size
+                    os.unlink(entry.path)
+
+    print(f'Pruned {pruned_size / 1024 / 1024:.1f} MiB of tests, docs and unused packages from '
+        f'the requirements')
+
+def get_directory_size(directory_path):
+    size = 0
+    for root, dirs, files in os.walk(directory_path):
+        for name in files:
+            size = size + os.path.getsize(os.path.join(root, name))
+    return size
+
+def compile_bundle(build_path, python_binary, optimize):
+    # Precompile every module in build_path for python_binary
+    process_result = subprocess.run([
+        python_binary, '-c', COMPILE_SCRIPT, build_path, str(optimize)
+    ])
+    return process_result.returncode == 0
+
+def create_zipapp(python_binary=None, precompile=True, optimize=1, compress=True):
     project_path = Path(os.getcwd())
     src_package_path = Path(project_path, 'ethwizard')
 
-    python_binary = get_python_binary()
+    if python_binary is None:
+        python_binary = get_python_binary()
 
     # Create and clean the build dir
     build_path = Path(project_path, 'build')
@@ -91,6 +165,12 @@ def create_zipapp():
 
     include_requirements(build_path)
 
+    if precompile:
+        print(f'Compiling bundle with {python_binary} (optimization level {optimize})...')
+        if not compile_bundle(build_path, python_binary, optimize):
+            print('Unable to compile every module. Modules that failed will be compiled when '
+                'they are imported.')
+
     # Bundle with zipapp
     dist_path = Path(project_path, 'dist')
     dist_path.mkdir(parents=True, exist_ok=True)
@@ -100,10 +180,13 @@ def create_zipapp():
     if bundle_path.is_file():
         bundle_path.unlink()
     
-    subprocess.run([
+    zipapp_args = [
         python_binary, '-m', 'zipapp', build_path, '-p', '/usr/bin/env python3',
-        '-c', '-o', bundle_path
-    ])
+        '-o', bundle_path
+    ]
+    if compress:
+        zipapp_args.append('-c')
+    subprocess.run(zipapp_args)
 
     return bundle_path
 
@@ -112,16 +195,30 @@ class Bundle(Command):
     '''
     description = 'create a bundle for release'
 
-    user_options = []
+    user_options = [
+        ('python=', None, 'python binary of the target version used to compile the bundle'),
+        ('optimize=', 'O', 'bytecode optimization level: 0, 1 or 2 [default: 1]'),
+        ('no-compile', None, 'do not include precompiled bytecode in the bundle'),
+        ('stored', None, 'store the bundle files uncompressed for faster imports'),
+    ]
+
+    boolean_options = ['no-compile', 'stored']
 
     def initialize_options(self):
-        pass
+        self.python = None
+        self.optimize = 1
+        self.no_compile = False
+        self.stored = False
 
     def finalize_options(self):
-        pass
+        self.optimize = int(self.optimize)
+        if self.optimize not in (0, 1, 2):
+            raise ValueError('optimize must be 0, 1 or 2')
 
     def run(self):
-        bundle_path = create_zipapp()
+        bundle_path = create_zipapp(python_binary=self.python,
+            precompile=not self.no_compile, optimize=self.optimize,
+            compress=not self.stored)
 
         project_path = Path(os.getcwd())
         dist_path = Path(project_path, 'dist')
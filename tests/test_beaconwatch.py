@@ -0,0 +1,217 @@
+import unittest
+
+from unittest import mock
+
+import httpx
+
+from ethwizard import httpclient
+
+from ethwizard.beaconwatch import BeaconNodeWatcher
+
+from ethwizard.constants import (
+    BN_EVENTS_EP,
+    BN_WATCHER_MIN_POLL_INTERVAL,
+    BN_WATCHER_MAX_POLL_INTERVAL
+)
+
+BASE_URL = 'http://127.0.0.1:5052'
+
+class ChunkedStream(httpx.SyncByteStream):
+    # Response body sent in the given chunks, like a stream read while the node writes it
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+class EventsStreamTest(unittest.TestCase):
+
+    def setUp(self):
+        self.watcher = BeaconNodeWatcher(BASE_URL)
+        self.events = []
+        patcher = mock.patch.object(self.watcher, '_handle_event',
+            side_effect=lambda event_name, data: self.events.append((event_name, data)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        httpclient.close_clients()
+
+    def consume(self, chunks, status_code=200):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(status_code, stream=ChunkedStream(chunks))
+
+        httpclient.close_clients()
+        httpclient._client = httpx.Client(transport=httpx.MockTransport(handler))
+
+        received = self.watcher._consume_events()
+
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0].url.path, BN_EVENTS_EP)
+        self.assertEqual(requests[0].headers['accept'], 'text/event-stream')
+        return received
+
+    def test_single_event(self):
+        received = self.consume([b'event: head\ndata: {"slot":"10"}\n\n'])
+
+        self.assertTrue(received)
+        self.assertEqual(self.events, [('head', '{"slot":"10"}')])
+        self.assertTrue(self.watcher.events_connected)
+
+    def test_multiline_data(self):
+        self.consume([
+            b'event: chain_reorg\n'
+            b'data: {"slot":"10",\n'
+            b'data: "depth":"2"}\n'
+            b'\n'
+        ])
+
+        self.assertEqual(self.events, [('chain_reorg', '{"slot":"10",\n"depth":"2"}')])
+
+    def test_comments_are_ignored(self):
+        self.consume([
+            b': keep-alive\n'
+            b'\n'
+            b'event: head\n'
+            b':comment within an event\n'
+            b'data: {"slot":"11"}\n'
+            b'\n'
+            b':\n'
+        ])
+
+        self.assertEqual(self.events, [('head', '{"slot":"11"}')])
+
+    def test_crlf_line_endings(self):
+        self.consume([
+            b'event: head\r\ndata: {"slot":"12"}\r\n\r\n'
+            b'event: finalized_checkpoint\r\ndata: {"epoch":"3"}\r\n\r\n'
+        ])
+
+        self.assertEqual(self.events, [
+            ('head', '{"slot":"12"}'),
+            ('finalized_checkpoint', '{"epoch":"3"}')
+        ])
+
+    def test_events_split_across_chunks(self):
+        stream = (
+            b'event: head\r\ndata: {"slot":"13"}\r\n\r\n'
+            b'event: finalized_checkpoint\ndata: {"epoch":"4"}\n\n'
+        )
+        # Every split point, including between \r and \n
+        for split_at in range(1, len(stream)):
+            with self.subTest(split_at=split_at):
+                self.events.clear()
+                self.consume([stream[:split_at], stream[split_at:]])
+                self.assertEqual(self.events, [
+                    ('head', '{"slot":"13"}'),
+                    ('finalized_checkpoint', '{"epoch":"4"}')
+                ])
+
+        self.events.clear()
+        self.consume([bytes([byte]) for byte in stream])
+        self.assertEqual(len(self.events), 2)
+
+    def test_incomplete_event_is_not_dispatched(self):
+        received = self.consume([b'event: head\ndata: {"slot":"14"}\n'])
+
+        self.assertFalse(received)
+        self.assertEqual(self.events, [])
+
+    def test_events_not_supported(self):
+        received = self.consume([b'not found'], status_code=404)
+
+        self.assertFalse(received)
+        self.assertFalse(self.watcher.events_supported)
+        self.assertEqual(self.events, [])
+
+class EventsReconnectTest(unittest.TestCase):
+
+    def run_events_loop(self, outcomes):
+        # Run the events loop where each connection has the next outcome: True or False for
+        # the value returned by _consume_events or an exception to raise. Returns the delays
+        # waited before reconnecting.
+        watcher = BeaconNodeWatcher(BASE_URL)
+        outcomes = list(outcomes)
+        delays = []
+
+        def consume_events():
+            watcher.events_connected = True
+            if not outcomes:
+                watcher._stopping.set()
+                return False
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        def wait(timeout=None):
+            delays.append(timeout)
+            return watcher._stopping.is_set()
+
+        with mock.patch.object(watcher, '_consume_events', side_effect=consume_events), \
+            mock.patch.object(watcher._stopping, 'wait', side_effect=wait):
+            watcher._events_loop()
+
+        self.assertFalse(watcher.events_connected)
+        return delays
+
+    def test_backoff_when_stream_closes_without_events(self):
+        delays = self.run_events_loop([False] * 6)
+
+        self.assertEqual(delays, [
+            BN_WATCHER_MIN_POLL_INTERVAL,
+            BN_WATCHER_MIN_POLL_INTERVAL * 2,
+            BN_WATCHER_MIN_POLL_INTERVAL * 4,
+            BN_WATCHER_MIN_POLL_INTERVAL * 8,
+            BN_WATCHER_MAX_POLL_INTERVAL,
+            BN_WATCHER_MAX_POLL_INTERVAL
+        ])
+
+    def test_backoff_is_reset_after_events(self):
+        delays = self.run_events_loop([False, False, True, False])
+
+        self.assertEqual(delays, [
+            BN_WATCHER_MIN_POLL_INTERVAL,
+            BN_WATCHER_MIN_POLL_INTERVAL * 2,
+            BN_WATCHER_MIN_POLL_INTERVAL,
+            BN_WATCHER_MIN_POLL_INTERVAL * 2
+        ])
+
+    def test_read_timeout_reconnects_right_away(self):
+        delays = self.run_events_loop([
+            False,
+            False,
+            httpx.ReadTimeout('No event'),
+            httpx.ReadTimeout('No event'),
+            httpx.ConnectError('Connection refused'),
+            httpx.ConnectError('Connection refused')
+        ])
+
+        self.assertEqual(delays, [
+            BN_WATCHER_MIN_POLL_INTERVAL,
+            BN_WATCHER_MIN_POLL_INTERVAL * 2,
+            BN_WATCHER_MIN_POLL_INTERVAL,
+            BN_WATCHER_MIN_POLL_INTERVAL * 2
+        ])
+
+    def test_stops_when_events_are_not_supported(self):
+        watcher = BeaconNodeWatcher(BASE_URL)
+
+        def consume_events():
+            watcher.events_supported = False
+            return False
+
+        with mock.patch.object(watcher, '_consume_events', side_effect=consume_events) as \
+            consume, mock.patch.object(watcher._stopping, 'wait') as wait:
+            watcher._events_loop()
+
+        self.assertEqual(consume.call_count, 1)
+        wait.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import io
+import json
+import unittest
+
+from ethwizard.depositdata import iter_json_array
+
+class IterJsonArrayTest(unittest.TestCase):
+
+    def assert_elements(self, content):
+        expected = json.loads(content)
+        for chunk_size in (1, 2, 3, 7, 1024):
+            with self.subTest(chunk_size=chunk_size):
+                elements = list(iter_json_array(io.StringIO(content), chunk_size=chunk_size))
+                self.assertEqual(elements, expected)
+
+    def test_objects(self):
+        self.assert_elements('[{"pubkey": "0x01", "amount": 32000000000}, {"a": [1, 2]}]')
+
+    def test_numbers_split_at_read_boundary(self):
+        self.assert_elements('[3.5, -12, 1e5, 2.5E-3, 10]')
+
+    def test_literals(self):
+        self.assert_elements('[true, false, null, "text"]')
+
+    def test_empty_array(self):
+        self.assert_elements(' [ ] ')
+
+    def test_invalid_array(self):
+        for content in ('{"a": 1}', '[1, 2', '[1 2]', '[3.]'):
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    list(iter_json_array(io.StringIO(content), chunk_size=1))
+
+if __name__ == '__main__':
+    unittest.main()
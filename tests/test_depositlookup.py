@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+import unittest
+
+from unittest import mock
+
+import httpx
+
+from ethwizard import httpclient, depositlookup
+
+from ethwizard.constants import (
+    NETWORK_MAINNET,
+    BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST,
+    BEACONCHA_IN_MAX_CONCURRENT_REQUESTS,
+    BEACONCHA_IN_RATE_LIMIT,
+    BEACONCHA_IN_RATE_PERIOD
+)
+
+log = logging.getLogger(__name__)
+
+def public_keys(count):
+    return [f'0x{index:096x}' for index in range(count)]
+
+class FakeClock():
+    # Stand-in for the time module where sleeping advances the clock instantly
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        with self.lock:
+            return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.sleeps.append(seconds)
+            self.now = self.now + seconds
+
+class FakeBeaconchain():
+    # beaconcha.in deposits API returning one deposit for each requested public key
+
+    def __init__(self, responder=None):
+        self.lock = threading.Lock()
+        self.requests = []
+        self.running = 0
+        self.max_running = 0
+        self.responder = responder
+
+    def handle(self, request):
+        keys = request.url.path.split('/')[4].split(',')
+
+        with self.lock:
+            self.requests.append(keys)
+            request_index = len(self.requests) - 1
+            self.running = self.running + 1
+            self.max_running = max(self.max_running, self.running)
+
+        try:
+            if self.responder is not None:
+                response = self.responder(request_index)
+                if response is not None:
+                    return response
+
+            data = [{'publickey': key, 'amount': 32000000000} for key in keys]
+            if len(data) == 1:
+                data = data[0]
+            return httpx.Response(200, json={'status': 'OK', 'data': data})
+        finally:
+            with self.lock:
+                self.running = self.running - 1
+
+class GetValidatorDepositsTest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(depositlookup, '_rate_limiter',
+            depositlookup.RateLimiter(BEACONCHA_IN_RATE_LIMIT, BEACONCHA_IN_RATE_PERIOD))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        httpclient.close_clients()
+
+    def serve(self, beaconchain):
+        httpclient.close_clients()
+        httpclient._client = httpx.Client(transport=httpx.MockTransport(beaconchain.handle))
+
+    def test_keys_are_chunked(self):
+        beaconchain = FakeBeaconchain()
+        self.serve(beaconchain)
+        keys = public_keys(2 * BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST + 1)
+
+        deposits = depositlookup.get_validator_deposits(NETWORK_MAINNET, keys, log)
+
+        self.assertEqual(sorted(len(chunk) for chunk in beaconchain.requests),
+            [1, BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST, BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST])
+        self.assertEqual([deposit['publickey'] for deposit in deposits], keys)
+
+    def test_no_keys(self):
+        beaconchain = FakeBeaconchain()
+        self.serve(beaconchain)
+
+        self.assertEqual(depositlookup.get_validator_deposits(NETWORK_MAINNET, [], log), [])
+        self.assertEqual(beaconchain.requests, [])
+
+    def test_chunks_are_requested_concurrently(self):
+        barrier = threading.Barrier(BEACONCHA_IN_MAX_CONCURRENT_REQUESTS, timeout=5)
+
+        def responder(request_index):
+            if request_index < BEACONCHA_IN_MAX_CONCURRENT_REQUESTS:
+                # Fails if the first requests are not all running at the same time
+                barrier.wait()
+            time.sleep(0.02)
+            return None
+
+        beaconchain = FakeBeaconchain(responder)
+        self.serve(beaconchain)
+        keys = public_keys(BEACONCHA_IN_RATE_LIMIT * BEACONCHA_IN_MAX_VALIDATORS_PER_REQUEST)
+
+        deposits = depositlookup.get_validator_deposits(NETWORK_MAINNET, keys, log)
+
+        self.assertEqual(len(beaconchain.requests), BEACONCHA_IN_RATE_LIMIT)
+        self.assertEqual(beaconchain.max_running, BEACONCHA_IN_MAX_CONCURRENT_REQUESTS)
+        self.assertEqual([deposit['publickey'] for deposit in deposits], keys)
+
+    def test_retry_after_is_honored(self):
+        def responder(request_index):
+            if request_index == 0:
+                return httpx.Response(429, headers={'Retry-After': '7'})
+            return None
+
+        beaconchain = FakeBeaconchain(responder)
+        self.serve(beaconchain)
+        clock = FakeClock()
+
+        with mock.patch.object(depositlookup, 'time', clock):
+            deposits = depositlookup.get_validator_deposits(NETWORK_MAINNET,
+                public_keys(3), log)
+
+        self.assertEqual(len(deposits), 3)
+        self.assertEqual(len(beaconchain.requests), 2)
+        self.assertEqual(clock.sleeps, [7.0])
+
+    def test_gives_up_after_retries(self):
+        beaconchain = FakeBeaconchain(lambda request_index: httpx.Response(500))
+        self.serve(beaconchain)
+
+        with mock.patch.object(depositlookup, 'time', FakeClock()):
+            deposits = depositlookup.get_validator_deposits(NETWORK_MAINNET,
+                public_keys(3), log)
+
+        self.assertIs(deposits, False)
+        self.assertEqual(len(beaconchain.requests), depositlookup.BEACONCHA_IN_MAX_RETRIES + 1)
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_rate_is_limited_per_period(self):
+        clock = FakeClock()
+        started = clock.now
+        limiter = depositlookup.RateLimiter(BEACONCHA_IN_RATE_LIMIT, BEACONCHA_IN_RATE_PERIOD)
+
+        acquired = []
+        with mock.patch.object(depositlookup, 'time', clock):
+            for index in range(2 * BEACONCHA_IN_RATE_LIMIT + 1):
+                limiter.acquire()
+                acquired.append(clock.now - started)
+
+        self.assertEqual(acquired,
+            [0.0] * BEACONCHA_IN_RATE_LIMIT +
+            [BEACONCHA_IN_RATE_PERIOD] * BEACONCHA_IN_RATE_LIMIT +
+            [2 * BEACONCHA_IN_RATE_PERIOD])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,240 @@
+import hashlib
+import logging
+import re
+import tempfile
+import threading
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+import httpx
+
+from ethwizard import httpclient, download
+
+from ethwizard.constants import DOWNLOAD_MAX_RETRIES
+
+log = logging.getLogger(__name__)
+
+URL = 'https://downloads.example.com/lighthouse.tar.gz'
+
+CONTENT = bytes(range(256)) * 400 + b'tail'
+
+RANGE_HEADER = re.compile(r'^bytes=(\d+)-(\d*)$')
+
+class DroppedStream(httpx.SyncByteStream):
+    # Response body that loses the connection after sending data
+
+    def __init__(self, data):
+        self.data = data
+
+    def __iter__(self):
+        if len(self.data) > 0:
+            yield self.data
+        raise httpx.ReadError('Connection dropped')
+
+class RecordingConsumer():
+
+    def __init__(self):
+        self.data = bytearray()
+        self.resets = 0
+
+    def update(self, data):
+        self.data.extend(data)
+
+    def reset(self):
+        self.data = bytearray()
+        self.resets = self.resets + 1
+
+class FakeServer():
+    # Serve CONTENT with the behaviors of the tests. get_handler receives each GET request with
+    # its parsed range and returns the response.
+
+    def __init__(self, content=CONTENT, validator='"v1"', accept_ranges=True, get_handler=None):
+        self.content = content
+        self.validator = validator
+        self.accept_ranges = accept_ranges
+        self.get_handler = get_handler or self.honor_range
+        self.lock = threading.Lock()
+        self.requests = []
+
+    def parse_range(self, request):
+        range_header = request.headers.get('Range')
+        if range_header is None:
+            return None
+        result = RANGE_HEADER.match(range_header)
+        start = int(result.group(1))
+        end = int(result.group(2)) if result.group(2) else len(self.content) - 1
+        return start, end
+
+    def honor_range(self, request, byte_range, request_index=None):
+        if byte_range is None:
+            return httpx.Response(200, content=self.content)
+        start, end = byte_range
+        return httpx.Response(206, content=self.content[start:end + 1], headers={
+            'Content-Range': f'bytes {start}-{end}/{len(self.content)}'
+        })
+
+    def handle(self, request):
+        if request.method == 'HEAD':
+            headers = {
+                'Content-Length': str(len(self.content)),
+                'ETag': self.validator
+            }
+            if self.accept_ranges:
+                headers['Accept-Ranges'] = 'bytes'
+            return httpx.Response(200, headers=headers)
+
+        byte_range = self.parse_range(request)
+        with self.lock:
+            self.requests.append((dict(request.headers), byte_range))
+            request_index = len(self.requests) - 1
+        return self.get_handler(request, byte_range, request_index)
+
+class DownloadFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+        self.destination = self.path.joinpath('lighthouse.tar.gz')
+
+        # No waiting between retries
+        patcher = mock.patch.object(download, 'DOWNLOAD_RETRY_DELAY', 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        httpclient.close_clients()
+        self.directory.cleanup()
+
+    def serve(self, server):
+        httpclient.close_clients()
+        httpclient._client = httpx.Client(transport=httpx.MockTransport(server.handle))
+
+    def download(self, connections=1, consumers=()):
+        return download.download_file(URL, self.destination, log, 'Lighthouse binary',
+            connections=connections, consumers=consumers)
+
+    def assertDownloaded(self, result, consumer=None):
+        self.assertIsNone(result.exception)
+        self.assertIsNone(result.status_code)
+        self.assertEqual(result.sha256, hashlib.sha256(CONTENT).hexdigest())
+        self.assertEqual(self.destination.read_bytes(), CONTENT)
+        if consumer is not None:
+            self.assertEqual(bytes(consumer.data), CONTENT)
+        self.assertEqual([path.name for path in self.path.iterdir()], [self.destination.name])
+
+    def test_resume_after_dropped_connection(self):
+        dropped_at = 10000
+
+        def get_handler(request, byte_range, request_index):
+            if request_index == 0:
+                return httpx.Response(200, stream=DroppedStream(CONTENT[:dropped_at]))
+            return server.honor_range(request, byte_range)
+
+        server = FakeServer(get_handler=get_handler)
+        self.serve(server)
+        consumer = RecordingConsumer()
+
+        self.assertDownloaded(self.download(consumers=[consumer]), consumer)
+
+        self.assertEqual(len(server.requests), 2)
+        first_headers, first_range = server.requests[0]
+        self.assertIsNone(first_range)
+        resume_headers, resume_range = server.requests[1]
+        self.assertEqual(resume_headers['range'], f'bytes={dropped_at}-')
+        self.assertEqual(resume_headers['if-range'], '"v1"')
+        self.assertEqual(consumer.resets, 0)
+
+    def test_full_response_to_range_restarts_download(self):
+        # The file changed on the server so it ignores the range and sends everything again
+        def get_handler(request, byte_range, request_index):
+            if request_index == 0:
+                return httpx.Response(200, stream=DroppedStream(b'old content'))
+            return httpx.Response(200, content=CONTENT)
+
+        server = FakeServer(get_handler=get_handler)
+        self.serve(server)
+        consumer = RecordingConsumer()
+
+        self.assertDownloaded(self.download(consumers=[consumer]), consumer)
+
+        self.assertEqual(len(server.requests), 2)
+        self.assertEqual(server.requests[1][1], (len(b'old content'), len(CONTENT) - 1))
+        self.assertEqual(consumer.resets, 1)
+
+    def test_parallel_parts_are_joined_in_order(self):
+        server = FakeServer()
+        self.serve(server)
+        consumer = RecordingConsumer()
+
+        with mock.patch.object(download, 'DOWNLOAD_PARALLEL_MIN_SIZE', 1024):
+            self.assertDownloaded(self.download(connections=4, consumers=[consumer]),
+                consumer)
+
+        ranges = sorted(byte_range for headers, byte_range in server.requests)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], len(CONTENT) - 1)
+        for previous, following in zip(ranges, ranges[1:]):
+            self.assertEqual(previous[1] + 1, following[0])
+
+    def test_range_not_honored_falls_back_to_single_connection(self):
+        def get_handler(request, byte_range, request_index):
+            return httpx.Response(200, content=CONTENT)
+
+        server = FakeServer(get_handler=get_handler)
+        self.serve(server)
+        consumer = RecordingConsumer()
+
+        with mock.patch.object(download, 'DOWNLOAD_PARALLEL_MIN_SIZE', 1024):
+            self.assertDownloaded(self.download(connections=4, consumers=[consumer]),
+                consumer)
+
+        self.assertIsNotNone(server.requests[0][1])
+        self.assertIsNone(server.requests[-1][1])
+
+    def test_retries_are_reset_after_progress(self):
+        # Every connection drops after a small part, more times than the retry limit
+        part_size = len(CONTENT) // (DOWNLOAD_MAX_RETRIES * 2)
+
+        def get_handler(request, byte_range, request_index):
+            start = 0 if byte_range is None else byte_range[0]
+            data = CONTENT[start:start + part_size]
+            status_code = 200 if byte_range is None else 206
+            if start + part_size >= len(CONTENT):
+                return httpx.Response(status_code, content=data)
+            return httpx.Response(status_code, stream=DroppedStream(data))
+
+        server = FakeServer(get_handler=get_handler)
+        self.serve(server)
+
+        self.assertDownloaded(self.download())
+        self.assertGreater(len(server.requests), DOWNLOAD_MAX_RETRIES + 1)
+
+    def test_gives_up_without_progress(self):
+        def get_handler(request, byte_range, request_index):
+            return httpx.Response(200, stream=DroppedStream(b''))
+
+        server = FakeServer(get_handler=get_handler)
+        self.serve(server)
+
+        result = self.download()
+
+        self.assertIsInstance(result.exception, httpx.ReadError)
+        self.assertEqual(len(server.requests), DOWNLOAD_MAX_RETRIES + 1)
+        self.assertFalse(self.destination.exists())
+
+    def test_unexpected_status_code(self):
+        def get_handler(request, byte_range, request_index):
+            return httpx.Response(404)
+
+        self.serve(FakeServer(get_handler=get_handler))
+
+        result = self.download()
+
+        self.assertEqual(result.status_code, 404)
+        self.assertIsNone(result.sha256)
+
+if __name__ == '__main__':
+    unittest.main()
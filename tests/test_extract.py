@@ -0,0 +1,117 @@
+import io
+import logging
+import tarfile
+import tempfile
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+from ethwizard.extract import StreamingTarExtractor
+
+log = logging.getLogger(__name__)
+
+def build_archive(members):
+    # Return a gzip tar archive with members, a dict of member name to content
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode='w:gz') as tar_file:
+        for name, content in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            info.mode = 0o755
+            tar_file.addfile(info, io.BytesIO(content))
+    return archive.getvalue()
+
+def extract(archive, staging_path, **kwargs):
+    extractor = StreamingTarExtractor(staging_path, log, **kwargs)
+    extractor.start()
+    for offset in range(0, len(archive), 1024):
+        extractor.update(archive[offset:offset + 1024])
+    return extractor, extractor.finish()
+
+class StreamingTarExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_strip_components_counts_leading_dot(self):
+        # staking-deposit-cli archives store their files as ./staking_deposit-cli-<ver>/deposit
+        archive = build_archive({
+            './staking_deposit-cli-d7b5304-linux-amd64/deposit': b'binary'
+        })
+
+        extractor, finished = extract(archive, self.path.joinpath('staging'),
+            strip_components=2, required_files=['deposit'])
+
+        self.assertTrue(finished)
+        self.assertTrue(extractor.install(self.path.joinpath('target')))
+        self.assertEqual(self.path.joinpath('target', 'deposit').read_bytes(), b'binary')
+
+    def test_strip_components_without_leading_dot(self):
+        archive = build_archive({
+            'lighthouse-v4.0.0/bin/lighthouse': b'binary'
+        })
+
+        extractor, finished = extract(archive, self.path.joinpath('staging'),
+            strip_components=2, required_files=['lighthouse'])
+
+        self.assertTrue(finished)
+        self.assertEqual(extractor.extracted, [Path('lighthouse')])
+
+    def test_missing_required_file_fails(self):
+        archive = build_archive({
+            './staking_deposit-cli-d7b5304-linux-amd64/deposit': b'binary'
+        })
+
+        extractor, finished = extract(archive, self.path.joinpath('staging'),
+            strip_components=3, required_files=['deposit'])
+
+        self.assertFalse(finished)
+        self.assertFalse(extractor.install(self.path.joinpath('target')))
+        self.assertFalse(self.path.joinpath('target', 'deposit').exists())
+
+    def test_path_escaping_target_is_skipped(self):
+        archive = build_archive({
+            '../outside': b'binary',
+            'inside': b'binary'
+        })
+
+        extractor, finished = extract(archive, self.path.joinpath('staging'))
+
+        self.assertTrue(finished)
+        self.assertEqual(extractor.extracted, [Path('inside')])
+
+    def test_install_replaces_existing_file(self):
+        target = self.path.joinpath('target')
+        target.mkdir()
+        target.joinpath('lighthouse').write_bytes(b'old binary')
+
+        extractor, finished = extract(build_archive({'lighthouse': b'new binary'}),
+            self.path.joinpath('staging'))
+
+        self.assertTrue(finished)
+        self.assertTrue(extractor.install(target))
+        self.assertEqual(target.joinpath('lighthouse').read_bytes(), b'new binary')
+        self.assertEqual([path.name for path in target.iterdir()], ['lighthouse'])
+
+    def test_failed_install_keeps_existing_file(self):
+        target = self.path.joinpath('target')
+        target.mkdir()
+        target.joinpath('lighthouse').write_bytes(b'old binary')
+
+        extractor, finished = extract(build_archive({'lighthouse': b'new binary'}),
+            self.path.joinpath('staging'))
+
+        self.assertTrue(finished)
+        with mock.patch('ethwizard.extract.os.replace', side_effect=OSError('Disk full')):
+            self.assertFalse(extractor.install(target))
+        self.assertEqual(target.joinpath('lighthouse').read_bytes(), b'old binary')
+        self.assertEqual([path.name for path in target.iterdir()], ['lighthouse'])
+        self.assertFalse(self.path.joinpath('staging').exists())
+
+if __name__ == '__main__':
+    unittest.main()
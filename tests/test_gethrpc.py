@@ -0,0 +1,129 @@
+import json
+import unittest
+
+import httpx
+
+from ethwizard import httpclient, gethrpc
+
+STATUS_RESPONSES = {
+    'eth_syncing': False,
+    'net_peerCount': '0x19',
+    'web3_clientVersion': 'Geth/v1.10.23-stable/linux-amd64/go1.18.5',
+    'eth_chainId': '0x1'
+}
+
+def result_entry(index, result):
+    return {'jsonrpc': '2.0', 'id': index, 'result': result}
+
+class ParseBatchTest(unittest.TestCase):
+
+    def test_out_of_order_responses(self):
+        methods = gethrpc.GETH_STATUS_METHODS
+        response_json = [result_entry(index, STATUS_RESPONSES[method])
+            for index, method in reversed(list(enumerate(methods)))]
+
+        results = gethrpc.parse_batch(methods, response_json)
+
+        for method in methods:
+            self.assertEqual(results[method]['result'], STATUS_RESPONSES[method])
+
+    def test_error_for_a_single_call(self):
+        methods = ('eth_syncing', 'net_peerCount')
+        error = {'code': -32601, 'message': 'the method net_peerCount does not exist'}
+        response_json = [
+            {'jsonrpc': '2.0', 'id': 1, 'error': error},
+            result_entry(0, False)
+        ]
+
+        results = gethrpc.parse_batch(methods, response_json)
+
+        self.assertEqual(results['eth_syncing']['result'], False)
+        self.assertEqual(results['net_peerCount']['error'], error)
+        self.assertNotIn('result', results['net_peerCount'])
+
+    def test_missing_and_unknown_ids(self):
+        methods = ('eth_syncing', 'net_peerCount', 'eth_chainId')
+        response_json = [
+            result_entry(2, '0x1'),
+            result_entry(7, 'out of range'),
+            result_entry('0', 'not an int'),
+            result_entry(None, 'no id'),
+            'not an object'
+        ]
+
+        results = gethrpc.parse_batch(methods, response_json)
+
+        self.assertEqual(results, {
+            'eth_syncing': None,
+            'net_peerCount': None,
+            'eth_chainId': result_entry(2, '0x1')
+        })
+
+    def test_body_is_not_a_list(self):
+        methods = ('eth_syncing', 'net_peerCount')
+        response_json = {'jsonrpc': '2.0', 'id': None,
+            'error': {'code': -32600, 'message': 'invalid request'}}
+
+        self.assertEqual(gethrpc.parse_batch(methods, response_json),
+            {'eth_syncing': None, 'net_peerCount': None})
+        self.assertEqual(gethrpc.parse_batch(methods, None),
+            {'eth_syncing': None, 'net_peerCount': None})
+
+class GetStatusTest(unittest.TestCase):
+
+    def tearDown(self):
+        httpclient.close_clients()
+
+    def serve(self, handler):
+        httpclient.close_clients()
+        httpclient._client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    def test_single_batch_request(self):
+        requests = []
+
+        def handler(request):
+            batch = json.loads(request.content)
+            requests.append(batch)
+            # Answer in reverse order like servers processing the batch concurrently may do
+            return httpx.Response(200, json=[
+                result_entry(entry['id'], STATUS_RESPONSES[entry['method']])
+                for entry in reversed(batch)])
+
+        self.serve(handler)
+
+        response, results = gethrpc.get_status()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(requests), 1)
+        self.assertEqual([entry['method'] for entry in requests[0]],
+            list(gethrpc.GETH_STATUS_METHODS))
+        for method in gethrpc.GETH_STATUS_METHODS:
+            self.assertEqual(results[method]['result'], STATUS_RESPONSES[method])
+
+    def test_error_status_code(self):
+        self.serve(lambda request: httpx.Response(503))
+
+        response, results = gethrpc.get_status()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIsNone(results)
+
+    def test_invalid_batch_error_object(self):
+        self.serve(lambda request: httpx.Response(200, json={'jsonrpc': '2.0', 'id': None,
+            'error': {'code': -32600, 'message': 'invalid request'}}))
+
+        response, results = gethrpc.get_status()
+
+        self.assertEqual(results, dict.fromkeys(gethrpc.GETH_STATUS_METHODS))
+
+    def test_call_with_error_member(self):
+        error = {'code': -32601, 'message': 'the method web3_clientVersion does not exist'}
+        self.serve(lambda request: httpx.Response(200, json=[
+            {'jsonrpc': '2.0', 'id': 0, 'error': error}]))
+
+        response, response_json = gethrpc.call('web3_clientVersion')
+
+        self.assertEqual(response_json['error'], error)
+
+if __name__ == '__main__':
+    unittest.main()
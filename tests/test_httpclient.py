@@ -0,0 +1,52 @@
+import asyncio
+import unittest
+
+from ethwizard import httpclient
+
+class CloseClientsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        httpclient.close_clients()
+        self.loop.close()
+
+    def get_async_client(self, loop):
+        async def get_client():
+            return httpclient.get_async_client()
+        return loop.run_until_complete(get_client())
+
+    def test_async_client_is_reused_on_the_same_loop(self):
+        client = self.get_async_client(self.loop)
+
+        self.assertIs(self.get_async_client(self.loop), client)
+
+    def test_async_clients_are_closed(self):
+        client = self.get_async_client(self.loop)
+        sync_client = httpclient.get_client()
+
+        httpclient.close_clients()
+
+        self.assertTrue(client.is_closed)
+        self.assertTrue(sync_client.is_closed)
+        self.assertFalse(self.loop.is_closed())
+
+        # A new client is created after closing
+        new_client = self.get_async_client(self.loop)
+        self.assertIsNot(new_client, client)
+        self.assertFalse(new_client.is_closed)
+
+    def test_client_of_closed_loop_is_dropped(self):
+        other_loop = asyncio.new_event_loop()
+        self.get_async_client(other_loop)
+        other_loop.close()
+        client = self.get_async_client(self.loop)
+
+        httpclient.close_clients()
+
+        self.assertTrue(client.is_closed)
+        self.assertEqual(len(httpclient._async_clients), 0)
+
+if __name__ == '__main__':
+    unittest.main()
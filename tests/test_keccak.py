@@ -0,0 +1,135 @@
+import hashlib
+import unittest
+
+from unittest import mock
+
+from ethwizard.utils import keccak, CompactFIPS202
+
+# Lengths around the 136 bytes rate of Keccak-256, SHA3-256 and SHAKE256 where the padding
+# fills the last block exactly or needs an extra one
+INPUT_LENGTHS = (0, 135, 136, 137)
+
+HASH_FUNCTIONS = ('Keccak_256', 'SHA3_224', 'SHA3_256', 'SHA3_384', 'SHA3_512')
+
+SHAKE_FUNCTIONS = ('SHAKE128', 'SHAKE256')
+
+HASHLIB_NAMES = {
+    'SHA3_224': 'sha3_224',
+    'SHA3_256': 'sha3_256',
+    'SHA3_384': 'sha3_384',
+    'SHA3_512': 'sha3_512',
+    'SHAKE128': 'shake_128',
+    'SHAKE256': 'shake_256'
+}
+
+# Rate in bytes of each function, to also test around its own block size
+RATES = {
+    'Keccak_256': 136,
+    'SHA3_224': 144,
+    'SHA3_256': 136,
+    'SHA3_384': 104,
+    'SHA3_512': 72,
+    'SHAKE128': 168,
+    'SHAKE256': 136
+}
+
+SHAKE_OUTPUT_LENGTHS = (0, 32, 168, 200, 500)
+
+KECCAK_256_EMPTY = 'c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470'
+
+def input_bytes(length):
+    return bytes((index * 7 + 3) % 256 for index in range(length))
+
+def input_lengths(function_name):
+    rate = RATES[function_name]
+    return sorted(set(INPUT_LENGTHS) | {rate - 1, rate, rate + 1, 2 * rate})
+
+class KeccakTest(unittest.TestCase):
+    # Compare the hash functions, with the libraries that are installed, against the
+    # CompactFIPS202 reference implementation and hashlib
+
+    def test_hash_functions(self):
+        for function_name in HASH_FUNCTIONS:
+            function = getattr(keccak, function_name)
+            reference = getattr(CompactFIPS202, function_name)
+            for length in input_lengths(function_name):
+                with self.subTest(function=function_name, length=length):
+                    data = input_bytes(length)
+                    digest = function(data)
+                    self.assertIsInstance(digest, bytearray)
+                    self.assertEqual(digest, reference(data))
+                    if function_name in HASHLIB_NAMES:
+                        self.assertEqual(bytes(digest),
+                            hashlib.new(HASHLIB_NAMES[function_name], data).digest())
+
+    def test_shake_functions(self):
+        for function_name in SHAKE_FUNCTIONS:
+            function = getattr(keccak, function_name)
+            reference = getattr(CompactFIPS202, function_name)
+            for length in input_lengths(function_name):
+                for output_length in SHAKE_OUTPUT_LENGTHS:
+                    with self.subTest(function=function_name, length=length,
+                        output_length=output_length):
+                        data = input_bytes(length)
+                        digest = function(data, output_length)
+                        self.assertEqual(len(digest), output_length)
+                        self.assertEqual(digest, reference(data, output_length))
+                        self.assertEqual(bytes(digest), hashlib.new(
+                            HASHLIB_NAMES[function_name], data).digest(output_length))
+
+    def test_keccak_256_known_digest(self):
+        self.assertEqual(keccak.Keccak_256(b'').hex(), KECCAK_256_EMPTY)
+
+    def test_accepts_bytearray(self):
+        data = input_bytes(137)
+        self.assertEqual(keccak.Keccak_256(bytearray(data)), keccak.Keccak_256(data))
+
+    def test_checksum_address(self):
+        from ethwizard.platforms.common import is_checksum_address, is_address
+
+        # Test vectors from EIP-55
+        for address in (
+            '0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed',
+            '0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359',
+            '0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB',
+            '0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb'
+            ):
+            with self.subTest(address=address):
+                self.assertTrue(is_checksum_address(address))
+                self.assertTrue(is_address(address))
+
+                # Change the case of the last letter
+                index = max(position for position, character in enumerate(address)
+                    if position > 1 and character.isalpha())
+                wrong_case = address[:index] + address[index].swapcase() + address[index + 1:]
+                self.assertFalse(is_checksum_address(wrong_case))
+                self.assertFalse(is_address(wrong_case))
+
+class PurePythonKeccakTest(KeccakTest):
+    # Same tests without pycryptodome, pysha3 or hashlib so the Keccak-f[1600] permutation in
+    # ethwizard.utils.keccak is used even when those are available
+
+    def setUp(self):
+        for name, value in (
+            ('_pycryptodome_keccak', None),
+            ('_pysha3', None),
+            ('_hashlib_digest', lambda name, inputBytes, outputByteLen=None: None)
+            ):
+            patcher = mock.patch.object(keccak, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_pure_python_path_is_used(self):
+        with mock.patch.object(keccak, 'Keccak', wraps=keccak.Keccak) as wrapped:
+            keccak.Keccak_256(b'')
+            keccak.SHA3_256(b'')
+            keccak.SHAKE128(b'', 16)
+
+        self.assertEqual(wrapped.call_count, 3)
+
+    def test_keccak_f1600(self):
+        state = bytearray(input_bytes(200))
+        self.assertEqual(keccak.KeccakF1600(state), CompactFIPS202.KeccakF1600(bytearray(state)))
+
+if __name__ == '__main__':
+    unittest.main()
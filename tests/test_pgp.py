@@ -0,0 +1,94 @@
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from ethwizard.pgp import (
+    SignatureVerifier,
+    get_key_block_fingerprints,
+    is_expected_key_block
+)
+
+log = logging.getLogger(__name__)
+
+@unittest.skipIf(shutil.which('gpg') is None, 'gpg is not installed')
+class PgpTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.path = Path(cls.directory.name)
+        cls.gpg_command = ['gpg', '--homedir', str(cls.path.joinpath('gnupg'))]
+        cls.path.joinpath('gnupg').mkdir(mode=0o700)
+
+        cls.fingerprints = []
+        for name in ('expected', 'other'):
+            subprocess.run(cls.gpg_command + ['--batch', '--passphrase', '',
+                '--quick-generate-key', f'{name} <{name}@example.com>', 'ed25519', 'sign',
+                'never'], check=True, capture_output=True)
+            process_result = subprocess.run(cls.gpg_command + ['--with-colons',
+                '--list-keys', f'{name}@example.com'], check=True, capture_output=True,
+                text=True)
+            fingerprint = [line.split(':')[9] for line in process_result.stdout.splitlines()
+                if line.startswith('fpr:')][0]
+            cls.fingerprints.append(fingerprint)
+
+        cls.expected_key = cls.export(cls.fingerprints[0])
+        cls.both_keys = cls.export(*cls.fingerprints)
+
+        cls.data_path = cls.path.joinpath('data.bin')
+        cls.data_path.write_bytes(os.urandom(100000))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    @classmethod
+    def export(cls, *fingerprints):
+        return subprocess.run(cls.gpg_command + ['--armor', '--export'] + list(fingerprints),
+            check=True, capture_output=True, text=True).stdout
+
+    def sign(self, fingerprint):
+        signature_path = self.path.joinpath(f'{fingerprint}.sig')
+        if not signature_path.exists():
+            subprocess.run(self.gpg_command + ['--batch', '--local-user', fingerprint,
+                '--detach-sign', '--output', str(signature_path), str(self.data_path)],
+                check=True, capture_output=True)
+        return signature_path
+
+    def verify(self, signature_path, key_id, data=None):
+        verifier = SignatureVerifier(self.gpg_command, signature_path, key_id, log)
+        verifier.start()
+        verifier.update(data if data is not None else self.data_path.read_bytes())
+        return verifier.finish()
+
+    def test_key_block_fingerprints(self):
+        self.assertEqual(get_key_block_fingerprints(self.gpg_command, self.both_keys),
+            self.fingerprints)
+
+    def test_key_block_with_other_keys_is_rejected(self):
+        expected = self.fingerprints[0]
+        self.assertTrue(is_expected_key_block(self.gpg_command, self.expected_key, expected))
+        self.assertTrue(is_expected_key_block(self.gpg_command, self.expected_key,
+            expected[-16:]))
+        self.assertFalse(is_expected_key_block(self.gpg_command, self.both_keys, expected))
+        self.assertFalse(is_expected_key_block(self.gpg_command, 'not a key', expected))
+
+    def test_signature_from_expected_key(self):
+        expected = self.fingerprints[0]
+        self.assertTrue(self.verify(self.sign(expected), expected))
+        self.assertTrue(self.verify(self.sign(expected), expected[-16:]))
+
+    def test_signature_from_other_key_is_rejected(self):
+        self.assertFalse(self.verify(self.sign(self.fingerprints[1]), self.fingerprints[0]))
+
+    def test_tampered_data_is_rejected(self):
+        expected = self.fingerprints[0]
+        self.assertFalse(self.verify(self.sign(expected), expected, b'tampered'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import json
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from ethwizard.constants import STATE_JOURNAL_COMPACT_THRESHOLD
+from ethwizard.statestore import StateStore
+
+class StateStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def store(self):
+        return StateStore(self.path)
+
+    def journal_lines(self, store):
+        if not store.journal_path.is_file():
+            return []
+        return store.journal_path.read_bytes().splitlines(keepends=True)
+
+    def read_snapshot(self, store):
+        return json.loads(store.snapshot_path.read_text(encoding='utf8'))
+
+    def test_save_and_load(self):
+        store = self.store()
+        self.assertIsNone(store.load())
+
+        self.assertTrue(store.save('first_step', {'network': 'mainnet'}))
+        self.assertTrue(store.save('second_step', {'network': 'mainnet', 'ports': [30303]}))
+        self.assertTrue(store.save('third_step', {'ports': [30303, 9000]}))
+
+        self.assertEqual(self.store().load(), {
+            'step': 'third_step',
+            'context': {'ports': [30303, 9000]}
+        })
+
+    def test_unchanged_save_writes_nothing(self):
+        store = self.store()
+        store.save('first_step', {'network': 'mainnet'})
+        store.save('second_step', {'network': 'mainnet', 'ports': [30303]})
+
+        journal = store.journal_path.read_bytes()
+        store.save('second_step', {'network': 'mainnet', 'ports': [30303]})
+
+        self.assertEqual(store.journal_path.read_bytes(), journal)
+
+    def test_truncated_last_record_is_dropped(self):
+        store = self.store()
+        store.save('first_step', {'network': 'mainnet'})
+        store.save('second_step', {'network': 'mainnet', 'ports': [30303]})
+
+        complete_journal = store.journal_path.read_bytes()
+
+        # Interrupted save
+        with open(store.journal_path, 'ab') as journal_file:
+            journal_file.write(b'{"generation": 1, "step": "third_step", "set": {"por')
+
+        loaded_store = self.store()
+        self.assertEqual(loaded_store.load(), {
+            'step': 'second_step',
+            'context': {'network': 'mainnet', 'ports': [30303]}
+        })
+        self.assertEqual(loaded_store.journal_path.read_bytes(), complete_journal)
+
+        # New records are not appended to the incomplete one
+        loaded_store.save('third_step', {'network': 'mainnet', 'ports': [30303, 9000]})
+        self.assertEqual(self.store().load(), {
+            'step': 'third_step',
+            'context': {'network': 'mainnet', 'ports': [30303, 9000]}
+        })
+
+    def test_records_from_old_generation_are_ignored(self):
+        store = self.store()
+        store.save('first_step', {'network': 'mainnet'})
+        store.save('second_step', {'network': 'goerli'})
+        old_journal = store.journal_path.read_bytes()
+        self.assertEqual(self.read_snapshot(store)['generation'], 1)
+
+        # Interrupted compaction, the new snapshot is written but the old journal remains
+        store._compact('third_step', {'network': json.dumps('sepolia')})
+        store.journal_path.write_bytes(old_journal)
+
+        self.assertEqual(self.store().load(), {
+            'step': 'third_step',
+            'context': {'network': 'sepolia'}
+        })
+
+    def test_compaction_at_threshold(self):
+        store = self.store()
+        store.save('step', {'counter': 0})
+
+        for counter in range(1, STATE_JOURNAL_COMPACT_THRESHOLD + 1):
+            store.save('step', {'counter': counter})
+        self.assertEqual(len(self.journal_lines(store)), STATE_JOURNAL_COMPACT_THRESHOLD)
+        self.assertEqual(self.read_snapshot(store)['generation'], 1)
+
+        store.save('step', {'counter': STATE_JOURNAL_COMPACT_THRESHOLD + 1})
+
+        self.assertFalse(store.journal_path.is_file())
+        snapshot = self.read_snapshot(store)
+        self.assertEqual(snapshot['generation'], 2)
+        self.assertEqual(snapshot['context'], {'counter': STATE_JOURNAL_COMPACT_THRESHOLD + 1})
+
+        # The journal starts over with the new generation
+        store.save('step', {'counter': 0})
+        lines = self.journal_lines(store)
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])['generation'], 2)
+        self.assertEqual(self.store().load()['context'], {'counter': 0})
+
+    def test_old_state_file_still_loads(self):
+        store = self.store()
+        store.snapshot_path.write_text(json.dumps({
+            'step': 'install_geth_step',
+            'context': {'selected_network': 'mainnet'}
+        }), encoding='utf8')
+
+        self.assertEqual(store.load(), {
+            'step': 'install_geth_step',
+            'context': {'selected_network': 'mainnet'}
+        })
+
+        store.save('install_lighthouse_step', {'selected_network': 'mainnet', 'ports': [9000]})
+
+        self.assertEqual(self.store().load(), {
+            'step': 'install_lighthouse_step',
+            'context': {'selected_network': 'mainnet', 'ports': [9000]}
+        })
+
+    def test_corrupted_snapshot(self):
+        store = self.store()
+        store.snapshot_path.write_text('{"step": ', encoding='utf8')
+
+        self.assertIsNone(store.load())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,214 @@
+import threading
+import time
+import unittest
+
+from ethwizard.constants import (
+    WIZARD_COMPLETED_STEP_ID,
+    CTX_STEP_METRICS,
+    INSTALL_LIGHTHOUSE_STEP_ID,
+    INSTALL_GETH_STEP_ID,
+    INSTALL_CHRONY_STEP_ID,
+    TEST_OPEN_PORTS_STEP_ID
+)
+from ethwizard.platforms.common import Step, StepSequence
+
+class StepRecorder():
+    # Build steps that record when they run and which other steps were running with them
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = set()
+        self.started = []
+        self.finished = []
+        self.running_with = {}
+
+    def step(self, step_id, reads=None, writes=None, depends_on=None, interactive=False,
+        delay=0.05, barrier=None, exception=None):
+
+        def function(step, context, step_sequence):
+            with self.lock:
+                self.running_with[step_id] = set(self.running)
+                self.running.add(step_id)
+                self.started.append(step_id)
+
+            if barrier is not None:
+                # Fails if the other steps of the barrier are not running concurrently
+                barrier.wait()
+            time.sleep(delay)
+
+            with self.lock:
+                self.running.discard(step_id)
+                self.finished.append(step_id)
+
+            if exception is not None:
+                raise exception
+
+            for key in step.writes or []:
+                context[key] = step_id
+            return context
+
+        return Step(
+            step_id=step_id,
+            display_name=step_id,
+            exc_function=function,
+            reads=reads,
+            writes=writes,
+            depends_on=depends_on,
+            interactive=interactive
+        )
+
+class StepSequenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = StepRecorder()
+        self.saved = []
+
+    def save_state(self, step_id, context):
+        # Keep the saved context without the step timing metrics
+        saved_context = dict(context)
+        saved_context.pop(CTX_STEP_METRICS, None)
+        self.saved.append((step_id, saved_context))
+        return True
+
+    def sequence(self, steps):
+        return StepSequence(steps, self.save_state, max_workers=4)
+
+    def test_independent_steps_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        sequence = self.sequence([
+            self.recorder.step('first', reads=[], writes=['a'], barrier=barrier),
+            self.recorder.step('second', reads=[], writes=['b'], barrier=barrier)
+        ])
+
+        self.assertTrue(sequence.run_from_start())
+        self.assertEqual(self.saved[-1][0], WIZARD_COMPLETED_STEP_ID)
+        self.assertEqual(self.saved[-1][1], {'a': 'first', 'b': 'second'})
+
+    def test_conflicting_steps_are_serialized(self):
+        sequence = self.sequence([
+            self.recorder.step('write', reads=[], writes=['shared']),
+            self.recorder.step('write_again', reads=[], writes=['shared']),
+            self.recorder.step('read', reads=['shared'], writes=['other']),
+            self.recorder.step('write_read', reads=[], writes=['other'])
+        ])
+
+        self.assertTrue(sequence.run_from_start())
+
+        self.assertEqual(self.recorder.running_with['write'], set())
+        self.assertEqual(self.recorder.running_with['write_again'], set())
+        self.assertEqual(self.recorder.running_with['read'], set())
+        self.assertEqual(self.recorder.running_with['write_read'], set())
+        self.assertEqual(self.recorder.finished,
+            ['write', 'write_again', 'read', 'write_read'])
+        self.assertEqual(self.saved[-1][1], {'shared': 'write_again', 'other': 'write_read'})
+
+    def test_unknown_reads_and_writes_are_serialized(self):
+        sequence = self.sequence([
+            self.recorder.step('known', reads=[], writes=['a']),
+            self.recorder.step('unknown')
+        ])
+
+        self.assertTrue(sequence.run_from_start())
+
+        self.assertEqual(self.recorder.finished, ['known', 'unknown'])
+        self.assertEqual(self.recorder.running_with['unknown'], set())
+
+    def test_depends_on_order_is_respected(self):
+        sequence = self.sequence([
+            self.recorder.step('service', reads=[], writes=['a'], delay=0.2),
+            self.recorder.step('other', reads=[], writes=['b']),
+            self.recorder.step('port_test', reads=[], writes=['c'], depends_on=['service'])
+        ])
+
+        self.assertTrue(sequence.run_from_start())
+
+        self.assertLess(self.recorder.finished.index('service'),
+            self.recorder.started.index('port_test'))
+        self.assertNotIn('service', self.recorder.running_with['port_test'])
+        self.assertIn('service', self.recorder.running_with['other'])
+
+    def test_interactive_steps_never_run_concurrently(self):
+        sequence = self.sequence([
+            self.recorder.step('background', reads=[], writes=['a'], delay=0.2),
+            self.recorder.step('dialog', interactive=True),
+            self.recorder.step('after_dialog', reads=[], writes=['b']),
+            self.recorder.step('other_dialog', interactive=True),
+            self.recorder.step('last', reads=[], writes=['c'])
+        ])
+
+        self.assertTrue(sequence.run_from_start())
+
+        self.assertEqual(self.recorder.started,
+            ['background', 'dialog', 'after_dialog', 'other_dialog', 'last'])
+        for step_id in self.recorder.started:
+            self.assertEqual(self.recorder.running_with[step_id], set())
+
+    def test_run_from_step_resumes_from_the_first_incomplete_step(self):
+        barrier = threading.Barrier(2, timeout=5)
+        sequence = self.sequence([
+            self.recorder.step('done', interactive=True),
+            self.recorder.step('slow', reads=['done'], writes=['a'], delay=0.3,
+                barrier=barrier),
+            self.recorder.step('fast', reads=['done'], writes=['b'], barrier=barrier),
+            self.recorder.step('last', interactive=True)
+        ])
+
+        self.assertTrue(sequence.run_from_step('slow', {'done': True}))
+
+        self.assertEqual(self.recorder.started[:2], ['slow', 'fast'])
+        self.assertEqual(set(self.recorder.started), {'slow', 'fast', 'last'})
+        self.assertEqual(self.recorder.finished[-1], 'last')
+
+        # Once fast completed, resuming still has to start from slow
+        fast_saves = [step_id for step_id, context in self.saved
+            if 'b' in context and 'a' not in context]
+        self.assertGreater(len(fast_saves), 0)
+        self.assertEqual(set(fast_saves), {'slow'})
+
+        self.assertEqual(self.saved[-1],
+            (WIZARD_COMPLETED_STEP_ID, {'done': True, 'a': 'slow', 'b': 'fast'}))
+
+        # The original save_state is restored once the run is over
+        self.assertEqual(sequence.save_state, self.save_state)
+
+    def test_run_from_unknown_step(self):
+        sequence = self.sequence([
+            self.recorder.step('only', interactive=True)
+        ])
+
+        self.assertFalse(sequence.run_from_step('missing'))
+        self.assertEqual(self.recorder.started, [])
+
+    def test_exception_in_concurrent_step_propagates(self):
+        sequence = self.sequence([
+            self.recorder.step('fails', reads=[], writes=['a'],
+                exception=ValueError('install failed')),
+            self.recorder.step('other', reads=[], writes=['b']),
+            self.recorder.step('never', interactive=True)
+        ])
+
+        with self.assertRaises(ValueError):
+            sequence.run_from_start()
+
+        self.assertNotIn('never', self.recorder.started)
+        self.assertNotIn(WIZARD_COMPLETED_STEP_ID, [step_id for step_id, context in self.saved])
+        self.assertEqual(sequence.save_state, self.save_state)
+
+    def test_ubuntu_client_installations_overlap(self):
+        from ethwizard.platforms.ubuntu.install import installation_steps
+
+        steps = installation_steps()
+        sequence = self.sequence(steps)
+        indexes = {step.step_id: index for index, step in enumerate(steps)}
+        dependencies = sequence._build_dependencies(list(range(len(steps))))
+
+        installs = [indexes[step_id] for step_id in (
+            INSTALL_LIGHTHOUSE_STEP_ID, INSTALL_GETH_STEP_ID, INSTALL_CHRONY_STEP_ID)]
+        for index in installs:
+            self.assertFalse(steps[index].interactive)
+            self.assertEqual(dependencies[index] & set(installs), set())
+
+        self.assertTrue(set(installs[:2]) <= dependencies[indexes[TEST_OPEN_PORTS_STEP_ID]])
+
+if __name__ == '__main__':
+    unittest.main()